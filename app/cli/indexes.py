@@ -0,0 +1,26 @@
+# Command line entry point to manage the candidate indexes:
+#   python -m app.cli.indexes status
+#   python -m app.cli.indexes ensure
+import argparse
+from app.helper.index_helper import IndexHelper
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Manage the candidate collection indexes")
+    parser.add_argument("command", choices=["status", "ensure"], help="show the missing indexes, or build them")
+    args = parser.parse_args()
+
+    if args.command == "ensure":
+        for name in IndexHelper.ensure_indexes():
+            print(f"ready    {name}")
+        return
+
+    missing = IndexHelper.missing_indexes()
+    for index in missing:
+        print(f"missing  {index.document['name']}")
+    if not missing:
+        print("All declared indexes exist")
+
+
+if __name__ == "__main__":
+    main()
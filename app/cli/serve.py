@@ -0,0 +1,188 @@
+# Command line entry point serving the API with several worker processes:
+#   python -m app.cli.serve --workers 8 --port 8000
+#   kill -HUP <pid>     rolling restart, one worker at a time
+#   kill -TERM <pid>    graceful shutdown
+import argparse
+import logging
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import time
+from typing import List, Optional
+import uvicorn
+from dotenv import load_dotenv
+
+# Load environment variables from the .env file
+load_dotenv()
+
+# Workers are spawned, not forked, so each one imports the app and opens its MongoDB clients and caches itself
+spawn = multiprocessing.get_context("spawn")
+
+# Seconds between two checks of the workers by the supervisor
+SUPERVISOR_TICK = 0.5
+
+# A worker exiting sooner than this after its start without ever being ready is a crash, restarts back off
+CRASH_BACKOFF = 1.0
+
+
+# uvicorn server telling the supervisor once its lifespan startup is done and it accepts connections
+class WorkerServer(uvicorn.Server):
+
+    def __init__(self, config: uvicorn.Config, ready):
+        super().__init__(config)
+        self.ready = ready
+
+    async def startup(self, sockets: Optional[List[socket.socket]] = None) -> None:
+        await super().startup(sockets=sockets)
+        if self.started:
+            self.ready.set()
+
+
+# Method for running one worker process on the socket bound by the supervisor
+def run_worker(config_kwargs: dict, sockets: List[socket.socket], ready) -> None:
+    config = uvicorn.Config("app.main:app", **config_kwargs)
+    WorkerServer(config, ready).run(sockets=sockets)
+
+
+# One worker process and the event it sets once ready
+class Worker:
+
+    def __init__(self, process, ready):
+        self.process = process
+        self.ready = ready
+        self.started_at = time.monotonic()
+
+
+# Supervisor class keeping the configured number of workers running on one shared listening socket
+class Supervisor:
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.workers: List[Worker] = []
+        self.stopping = False
+        self.restart_requested = False
+        self.config = uvicorn.Config("app.main:app", host=args.host, port=args.port, backlog=args.backlog)
+        self.socket: Optional[socket.socket] = None
+
+    # Method for building the uvicorn settings of a worker, the request limit is jittered so workers do not recycle together
+    def worker_config(self) -> dict:
+        config = {"host": self.args.host, "port": self.args.port, "loop": self.args.loop, "http": self.args.http, "lifespan": "on"}
+        if self.args.max_requests:
+            config["limit_max_requests"] = self.args.max_requests + random.randint(0, self.args.max_requests_jitter)
+        return config
+
+    # Method for starting one worker
+    def spawn_worker(self) -> Worker:
+        ready = spawn.Event()
+        process = spawn.Process(target=run_worker, args=(self.worker_config(), [self.socket], ready), daemon=False)
+        process.start()
+        worker = Worker(process, ready)
+        self.workers.append(worker)
+        logging.info(f"Started worker {process.pid}")
+        return worker
+
+    # Method for stopping a worker: SIGTERM lets it finish its requests, SIGKILL after the graceful timeout
+    def stop_worker(self, worker: Worker) -> None:
+        if worker.process.is_alive():
+            worker.process.terminate()
+            worker.process.join(self.args.graceful_timeout)
+        if worker.process.is_alive():
+            logging.warning(f"Worker {worker.process.pid} did not stop within {self.args.graceful_timeout}s, killing it")
+            worker.process.kill()
+            worker.process.join()
+        if worker in self.workers:
+            self.workers.remove(worker)
+
+    # Method for replacing the workers that exited, recycled after their request limit or crashed
+    def reap_workers(self) -> None:
+        for worker in list(self.workers):
+            if worker.process.is_alive():
+                continue
+            worker.process.join()
+            self.workers.remove(worker)
+            if worker.process.exitcode == 0:
+                logging.info(f"Worker {worker.process.pid} exited after its request limit, replacing it")
+            else:
+                logging.error(f"Worker {worker.process.pid} exited with code {worker.process.exitcode}, replacing it")
+                if not worker.ready.is_set() and time.monotonic() - worker.started_at < CRASH_BACKOFF:
+                    time.sleep(CRASH_BACKOFF)
+        while not self.stopping and len(self.workers) < self.args.workers:
+            self.spawn_worker()
+
+    # Method for restarting the workers one at a time, each replacement has to be ready before an old worker stops
+    def rolling_restart(self) -> None:
+        logging.info("Rolling restart of the workers")
+        for old_worker in list(self.workers):
+            if self.stopping:
+                return
+            new_worker = self.spawn_worker()
+            if not new_worker.ready.wait(self.args.ready_timeout):
+                logging.error(f"Worker {new_worker.process.pid} was not ready within {self.args.ready_timeout}s, rolling restart aborted")
+                self.stop_worker(new_worker)
+                return
+            self.stop_worker(old_worker)
+        logging.info("Rolling restart done")
+
+    # Method for handling the supervisor signals, only flags are set so the work happens in the main loop
+    def handle_signal(self, signum, frame) -> None:
+        if signum == signal.SIGHUP:
+            self.restart_requested = True
+        else:
+            self.stopping = True
+
+    def run(self) -> None:
+        self.socket = self.config.bind_socket()
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+            signal.signal(signum, self.handle_signal)
+        logging.info(f"Supervisor {os.getpid()} serving on {self.args.host}:{self.args.port} with {self.args.workers} workers")
+        for _ in range(self.args.workers):
+            self.spawn_worker()
+        try:
+            while not self.stopping:
+                if self.restart_requested:
+                    self.restart_requested = False
+                    self.rolling_restart()
+                self.reap_workers()
+                time.sleep(SUPERVISOR_TICK)
+        finally:
+            logging.info("Stopping the workers")
+            for worker in self.workers:
+                if worker.process.is_alive():
+                    worker.process.terminate()
+            for worker in list(self.workers):
+                self.stop_worker(worker)
+            self.socket.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve the API with several worker processes")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", 8000)))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", 1)),
+                        help="number of worker processes, defaults to WEB_CONCURRENCY or 1")
+    parser.add_argument("--max-requests", type=int, default=int(os.getenv("MAX_REQUESTS", 0)),
+                        help="recycle a worker after this many requests to cap its memory growth, 0 never recycles")
+    parser.add_argument("--max-requests-jitter", type=int, default=int(os.getenv("MAX_REQUESTS_JITTER", 0)),
+                        help="random extra requests per worker, so the workers do not recycle together")
+    parser.add_argument("--graceful-timeout", type=float, default=float(os.getenv("GRACEFUL_TIMEOUT", 30)),
+                        help="seconds a stopping worker gets to finish its requests")
+    parser.add_argument("--ready-timeout", type=float, default=float(os.getenv("READY_TIMEOUT", 60)),
+                        help="seconds a new worker gets to start during a rolling restart")
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--loop", default=os.getenv("UVICORN_LOOP", "auto"), help="auto, asyncio or uvloop")
+    parser.add_argument("--http", default=os.getenv("UVICORN_HTTP", "auto"), help="auto, h11 or httptools")
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [supervisor] %(levelname)s %(message)s")
+    if args.workers > 1:
+        logging.warning("The change streams and the token cache invalidation are per worker: a stream only sees the writes of its "
+                        "own worker, and a token cached by another worker authenticates until TOKEN_CACHE_TTL after an invalidation")
+    Supervisor(args).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,165 @@
 from pymongo.mongo_client import MongoClient
+from pymongo.collection import Collection
+from pymongo.database import Database
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection
 from dotenv import load_dotenv
+from app.helper.pool_monitor_helper import PoolMonitor
+from app.helper.command_monitor_helper import CommandMonitor
+from app.helper.metrics_helper import METRICS_ENABLED
+from typing import Optional
+import asyncio
+import logging
 import os
+import threading
+import time
 
 load_dotenv()
 
 uri = os.getenv('DATABASE_URL')
-# Initialize MongoDB connection
-
-client = MongoClient(uri)
-
-db = client[f"{os.getenv('MONGO_INITDB_DATABASE')}"]
-
-user_collection = db['users']
-candidate_collection = db['candidates']
-
-candidate_collection.create_index([("first_name", "text"),
-    ("last_name", "text"),
-    ("email", "text"),
-    ("career_level", "text"),
-    ("job_major", "text"),
-    ("degree_type", "text"),
-    ("skills", "text"),
-    ("nationality", "text"),
-    ("city", "text")
-])
-
-try:
-    client.admin.command('ping')
-    print("Connected to Mongo")
-except Exception as e:
-    print(e)
\ No newline at end of file
+database_name = f"{os.getenv('MONGO_INITDB_DATABASE')}"
+
+# Storage path used by the routes: "sync" (pymongo) or "async" (motor)
+database_mode = os.getenv('DATABASE_MODE', 'sync')
+
+# Connection pool and timeout settings, shared by the pymongo and motor clients
+MONGO_MAX_POOL_SIZE = int(os.getenv('MONGO_MAX_POOL_SIZE', 100))
+MONGO_MIN_POOL_SIZE = int(os.getenv('MONGO_MIN_POOL_SIZE', 10))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv('MONGO_WAIT_QUEUE_TIMEOUT_MS', 2000))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv('MONGO_SOCKET_TIMEOUT_MS', 20000))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv('MONGO_CONNECT_TIMEOUT_MS', 5000))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000))
+# Comma separated wire compressors, e.g. "zstd,zlib" (empty disables compression)
+MONGO_COMPRESSORS = os.getenv('MONGO_COMPRESSORS', '')
+# How long startup waits for the pool to open MONGO_MIN_POOL_SIZE connections
+MONGO_WARM_UP_TIMEOUT = float(os.getenv('MONGO_WARM_UP_TIMEOUT', 5))
+
+def client_options() -> dict:
+    """
+    Build the MongoClient keyword arguments from the pool settings.
+    """
+    options = {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "waitQueueTimeoutMS": MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        "socketTimeoutMS": MONGO_SOCKET_TIMEOUT_MS,
+        "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    }
+    if MONGO_COMPRESSORS:
+        options["compressors"] = MONGO_COMPRESSORS
+    return options
+
+# MongoDB class owning the MongoDB clients for the lifetime of the application.
+# The lifespan of the app connects and warms them before traffic and closes them on shutdown;
+# outside of it (tests, CLI) they are created on first use.
+class MongoDB:
+    client: Optional[MongoClient] = None
+    async_client: Optional[AsyncIOMotorClient] = None
+    pool_monitor = PoolMonitor("sync")
+    async_pool_monitor = PoolMonitor("async")
+    # Command timings for /metrics, only listened to when metrics are enabled
+    command_monitors = [CommandMonitor()] if METRICS_ENABLED else []
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_client(cls) -> MongoClient:
+        if cls.client is None:
+            with cls._lock:
+                if cls.client is None:
+                    cls.client = MongoClient(uri, event_listeners=[cls.pool_monitor, *cls.command_monitors], **client_options())
+        return cls.client
+
+    @classmethod
+    def get_async_client(cls) -> AsyncIOMotorClient:
+        if cls.async_client is None:
+            with cls._lock:
+                if cls.async_client is None:
+                    cls.async_client = AsyncIOMotorClient(uri, event_listeners=[cls.async_pool_monitor, *cls.command_monitors], **client_options())
+        return cls.async_client
+
+    @classmethod
+    def connect(cls) -> None:
+        """
+        Connect the pymongo client and wait until its pool holds MONGO_MIN_POOL_SIZE connections.
+
+        Raises:
+        - pymongo errors if the server cannot be reached, so a misconfigured app fails to start.
+        """
+        cls.get_client().admin.command('ping')
+        deadline = time.monotonic() + MONGO_WARM_UP_TIMEOUT
+        while cls.pool_monitor.open < MONGO_MIN_POOL_SIZE and time.monotonic() < deadline:
+            time.sleep(0.05)
+        logging.info(f"Connected to Mongo, {cls.pool_monitor.open} pooled connections")
+
+    @classmethod
+    async def connect_async(cls) -> None:
+        """
+        Connect the motor client and wait until its pool holds MONGO_MIN_POOL_SIZE connections.
+        """
+        await cls.get_async_client().admin.command('ping')
+        deadline = time.monotonic() + MONGO_WARM_UP_TIMEOUT
+        while cls.async_pool_monitor.open < MONGO_MIN_POOL_SIZE and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        logging.info(f"Connected to Mongo (async), {cls.async_pool_monitor.open} pooled connections")
+
+    @classmethod
+    def close(cls) -> None:
+        with cls._lock:
+            if cls.client is not None:
+                cls.client.close()
+                cls.client = None
+            if cls.async_client is not None:
+                cls.async_client.close()
+                cls.async_client = None
+
+    @classmethod
+    def reset_after_fork(cls) -> None:
+        """
+        Forget the clients inherited from the parent process, a forked worker opens its own.
+
+        MongoClient is not fork-safe: its pools, monitors and locks belong to the parent.
+        """
+        cls.client = None
+        cls.async_client = None
+        cls.pool_monitor = PoolMonitor("sync")
+        cls.async_pool_monitor = PoolMonitor("async")
+        cls._lock = threading.Lock()
+
+    @classmethod
+    def pool_stats(cls) -> dict:
+        """
+        Report the pool gauges of the clients that are currently open.
+        """
+        stats = {}
+        if cls.client is not None:
+            stats["sync"] = cls.pool_monitor.stats(MONGO_MAX_POOL_SIZE)
+        if cls.async_client is not None:
+            stats["async"] = cls.async_pool_monitor.stats(MONGO_MAX_POOL_SIZE)
+        return stats
+
+# Workers forked by a pre-fork server (rather than spawned by app.cli.serve) must not reuse the parent's clients
+os.register_at_fork(after_in_child=MongoDB.reset_after_fork)
+
+def get_database() -> Database:
+    return MongoDB.get_client()[database_name]
+
+def get_user_collection() -> Collection:
+    return get_database()['users']
+
+def get_candidate_collection() -> Collection:
+    return get_database()['candidates']
+
+# Per-user version of the candidate list, bumped by every candidate write
+def get_candidate_version_collection() -> Collection:
+    return get_database()['candidate_versions']
+
+def get_async_user_collection() -> AsyncIOMotorCollection:
+    return MongoDB.get_async_client()[database_name]['users']
+
+def get_async_candidate_collection() -> AsyncIOMotorCollection:
+    return MongoDB.get_async_client()[database_name]['candidates']
+
+def get_async_candidate_version_collection() -> AsyncIOMotorCollection:
+    return MongoDB.get_async_client()[database_name]['candidate_versions']
+
+# Indexes are declared in app/config/index_config.py and built at startup (see IndexHelper)
@@ -0,0 +1,45 @@
+from pymongo import ASCENDING, TEXT, IndexModel
+from app.helper.cursor_helper import SORTABLE_FIELDS
+
+# Declarative registry of the candidate collection indexes.
+# Every candidate query is scoped to one user, so the compound indexes are led by user_id,
+# followed by the equality filters and then the range / sort field.
+
+# Free-text search over the candidate profile (a collection can only hold one text index)
+CANDIDATE_TEXT_INDEX = IndexModel([
+    ("first_name", TEXT),
+    ("last_name", TEXT),
+    ("email", TEXT),
+    ("career_level", TEXT),
+    ("job_major", TEXT),
+    ("degree_type", TEXT),
+    ("skills", TEXT),
+    ("nationality", TEXT),
+    ("city", TEXT)
+])
+
+# Keyset pagination and sorting of /all-candidates
+CANDIDATE_SORT_INDEXES = [
+    IndexModel([("user_id", ASCENDING), ("_id", ASCENDING)]) if field == "_id"
+    else IndexModel([("user_id", ASCENDING), (field, ASCENDING), ("_id", ASCENDING)])
+    for field in SORTABLE_FIELDS
+]
+
+# Common filter shapes of /all-candidates
+CANDIDATE_FILTER_INDEXES = [
+    IndexModel([("user_id", ASCENDING), ("career_level", ASCENDING), ("salary", ASCENDING)]),
+    IndexModel([("user_id", ASCENDING), ("city", ASCENDING), ("salary", ASCENDING)]),
+    IndexModel([("user_id", ASCENDING), ("skills", ASCENDING), ("salary", ASCENDING)]),
+    IndexModel([("user_id", ASCENDING), ("job_major", ASCENDING), ("years_of_experience", ASCENDING)]),
+    IndexModel([("user_id", ASCENDING), ("gender", ASCENDING), ("career_level", ASCENDING)]),
+    IndexModel([("user_id", ASCENDING), ("nationality", ASCENDING), ("city", ASCENDING)]),
+    IndexModel([("user_id", ASCENDING), ("degree_type", ASCENDING)]),
+    IndexModel([("user_id", ASCENDING), ("email", ASCENDING)]),
+]
+
+CANDIDATE_INDEXES = [CANDIDATE_TEXT_INDEX] + CANDIDATE_SORT_INDEXES + CANDIDATE_FILTER_INDEXES
+
+# Lookup of the users registered with an email, done on every user creation
+USER_INDEXES = [
+    IndexModel([("email", ASCENDING)]),
+]
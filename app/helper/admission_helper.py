@@ -0,0 +1,179 @@
+# Importing libraries
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs
+from anyio.to_thread import current_default_thread_limiter
+from dotenv import load_dotenv
+from app.config.db_config import MongoDB, database_mode, MONGO_MAX_POOL_SIZE
+from app.helper.metrics_helper import REGISTRY
+
+# Load environment variables from the .env file
+load_dotenv()
+
+# Set ADMISSION_ENABLED=false to drop the rate limits, the concurrency limits and the load shedding
+ADMISSION_ENABLED = os.getenv('ADMISSION_ENABLED', 'true').lower() not in ('0', 'false', 'no')
+
+# Per-user token bucket of every request: refill rate (requests per second, 0 disables it) and burst
+RATE_LIMIT_RATE = float(os.getenv('RATE_LIMIT_RATE', 20))
+RATE_LIMIT_BURST = float(os.getenv('RATE_LIMIT_BURST', 40))
+
+# Separate per-user token bucket of the expensive requests (reports, imports, facets, shortlists, text search)
+EXPENSIVE_RATE_LIMIT_RATE = float(os.getenv('EXPENSIVE_RATE_LIMIT_RATE', 1))
+EXPENSIVE_RATE_LIMIT_BURST = float(os.getenv('EXPENSIVE_RATE_LIMIT_BURST', 10))
+
+# Requests handled at once per route, and across all the expensive routes together (0 disables a limit)
+ROUTE_CONCURRENCY_LIMIT = int(os.getenv('ROUTE_CONCURRENCY_LIMIT', 64))
+EXPENSIVE_CONCURRENCY_LIMIT = int(os.getenv('EXPENSIVE_CONCURRENCY_LIMIT', 4))
+
+# Load shedding thresholds: operations waiting for a Mongo connection and tasks waiting for a threadpool thread
+ADMISSION_MAX_POOL_WAITERS = int(os.getenv('ADMISSION_MAX_POOL_WAITERS', MONGO_MAX_POOL_SIZE // 2))
+ADMISSION_MAX_THREADPOOL_QUEUE = int(os.getenv('ADMISSION_MAX_THREADPOOL_QUEUE', 100))
+
+# Share of the Mongo pool in use past which expensive requests are shed, before the cheap ones are affected
+ADMISSION_EXPENSIVE_POOL_SATURATION = float(os.getenv('ADMISSION_EXPENSIVE_POOL_SATURATION', 0.8))
+
+# Seconds a shed or concurrency limited client is told to wait
+ADMISSION_RETRY_AFTER = int(os.getenv('ADMISSION_RETRY_AFTER', 1))
+
+# Number of users whose token buckets are kept, least recently seen ones are forgotten first
+RATE_LIMIT_MAX_USERS = 100000
+
+# Routes never limited, so probes and scrapes keep working under overload
+EXEMPT_ROUTES = {"/health", "/health/live", "/health/ready", "/metrics", "/docs", "/redoc", "/openapi.json"}
+
+# Routes whose requests scan or write many candidates, by method
+EXPENSIVE_ROUTES = {
+    ("GET", "/generate-report"),
+    ("POST", "/reports"),
+    ("POST", "/candidates/import"),
+    ("GET", "/candidates/facets"),
+    ("POST", "/candidates/shortlist"),
+}
+
+# Long-lived streams, they would hold a route slot for their whole life and are bounded by CHANGE_FEED_MAX_SUBSCRIBERS instead
+STREAMING_ROUTES = {"/candidates/changes"}
+
+# Listing routes that become expensive with a free-text search
+TEXT_SEARCH_ROUTES = {"/all-candidates", "/candidates/facets"}
+
+ADMISSION_REJECTIONS = REGISTRY.counter(
+    "admission_rejections", "Requests rejected by the admission control, by reason.", ("reason",))
+
+# TokenBuckets class, one bucket per key refilled continuously up to its burst
+class TokenBuckets:
+
+    def __init__(self, rate: float, burst: float, maxsize: int = RATE_LIMIT_MAX_USERS):
+        self.rate = rate
+        self.burst = burst
+        self.maxsize = maxsize
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    # Method for taking one token from a key's bucket, returns 0 when granted or the seconds until one is available
+    def take(self, key: str) -> float:
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [self.burst, now]
+                if len(self._buckets) > self.maxsize:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0.0
+            return (1 - bucket[0]) / self.rate
+
+# ConcurrencyLimits class counting the requests in progress per route and per budget, without queueing
+class ConcurrencyLimits:
+
+    def __init__(self):
+        self._active: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    # Method for entering every slot or none of them, returns False when one of them is full
+    def acquire(self, slots: Tuple[Tuple[str, int], ...]) -> bool:
+        with self._lock:
+            if any(limit and self._active.get(slot, 0) >= limit for slot, limit in slots):
+                return False
+            for slot, _ in slots:
+                self._active[slot] = self._active.get(slot, 0) + 1
+            return True
+
+    # Method for leaving slots entered with acquire
+    def release(self, slots: Tuple[Tuple[str, int], ...]) -> None:
+        with self._lock:
+            for slot, _ in slots:
+                self._active[slot] -= 1
+
+# AdmissionControl class deciding whether a request is served, rate limited or shed
+class AdmissionControl:
+    requests = TokenBuckets(RATE_LIMIT_RATE, RATE_LIMIT_BURST)
+    expensive_requests = TokenBuckets(EXPENSIVE_RATE_LIMIT_RATE, EXPENSIVE_RATE_LIMIT_BURST)
+    concurrency = ConcurrencyLimits()
+
+    # Method for giving a forked worker full token buckets and no request in progress, the parent's slots are not its own
+    @staticmethod
+    def reset_after_fork() -> None:
+        AdmissionControl.requests = TokenBuckets(RATE_LIMIT_RATE, RATE_LIMIT_BURST)
+        AdmissionControl.expensive_requests = TokenBuckets(EXPENSIVE_RATE_LIMIT_RATE, EXPENSIVE_RATE_LIMIT_BURST)
+        AdmissionControl.concurrency = ConcurrencyLimits()
+
+    # Method for telling whether a request runs an expensive operation
+    @staticmethod
+    def is_expensive(method: str, route: str, query_string: bytes) -> bool:
+        if (method, route) in EXPENSIVE_ROUTES:
+            return True
+        if route in TEXT_SEARCH_ROUTES and b"search=" in query_string:
+            return any(value.strip() for value in parse_qs(query_string.decode("latin-1")).get("search", []))
+        return False
+
+    # Method for the concurrency slots a request takes: its route, and the shared budget if it is expensive, none for a stream
+    @staticmethod
+    def slots(method: str, route: str, expensive: bool) -> Tuple[Tuple[str, int], ...]:
+        if route in STREAMING_ROUTES:
+            return ()
+        slots = ((f"{method} {route}", ROUTE_CONCURRENCY_LIMIT),)
+        if expensive:
+            slots += (("expensive", EXPENSIVE_CONCURRENCY_LIMIT),)
+        return slots
+
+    # Method for checking whether the process is overloaded, returns the reason to shed the request or None
+    @staticmethod
+    def overload(expensive: bool) -> Optional[str]:
+        monitor = MongoDB.async_pool_monitor if database_mode == "async" else MongoDB.pool_monitor
+        if ADMISSION_MAX_POOL_WAITERS and monitor.waiting >= ADMISSION_MAX_POOL_WAITERS:
+            return "pool_queue"
+        if expensive and MONGO_MAX_POOL_SIZE and monitor.in_use / MONGO_MAX_POOL_SIZE >= ADMISSION_EXPENSIVE_POOL_SATURATION:
+            return "pool_saturation"
+        if ADMISSION_MAX_THREADPOOL_QUEUE and current_default_thread_limiter().statistics().tasks_waiting >= ADMISSION_MAX_THREADPOOL_QUEUE:
+            return "threadpool_queue"
+        return None
+
+    # Method for taking the per-user tokens of a request, returns None when granted or the bucket that ran out and the seconds to wait
+    @staticmethod
+    def rate_limit(identity: str, expensive: bool) -> Optional[Tuple[str, float]]:
+        wait = AdmissionControl.requests.take(identity)
+        if wait:
+            return "rate_limit", wait
+        if expensive:
+            wait = AdmissionControl.expensive_requests.take(identity)
+            if wait:
+                return "expensive_rate_limit", wait
+        return None
+
+    # Method for rounding a wait up to the whole seconds of a Retry-After header
+    @staticmethod
+    def retry_after(wait: float) -> str:
+        return str(max(1, math.ceil(wait)))
+
+os.register_at_fork(after_in_child=AdmissionControl.reset_after_fork)
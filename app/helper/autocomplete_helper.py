@@ -0,0 +1,159 @@
+# Importing libraries
+import heapq
+import os
+import threading
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+from dotenv import load_dotenv
+from app.helper.candidate_events_helper import CandidateEvents
+
+# Load environment variables from the .env file
+load_dotenv()
+
+# Candidate fields offered by the autocomplete, skills holds a list of values
+AUTOCOMPLETE_FIELDS = ("skills", "city", "job_major", "career_level")
+
+# Number of users whose autocomplete index is kept in memory, least recently used first out
+AUTOCOMPLETE_MAX_USERS = int(os.getenv('AUTOCOMPLETE_MAX_USERS', 1000))
+
+# Number of suggestions returned when the client does not send a limit
+DEFAULT_SUGGESTIONS = 10
+MAX_SUGGESTIONS = 50
+
+# Highest code point, appended to a prefix it bounds every key starting with it
+_PREFIX_END = "\U0010ffff"
+
+# PrefixIndex class, the distinct values of one field with their frequency, sorted for prefix range scans
+class PrefixIndex:
+
+    def __init__(self):
+        # Case-folded value -> [value as first seen, number of candidates holding it]
+        self.values: Dict[str, list] = {}
+        # Sorted case-folded values, None while the index is being built
+        self.keys: Optional[List[str]] = None
+
+    # Method for counting a value in or out of the index
+    def add(self, value: str, delta: int) -> None:
+        key = value.strip().casefold()
+        if not key:
+            return
+        entry = self.values.get(key)
+        if entry is None:
+            if delta > 0:
+                self.values[key] = [value.strip(), delta]
+                if self.keys is not None:
+                    insort(self.keys, key)
+            return
+        entry[1] += delta
+        if entry[1] <= 0:
+            del self.values[key]
+            if self.keys is not None:
+                del self.keys[bisect_left(self.keys, key)]
+
+    # Method for sorting the keys once a bulk build is done
+    def seal(self) -> None:
+        self.keys = sorted(self.values)
+
+    # Method for returning the most frequent values starting with the prefix, ties in alphabetical order
+    def suggest(self, prefix: str, limit: int) -> List[dict]:
+        prefix = prefix.strip().casefold()
+        start = bisect_left(self.keys, prefix)
+        end = bisect_left(self.keys, prefix + _PREFIX_END, start)
+        best = heapq.nsmallest(limit, self.keys[start:end], key=lambda key: (-self.values[key][1], key))
+        return [{"value": self.values[key][0], "count": self.values[key][1]} for key in best]
+
+# AutocompleteIndex class, per-user prefix indexes built lazily and kept current by the candidate writes.
+# Indexes are tagged with the candidate list version stored in MongoDB, so a write handled
+# by another worker makes them stale and they are rebuilt on the next request.
+class AutocompleteIndex:
+    # User key -> (candidate list version, indexes of the fields)
+    _indexes: "OrderedDict[str, Tuple[int, Dict[str, PrefixIndex]]]" = OrderedDict()
+    _lock = threading.Lock()
+
+    # Method for giving a forked worker no loaded index and a lock no parent thread can be holding
+    @staticmethod
+    def reset_after_fork() -> None:
+        AutocompleteIndex._indexes = OrderedDict()
+        AutocompleteIndex._lock = threading.Lock()
+
+    # Method for building the projection that only reads the autocomplete fields
+    @staticmethod
+    def projection() -> dict:
+        return {field: 1 for field in AUTOCOMPLETE_FIELDS}
+
+    # Method for returning the loaded indexes of a user at a list version, or None when they must be built
+    @staticmethod
+    def loaded(user_key: str, version: int) -> Optional[Dict[str, PrefixIndex]]:
+        with AutocompleteIndex._lock:
+            entry = AutocompleteIndex._indexes.get(user_key)
+            if entry is None or entry[0] != version:
+                return None
+            AutocompleteIndex._indexes.move_to_end(user_key)
+            return entry[1]
+
+    # Method for creating the empty indexes of a build
+    @staticmethod
+    def empty() -> Dict[str, PrefixIndex]:
+        return {field: PrefixIndex() for field in AUTOCOMPLETE_FIELDS}
+
+    # Method for counting the values of one candidate in or out of the indexes
+    @staticmethod
+    def apply(indexes: Dict[str, PrefixIndex], document: Optional[dict], delta: int) -> None:
+        if not document:
+            return
+        for field, index in indexes.items():
+            value = document.get(field)
+            for item in (value if isinstance(value, list) else [value]):
+                if isinstance(item, str):
+                    index.add(item, delta)
+
+    # Method for building the indexes of a user from their candidates
+    @staticmethod
+    def build(documents: Iterable[dict]) -> Dict[str, PrefixIndex]:
+        indexes = AutocompleteIndex.empty()
+        for document in documents:
+            AutocompleteIndex.apply(indexes, document, 1)
+        return indexes
+
+    # Method for sealing and keeping a build, tagged with the list version read before its candidates
+    @staticmethod
+    def store(user_key: str, version: int, indexes: Dict[str, PrefixIndex]) -> Dict[str, PrefixIndex]:
+        for index in indexes.values():
+            index.seal()
+        with AutocompleteIndex._lock:
+            AutocompleteIndex._indexes[user_key] = (version, indexes)
+            AutocompleteIndex._indexes.move_to_end(user_key)
+            while len(AutocompleteIndex._indexes) > AUTOCOMPLETE_MAX_USERS:
+                AutocompleteIndex._indexes.popitem(last=False)
+        return indexes
+
+    # Method for returning the suggestions of one field
+    @staticmethod
+    def suggest(indexes: Dict[str, PrefixIndex], field: str, prefix: str, limit: int) -> List[dict]:
+        with AutocompleteIndex._lock:
+            return indexes[field].suggest(prefix, limit)
+
+    # Method for applying a candidate write of this worker to the loaded indexes of its user.
+    # The write bumped the list version by one and so do the indexes, when another worker
+    # wrote meanwhile the versions differ and the next request rebuilds them.
+    @staticmethod
+    def on_event(event: str, user_key: str, before: Optional[dict], after: Optional[dict]) -> None:
+        with AutocompleteIndex._lock:
+            entry = AutocompleteIndex._indexes.get(user_key)
+            if entry is not None:
+                version, indexes = entry
+                AutocompleteIndex.apply(indexes, before, -1)
+                AutocompleteIndex.apply(indexes, after, 1)
+                AutocompleteIndex._indexes[user_key] = (version + 1, indexes)
+
+    # Method for dropping every loaded index
+    @staticmethod
+    def reset() -> None:
+        with AutocompleteIndex._lock:
+            AutocompleteIndex._indexes.clear()
+
+# Keep the loaded indexes current with every candidate write
+CandidateEvents.subscribe(AutocompleteIndex.on_event)
+
+os.register_at_fork(after_in_child=AutocompleteIndex.reset_after_fork)
@@ -0,0 +1,91 @@
+# Importing libraries
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+# Sentinel telling a cache miss apart from a cached None
+_MISSING = object()
+
+# TTLCache class, a bounded in-process cache with LRU eviction and per-entry expiry
+class TTLCache:
+    # Every cache of the process, held weakly so a dropped cache is not kept alive by the fork hook
+    _instances: "weakref.WeakSet[TTLCache]" = weakref.WeakSet()
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        # Sync routes run in the threadpool, so every access is serialized
+        self._lock = threading.Lock()
+        TTLCache._instances.add(self)
+
+    # Method for giving a forked worker empty caches and locks no parent thread can be holding
+    @staticmethod
+    def reset_all_after_fork() -> None:
+        for cache in list(TTLCache._instances):
+            cache._reset_after_fork()
+
+    def _reset_after_fork(self) -> None:
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    # Method for reading an entry, expired entries and values rejected by is_valid count as misses and are dropped
+    def get(self, key: Hashable, default: Any = None, is_valid: Optional[Callable[[Any], bool]] = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING:
+                expires_at, value = entry
+                if expires_at > time.monotonic() and (is_valid is None or is_valid(value)):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    # Method for storing an entry, evicting the least recently used one when full
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    # Method for removing an entry
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    # Method for removing every entry
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    # Method for reporting the size and hit ratio of the cache
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+# Short lived cache of listing totals keyed by (list version, full query), shared by the sync and async repositories
+count_cache = TTLCache(
+    maxsize=1024,
+    ttl=float(os.getenv('CANDIDATE_COUNT_CACHE_TTL', 30))
+)
+
+os.register_at_fork(after_in_child=TTLCache.reset_all_after_fork)
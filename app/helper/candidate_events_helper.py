@@ -0,0 +1,29 @@
+# Importing libraries
+import logging
+from typing import Callable, List, Optional
+
+# Candidate write events published by CandidateService
+CREATED = "created"
+UPDATED = "updated"
+DELETED = "deleted"
+
+# A listener receives (event, user key, candidate before the write, candidate after the write)
+Listener = Callable[[str, str, Optional[dict], Optional[dict]], None]
+
+# CandidateEvents class, an in-process publisher of candidate writes for the derived in-memory structures
+class CandidateEvents:
+    _listeners: List[Listener] = []
+
+    # Method for registering a listener of every candidate write
+    @staticmethod
+    def subscribe(listener: Listener) -> None:
+        CandidateEvents._listeners.append(listener)
+
+    # Method for publishing a write, a failing listener never fails the write itself
+    @staticmethod
+    def publish(event: str, user_key: str, before: Optional[dict] = None, after: Optional[dict] = None) -> None:
+        for listener in CandidateEvents._listeners:
+            try:
+                listener(event, user_key, before, after)
+            except Exception as e:
+                logging.error(f"A candidate {event} listener failed: {e}")
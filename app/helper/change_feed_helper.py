@@ -0,0 +1,235 @@
+# Importing libraries
+import asyncio
+import os
+import threading
+import uuid
+from collections import OrderedDict, deque
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from app.helper.candidate_events_helper import CandidateEvents, CREATED, UPDATED, DELETED
+from app.helper.metrics_helper import REGISTRY
+from app.helper.serialization_helper import SerializationHelper
+
+# Load environment variables from the .env file
+load_dotenv()
+
+# Number of recent events kept per user, a client reconnecting with a Last-Event-ID inside them misses nothing
+CHANGE_FEED_HISTORY = int(os.getenv('CHANGE_FEED_HISTORY', 1000))
+
+# Number of users whose recent events are kept, least recently written or subscribed first out
+CHANGE_FEED_MAX_USERS = int(os.getenv('CHANGE_FEED_MAX_USERS', 100))
+
+# Events buffered per subscriber, a subscriber falling further behind is disconnected and resumes from the history
+CHANGE_FEED_QUEUE_SIZE = int(os.getenv('CHANGE_FEED_QUEUE_SIZE', 256))
+
+# Seconds between two keep-alive comments on an idle stream, so proxies do not close it
+CHANGE_FEED_HEARTBEAT = float(os.getenv('CHANGE_FEED_HEARTBEAT', 15))
+
+# Maximum number of open streams per worker, further subscribers are refused
+CHANGE_FEED_MAX_SUBSCRIBERS = int(os.getenv('CHANGE_FEED_MAX_SUBSCRIBERS', 1000))
+
+# Milliseconds a client waits before reconnecting, sent as the SSE retry field
+CHANGE_FEED_RETRY_MS = 3000
+
+CHANGE_FEED_SUBSCRIBERS = REGISTRY.gauge(
+    "change_feed_subscribers", "Open candidate change streams.")
+CHANGE_FEED_EVENTS = REGISTRY.counter(
+    "change_feed_events", "Candidate change events published to the change streams, by type.", ("type",))
+CHANGE_FEED_OVERFLOWS = REGISTRY.counter(
+    "change_feed_overflows", "Change streams disconnected because their subscriber fell behind.")
+
+# Queued in place of the events of a subscriber that fell behind
+_OVERFLOW = object()
+
+# Fields of a candidate never sent in an update, they change with every write
+BOOKKEEPING_FIELDS = ("updated_at",)
+
+# One open change stream: its bounded queue and the event loop it is read from
+class Subscription:
+
+    def __init__(self, user_key: str, loop: asyncio.AbstractEventLoop):
+        self.user_key = user_key
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=CHANGE_FEED_QUEUE_SIZE)
+        self.overflowed = False
+
+    # Method for queueing an event on the subscriber's event loop, a full queue drops the backlog for an overflow marker
+    def deliver(self, event) -> None:
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            CHANGE_FEED_OVERFLOWS.inc()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(_OVERFLOW)
+
+# ChangeFeed class, an in-process pub/sub of the candidate writes of each user, streamed as server-sent events
+class ChangeFeed:
+    # Changes the event ids, so a Last-Event-ID from another process or before a restart is recognized
+    _epoch = uuid.uuid4().hex[:12]
+    _sequence = 0
+    _history: "OrderedDict[str, deque]" = OrderedDict()
+    # Sequence number of the newest event dropped from the history of each user
+    _evicted: Dict[str, int] = {}
+    # Sequence number of the newest event of the histories dropped whole, a user without history may have missed up to it
+    _forgotten = 0
+    _subscriptions: Dict[str, List[Subscription]] = {}
+    _count = 0
+    _lock = threading.Lock()
+
+    # Method for giving a forked worker its own epoch and an empty feed
+    @staticmethod
+    def reset_after_fork() -> None:
+        ChangeFeed._epoch = uuid.uuid4().hex[:12]
+        ChangeFeed._sequence = 0
+        ChangeFeed._history = OrderedDict()
+        ChangeFeed._evicted = {}
+        ChangeFeed._forgotten = 0
+        ChangeFeed._subscriptions = {}
+        ChangeFeed._count = 0
+        ChangeFeed._lock = threading.Lock()
+
+    # Method for building the event of a candidate write: the candidate when created, its changed fields when updated
+    @staticmethod
+    def change(event: str, before: Optional[dict], after: Optional[dict]) -> dict:
+        if event == CREATED:
+            return {"type": event, "candidate_id": str(after["_id"]), "candidate": after}
+        if event == UPDATED:
+            changed = {
+                field: value for field, value in after.items()
+                if field not in BOOKKEEPING_FIELDS and (field not in before or before[field] != value)
+            }
+            return {"type": event, "candidate_id": str(after["_id"]), "changed": changed}
+        return {"type": DELETED, "candidate_id": str(before["_id"])}
+
+    # Method for publishing a candidate write to the history and the open streams of its user
+    @staticmethod
+    def on_event(event: str, user_key: str, before: Optional[dict], after: Optional[dict]) -> None:
+        change = ChangeFeed.change(event, before, after)
+        with ChangeFeed._lock:
+            ChangeFeed._sequence += 1
+            entry = (ChangeFeed._sequence, change)
+            history = ChangeFeed._history.get(user_key)
+            if history is None:
+                history = ChangeFeed.new_history(user_key)
+            ChangeFeed._history.move_to_end(user_key)
+            if len(history) == history.maxlen:
+                ChangeFeed._evicted[user_key] = history[0][0]
+            history.append(entry)
+            closed = []
+            for subscription in ChangeFeed._subscriptions.get(user_key, ()):
+                # Writes run in the threadpool or on the event loop, the queue is only touched from its own loop.
+                # Scheduling under the lock keeps every stream in sequence order.
+                try:
+                    subscription.loop.call_soon_threadsafe(subscription.deliver, entry)
+                except RuntimeError:
+                    closed.append(subscription)
+        CHANGE_FEED_EVENTS.inc(change["type"])
+        # The event loop of these subscribers is closed
+        for subscription in closed:
+            ChangeFeed.unsubscribe(subscription)
+
+    # Method for creating the history of a user, the least recently used one is dropped past CHANGE_FEED_MAX_USERS.
+    # Called under the lock.
+    @staticmethod
+    def new_history(user_key: str) -> deque:
+        history = ChangeFeed._history[user_key] = deque(maxlen=CHANGE_FEED_HISTORY)
+        # The events of the user dropped with an earlier history cannot be replayed
+        ChangeFeed._evicted[user_key] = ChangeFeed._forgotten
+        while len(ChangeFeed._history) > max(CHANGE_FEED_MAX_USERS, 1):
+            dropped_key, dropped = ChangeFeed._history.popitem(last=False)
+            ChangeFeed._evicted.pop(dropped_key, None)
+            if dropped:
+                ChangeFeed._forgotten = max(ChangeFeed._forgotten, dropped[-1][0])
+        return history
+
+    # Method for formatting an event id, the epoch of the process and the sequence number of the event
+    @staticmethod
+    def event_id(sequence: int) -> str:
+        return f"{ChangeFeed._epoch}-{sequence}"
+
+    # Method for reading the sequence number of a Last-Event-ID, None when it comes from another process or is invalid
+    @staticmethod
+    def parse_event_id(last_event_id: Optional[str]) -> Optional[int]:
+        epoch, _, sequence = (last_event_id or "").strip().rpartition("-")
+        if epoch != ChangeFeed._epoch or not sequence.isdigit():
+            return None
+        return int(sequence)
+
+    # Method for opening a stream, returns the subscription, the events to replay, and the position to reset
+    # the client to when it missed events, None otherwise
+    @staticmethod
+    def subscribe(user_key: str, last_event_id: Optional[str] = None) -> Optional[Tuple[Subscription, List[tuple], Optional[int]]]:
+        subscription = Subscription(user_key, asyncio.get_running_loop())
+        resume_after = ChangeFeed.parse_event_id(last_event_id)
+        with ChangeFeed._lock:
+            if ChangeFeed._count >= CHANGE_FEED_MAX_SUBSCRIBERS:
+                return None
+            ChangeFeed._subscriptions.setdefault(user_key, []).append(subscription)
+            ChangeFeed._count += 1
+            # Registered under the same lock as the history is read, so no event falls between the replay and the queue
+            history = ChangeFeed._history.get(user_key)
+            if history is not None:
+                ChangeFeed._history.move_to_end(user_key)
+            history = list(history or ())
+            evicted = ChangeFeed._evicted.get(user_key, ChangeFeed._forgotten)
+            position = ChangeFeed._sequence
+        CHANGE_FEED_SUBSCRIBERS.inc()
+        if not last_event_id:
+            return subscription, [], None
+        if resume_after is None or resume_after < evicted:
+            # Resuming from another process, a restart or past the history: what was missed cannot be replayed
+            return subscription, [], position
+        return subscription, [entry for entry in history if entry[0] > resume_after], None
+
+    # Method for closing a stream
+    @staticmethod
+    def unsubscribe(subscription: Subscription) -> None:
+        with ChangeFeed._lock:
+            subscriptions = ChangeFeed._subscriptions.get(subscription.user_key, [])
+            if subscription not in subscriptions:
+                return
+            subscriptions.remove(subscription)
+            if not subscriptions:
+                del ChangeFeed._subscriptions[subscription.user_key]
+            ChangeFeed._count -= 1
+        CHANGE_FEED_SUBSCRIBERS.dec()
+
+    # Method for formatting one server-sent event
+    @staticmethod
+    def format(event: str, data: dict, event_id: Optional[str] = None) -> bytes:
+        lines = f"id: {event_id}\n" if event_id else ""
+        return f"{lines}event: {event}\ndata: ".encode() + SerializationHelper.dumps_json(data) + b"\n\n"
+
+    # Method for streaming the events of a subscription: the replay or a reset when events were missed, then live events
+    @staticmethod
+    async def stream(subscription: Subscription, replay: List[tuple], reset_at: Optional[int] = None) -> AsyncIterator[bytes]:
+        try:
+            yield f"retry: {CHANGE_FEED_RETRY_MS}\n\n".encode()
+            if reset_at is not None:
+                # The client must reload the candidate list, the feed resumes from the position of the reset
+                yield ChangeFeed.format("reset", {"reason": "events_missed"}, ChangeFeed.event_id(reset_at))
+            for sequence, change in replay:
+                yield ChangeFeed.format(change["type"], change, ChangeFeed.event_id(sequence))
+            while True:
+                try:
+                    entry = await asyncio.wait_for(subscription.queue.get(), CHANGE_FEED_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                if entry is _OVERFLOW:
+                    # Closing lets the client reconnect with its Last-Event-ID and catch up from the history
+                    yield ChangeFeed.format("overflow", {"reason": "subscriber_too_slow"})
+                    return
+                sequence, change = entry
+                yield ChangeFeed.format(change["type"], change, ChangeFeed.event_id(sequence))
+        finally:
+            ChangeFeed.unsubscribe(subscription)
+
+# Stream every candidate write to the open change streams of its user
+CandidateEvents.subscribe(ChangeFeed.on_event)
+
+os.register_at_fork(after_in_child=ChangeFeed.reset_after_fork)
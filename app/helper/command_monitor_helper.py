@@ -0,0 +1,16 @@
+# Importing libraries
+from pymongo import monitoring
+from app.helper.metrics_helper import MONGO_COMMAND_DURATION
+
+# CommandMonitor class timing every MongoDB command sent by a client
+class CommandMonitor(monitoring.CommandListener):
+
+    # The driver already measured the round-trip, nothing to record when a command starts
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        MONGO_COMMAND_DURATION.observe(event.duration_micros / 1e6, event.command_name, "success")
+
+    def failed(self, event):
+        MONGO_COMMAND_DURATION.observe(event.duration_micros / 1e6, event.command_name, "failure")
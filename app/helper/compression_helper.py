@@ -0,0 +1,122 @@
+# Importing libraries
+import os
+import zlib
+from typing import Callable, Dict, Optional
+from dotenv import load_dotenv
+
+# zstd and brotli are optional, they are only negotiated when their package is installed
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Load environment variables from the .env file
+load_dotenv()
+
+# Responses smaller than this many bytes are sent uncompressed
+COMPRESSION_MINIMUM_SIZE = int(os.getenv('COMPRESSION_MINIMUM_SIZE', 1024))
+
+# Compression levels, gzip / deflate 1-9, zstd 1-22, brotli 0-11; low levels keep streaming cheap
+COMPRESSION_LEVEL = int(os.getenv('COMPRESSION_LEVEL', 6))
+COMPRESSION_ZSTD_LEVEL = int(os.getenv('COMPRESSION_ZSTD_LEVEL', 3))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', 4))
+
+# Media types that are already compressed, sending them through a codec again only costs CPU
+INCOMPRESSIBLE_MEDIA_TYPES = (
+    "application/vnd.apache.parquet",
+    "application/gzip",
+    "application/zip",
+    "application/zstd",
+    "image/",
+    "audio/",
+    "video/",
+)
+
+# Encoder of a gzip or deflate (zlib) stream, flushed after every chunk so streamed bodies keep moving
+class _ZlibEncoder:
+    def __init__(self, wbits: int):
+        self._compressor = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, wbits)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+# Encoder of a zstd stream
+class _ZstdEncoder:
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(level=COMPRESSION_ZSTD_LEVEL).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+# Encoder of a brotli stream
+class _BrotliEncoder:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+# Available content codings, in the order preferred when the client accepts several equally
+ENCODERS: Dict[str, Callable[[], object]] = {
+    **({"zstd": _ZstdEncoder} if zstandard else {}),
+    **({"br": _BrotliEncoder} if brotli else {}),
+    "gzip": lambda: _ZlibEncoder(16 + zlib.MAX_WBITS),
+    "deflate": lambda: _ZlibEncoder(zlib.MAX_WBITS),
+}
+
+# CompressionHelper class for negotiating the content coding of a response
+class CompressionHelper:
+
+    # Method for choosing the coding of a response from the Accept-Encoding header, None to send it as is
+    @staticmethod
+    def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+        qualities = {}
+        for part in (accept_encoding or "").split(","):
+            coding, *params = [item.strip() for item in part.split(";")]
+            if not coding:
+                continue
+            quality = 1.0
+            for param in params:
+                name, _, value = param.partition("=")
+                if name.strip() == "q":
+                    try:
+                        quality = float(value)
+                    except ValueError:
+                        quality = 0.0
+            qualities[coding.lower()] = quality
+        wildcard = qualities.get("*", 0.0)
+        best, best_quality = None, 0.0
+        for coding in ENCODERS:
+            quality = qualities.get(coding, wildcard)
+            if quality > best_quality:
+                best, best_quality = coding, quality
+        return best
+
+    # Method for creating the streaming encoder of a coding
+    @staticmethod
+    def encoder(coding: str):
+        return ENCODERS[coding]()
+
+    # Method for telling whether a media type is worth compressing
+    @staticmethod
+    def compressible(content_type: str) -> bool:
+        return not content_type.lower().startswith(INCOMPRESSIBLE_MEDIA_TYPES)
+
+    # Decorator for a route whose responses are always sent uncompressed
+    @staticmethod
+    def no_compression(endpoint: Callable) -> Callable:
+        endpoint.skip_compression = True
+        return endpoint
@@ -0,0 +1,70 @@
+# Importing libraries
+import base64
+import binascii
+import json
+import os
+from typing import Any, List, Tuple
+from bson import ObjectId
+from bson.errors import InvalidId
+from dotenv import load_dotenv
+
+# Load environment variables from the .env file
+load_dotenv()
+
+# Page size used by /all-candidates when the client does not send a limit
+DEFAULT_PAGE_SIZE = int(os.getenv('CANDIDATE_PAGE_SIZE', 100))
+MAX_PAGE_SIZE = 1000
+
+# Fields the candidate list can be sorted on, each backed by a (user_id, field, _id) index
+SORTABLE_FIELDS = ("_id", "first_name", "last_name", "years_of_experience", "salary")
+
+# CursorHelper class for keyset (seek) pagination over candidate queries
+class CursorHelper:
+
+    # Method for parsing a sort parameter such as "salary" or "-salary"
+    @staticmethod
+    def parse_sort(sort: str) -> Tuple[str, int]:
+        direction = -1 if sort.startswith("-") else 1
+        field = sort.lstrip("+-")
+        if field not in SORTABLE_FIELDS:
+            raise ValueError(f"Cannot sort on '{field}'")
+        return field, direction
+
+    # Method for building the MongoDB sort specification, with _id as tie breaker
+    @staticmethod
+    def sort_spec(field: str, direction: int) -> List[Tuple[str, int]]:
+        if field == "_id":
+            return [("_id", direction)]
+        return [(field, direction), ("_id", direction)]
+
+    # Method for encoding the position after the given document into an opaque cursor
+    @staticmethod
+    def encode_cursor(document: dict, field: str, direction: int) -> str:
+        value = document.get(field)
+        payload = {"f": field, "d": direction, "v": str(value) if isinstance(value, ObjectId) else value, "id": str(document["_id"])}
+        raw = json.dumps(payload, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    # Method for decoding a cursor, it must have been issued for the same sort
+    @staticmethod
+    def decode_cursor(cursor: str, field: str, direction: int) -> Tuple[Any, ObjectId]:
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            payload = json.loads(raw)
+            last_id = ObjectId(payload["id"])
+        except (binascii.Error, ValueError, KeyError, TypeError, InvalidId):
+            raise ValueError("Invalid cursor")
+        if payload.get("f") != field or payload.get("d") != direction:
+            raise ValueError("Cursor does not match the requested sort")
+        return payload.get("v"), last_id
+
+    # Method for building the filter that seeks past the last returned document
+    @staticmethod
+    def seek_filter(field: str, direction: int, last_value: Any, last_id: ObjectId) -> dict:
+        operator = "$gt" if direction == 1 else "$lt"
+        if field == "_id":
+            return {"_id": {operator: last_id}}
+        return {"$or": [
+            {field: {operator: last_value}},
+            {field: last_value, "_id": {operator: last_id}}
+        ]}
@@ -0,0 +1,71 @@
+# Importing libraries
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Optional
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi.responses import Response
+
+# ETagHelper class for the validators of candidate responses and the conditional request headers
+class ETagHelper:
+
+    # Method for building the strong ETag of a candidate from its version
+    @staticmethod
+    def document_etag(document: dict) -> str:
+        return f'"{document.get("version", 0)}"'
+
+    # Method for building the weak ETag of a candidate list page, one per user, list version and query
+    @staticmethod
+    def list_etag(user_key: str, version: int, query: str) -> str:
+        digest = hashlib.sha1(f"{user_key}:{version}:{query}".encode()).hexdigest()[:20]
+        return f'W/"{digest}"'
+
+    # Method for formatting the Last-Modified date of a candidate, its creation time when it was never versioned
+    @staticmethod
+    def last_modified(document: dict) -> Optional[str]:
+        updated_at = document.get("updated_at")
+        if not isinstance(updated_at, datetime):
+            try:
+                updated_at = ObjectId(str(document.get("_id"))).generation_time
+            except (InvalidId, TypeError):
+                return None
+        if updated_at.tzinfo is None:
+            # MongoDB returns naive UTC datetimes
+            updated_at = updated_at.replace(tzinfo=timezone.utc)
+        return format_datetime(updated_at.astimezone(timezone.utc), usegmt=True)
+
+    # Method for building the validator headers of a candidate
+    @staticmethod
+    def document_headers(document: dict) -> dict:
+        headers = {"ETag": ETagHelper.document_etag(document)}
+        last_modified = ETagHelper.last_modified(document)
+        if last_modified:
+            headers["Last-Modified"] = last_modified
+        return headers
+
+    # Method for the weak comparison of an If-None-Match header with the current ETag
+    @staticmethod
+    def none_match(if_none_match: Optional[str], etag: str) -> bool:
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        opaque_tag = etag.removeprefix("W/")
+        return any(tag.strip().removeprefix("W/") == opaque_tag for tag in if_none_match.split(","))
+
+    # Method for reading the candidate version an If-Match header requires, None when any version matches
+    @staticmethod
+    def expected_version(if_match: Optional[str]) -> Optional[int]:
+        if not if_match or if_match.strip() == "*":
+            return None
+        tag = if_match.strip()
+        # If-Match uses the strong comparison, weak or list validators never match a single version
+        if not (len(tag) > 2 and tag[0] == tag[-1] == '"' and tag[1:-1].isdigit()):
+            raise ValueError("If-Match must be a single candidate ETag")
+        return int(tag[1:-1])
+
+    # Method for answering 304 Not Modified, without rendering the body
+    @staticmethod
+    def not_modified(headers: dict) -> Response:
+        return Response(status_code=304, headers={**headers, "Vary": "Accept"})
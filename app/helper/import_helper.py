@@ -0,0 +1,155 @@
+# Importing libraries
+import ast
+import codecs
+import csv
+import json
+import os
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Tuple
+from dotenv import load_dotenv
+from pydantic import ValidationError
+from app.models.candidate import Candidate
+
+# Load environment variables from the .env file
+load_dotenv()
+
+# Number of rows validated and written per insert_many
+IMPORT_CHUNK_SIZE = int(os.getenv('IMPORT_CHUNK_SIZE', 1000))
+MAX_IMPORT_CHUNK_SIZE = 10000
+
+# Per-row errors reported in the import summary, the counters keep counting past it
+MAX_REPORTED_ERRORS = 1000
+
+# Content types accepted by the bulk import, mapped to their parser
+IMPORT_FORMATS = {
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/json": "ndjson",
+    "text/csv": "csv",
+}
+
+# A parsed row: its 1-based number in the upload, and either its fields or a parse error
+ParsedRow = Tuple[int, Optional[dict], Optional[str]]
+
+# Writes a chunk of candidate documents, returns the inserted count and (chunk index, message) failures
+InsertChunk = Callable[[List[dict]], Awaitable[Tuple[int, List[Tuple[int, str]]]]]
+
+# ImportHelper class for parsing, validating and writing streamed candidate uploads
+class ImportHelper:
+
+    # Method for resolving the import format from the request content type
+    @staticmethod
+    def import_format(content_type: Optional[str]) -> Optional[str]:
+        media_type = (content_type or "").split(";")[0].strip().lower()
+        return IMPORT_FORMATS.get(media_type)
+
+    # Method for splitting a byte stream into decoded lines, without reading it whole
+    @staticmethod
+    async def lines(stream: AsyncIterator[bytes]) -> AsyncIterator[str]:
+        decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        pending = ""
+        async for chunk in stream:
+            pending += decoder.decode(chunk)
+            *complete, pending = pending.split("\n")
+            for line in complete:
+                yield line.rstrip("\r")
+        pending += decoder.decode(b"", final=True)
+        if pending:
+            yield pending.rstrip("\r")
+
+    # Method for parsing an NDJSON upload, one candidate object per line
+    @staticmethod
+    async def ndjson_rows(stream: AsyncIterator[bytes]) -> AsyncIterator[ParsedRow]:
+        row_number = 0
+        async for line in ImportHelper.lines(stream):
+            if not line.strip():
+                continue
+            row_number += 1
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield row_number, None, f"Invalid JSON: {e}"
+                continue
+            if not isinstance(row, dict):
+                yield row_number, None, "Expected a JSON object"
+                continue
+            yield row_number, row, None
+
+    # Method for parsing a CSV upload with a header row of Candidate field names
+    @staticmethod
+    async def csv_rows(stream: AsyncIterator[bytes]) -> AsyncIterator[ParsedRow]:
+        header = None
+        row_number = 0
+        record = ""
+        async for line in ImportHelper.lines(stream):
+            # A quoted field may span lines, a record is complete once its quotes are balanced
+            record = f"{record}\n{line}" if record else line
+            if record.count('"') % 2:
+                continue
+            values, record = next(csv.reader([record])), ""
+            if header is None:
+                header = [value.strip() for value in values]
+                continue
+            if not any(values):
+                continue
+            row_number += 1
+            if len(values) != len(header):
+                yield row_number, None, f"Expected {len(header)} columns, got {len(values)}"
+                continue
+            row = {column: value for column, value in zip(header, values) if value != "" and column != "_id"}
+            if "skills" in row:
+                row["skills"] = ImportHelper.parse_skills(row["skills"])
+            yield row_number, row, None
+
+    # Method for reading a CSV skills cell, either a list literal or values separated by ";"
+    @staticmethod
+    def parse_skills(value: str) -> list:
+        if value.startswith("["):
+            try:
+                return list(ast.literal_eval(value))
+            except (ValueError, SyntaxError):
+                pass
+        return [skill.strip() for skill in value.split(";") if skill.strip()]
+
+    # Method for validating one row against the Candidate model
+    @staticmethod
+    def validate_row(row: dict, user_id) -> Tuple[Optional[dict], Optional[List[str]]]:
+        try:
+            candidate = Candidate.model_validate(row)
+        except ValidationError as e:
+            return None, [f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()]
+        # Same document shape as CandidateRepository.create_candidate
+        return dict(candidate.__dict__, user_id=user_id), None
+
+    # Method for validating and writing the parsed rows chunk by chunk, a bad row never aborts its chunk
+    @staticmethod
+    async def import_rows(rows: AsyncIterator[ParsedRow], insert_chunk: InsertChunk, user_id, chunk_size: int) -> dict:
+        summary = {"status": "success", "received": 0, "inserted": 0, "failed": 0, "errors": []}
+
+        def fail(row_number: int, errors: List[str]) -> None:
+            summary["failed"] += 1
+            if len(summary["errors"]) < MAX_REPORTED_ERRORS:
+                summary["errors"].append({"row": row_number, "errors": errors})
+
+        async def flush(chunk: List[Tuple[int, dict]]) -> None:
+            inserted, failures = await insert_chunk([document for _, document in chunk])
+            summary["inserted"] += inserted
+            for index, message in failures:
+                fail(chunk[index][0], [message])
+
+        chunk = []
+        async for row_number, row, parse_error in rows:
+            summary["received"] += 1
+            if parse_error:
+                fail(row_number, [parse_error])
+                continue
+            document, errors = ImportHelper.validate_row(row, user_id)
+            if errors:
+                fail(row_number, errors)
+                continue
+            chunk.append((row_number, document))
+            if len(chunk) >= chunk_size:
+                await flush(chunk)
+                chunk = []
+        if chunk:
+            await flush(chunk)
+        return summary
@@ -0,0 +1,149 @@
+# Importing libraries
+import logging
+import os
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+from pymongo import IndexModel
+from app.config.db_config import get_database, get_candidate_collection, get_user_collection
+from app.config.index_config import CANDIDATE_INDEXES, USER_INDEXES
+
+# Maximum number of distinct query shapes the advisor keeps track of
+MAX_QUERY_SHAPES = 256
+
+# Operators that make a filter a range predicate rather than an equality
+RANGE_OPERATORS = {"$gt", "$gte", "$lt", "$lte"}
+
+# IndexHelper class for building and checking the declared indexes
+class IndexHelper:
+
+    # Method for returning the key pattern of an index model as a tuple
+    @staticmethod
+    def key_pattern(index: IndexModel) -> Tuple:
+        return tuple(index.document["key"].items())
+
+    # Method for building every declared index, existing ones are left untouched
+    @staticmethod
+    def ensure_indexes() -> List[str]:
+        names = get_candidate_collection().create_indexes(CANDIDATE_INDEXES)
+        logging.info(f"Candidate indexes ready: {', '.join(names)}")
+        user_names = get_user_collection().create_indexes(USER_INDEXES)
+        logging.info(f"User indexes ready: {', '.join(user_names)}")
+        return names + user_names
+
+    # Method for building the declared indexes in a background thread, so startup does not wait on them
+    @staticmethod
+    def ensure_indexes_in_background() -> threading.Thread:
+        def build():
+            try:
+                IndexHelper.ensure_indexes()
+            except Exception as e:
+                logging.error(f"An error occurred while building the candidate indexes: {e}")
+        thread = threading.Thread(target=build, name="ensure-indexes", daemon=True)
+        thread.start()
+        return thread
+
+    # Method for listing the declared indexes that do not exist in the database yet
+    @staticmethod
+    def missing_indexes() -> List[IndexModel]:
+        existing = get_candidate_collection().index_information()
+        existing_keys = {tuple(info["key"]) for info in existing.values()}
+        has_text_index = any("textIndexVersion" in info for info in existing.values())
+        missing = []
+        for index in CANDIDATE_INDEXES:
+            is_text = "text" in index.document["key"].values()
+            if (is_text and not has_text_index) or (not is_text and IndexHelper.key_pattern(index) not in existing_keys):
+                missing.append(index)
+        return missing
+
+# IndexAdvisor class recording the filter shapes of candidate queries and checking them against the indexes
+class IndexAdvisor:
+    _shapes: Dict[Tuple, dict] = {}
+    _lock = threading.Lock()
+
+    # Method for giving a forked worker its own recorded shapes and a lock no parent thread can be holding
+    @staticmethod
+    def reset_after_fork() -> None:
+        IndexAdvisor._shapes = {}
+        IndexAdvisor._lock = threading.Lock()
+
+    # Method for reducing a query to its shape: the fields it filters on and how
+    @staticmethod
+    def query_shape(query: dict) -> Tuple:
+        shape = []
+        for field, value in query.items():
+            if field == "$text":
+                shape.append(("$text", "text"))
+            elif field.startswith("$"):
+                continue
+            elif isinstance(value, dict) and "$in" in value:
+                shape.append((field, "in"))
+            elif isinstance(value, dict) and RANGE_OPERATORS & value.keys():
+                shape.append((field, "range"))
+            else:
+                shape.append((field, "eq"))
+        return tuple(sorted(shape))
+
+    # Method for recording one query, with a sample kept per shape for explain()
+    @staticmethod
+    def record(query: dict, sort: Optional[List[Tuple[str, int]]] = None) -> None:
+        key = (IndexAdvisor.query_shape(query), tuple(sort or ()))
+        with IndexAdvisor._lock:
+            entry = IndexAdvisor._shapes.get(key)
+            if entry is not None:
+                entry["count"] += 1
+            elif len(IndexAdvisor._shapes) < MAX_QUERY_SHAPES:
+                IndexAdvisor._shapes[key] = {"count": 1, "query": dict(query), "sort": list(sort or [])}
+
+    # Method for walking an explain() plan and yielding every stage of it
+    @staticmethod
+    def plan_stages(plan: dict) -> Iterator[dict]:
+        if not isinstance(plan, dict):
+            return
+        if "stage" in plan:
+            yield plan
+        for value in plan.values():
+            if isinstance(value, dict):
+                yield from IndexAdvisor.plan_stages(value)
+            elif isinstance(value, list):
+                for item in value:
+                    yield from IndexAdvisor.plan_stages(item)
+
+    # Method for explaining one recorded shape with the query planner, without running the query
+    @staticmethod
+    def explain(query: dict, sort: List[Tuple[str, int]]) -> dict:
+        command = {"find": get_candidate_collection().name, "filter": query}
+        if sort:
+            command["sort"] = dict(sort)
+        explained = get_database().command("explain", command, verbosity="queryPlanner")
+        stages = list(IndexAdvisor.plan_stages(explained["queryPlanner"]["winningPlan"]))
+        return {
+            "stages": [stage["stage"] for stage in stages],
+            "indexes": sorted({stage["indexName"] for stage in stages if "indexName" in stage}),
+            "collection_scan": any(stage["stage"] == "COLLSCAN" for stage in stages),
+            "in_memory_sort": any(stage["stage"] == "SORT" for stage in stages),
+        }
+
+    # Method for reporting every recorded shape, the indexes serving it and whether one is missing
+    @staticmethod
+    def report() -> List[dict]:
+        with IndexAdvisor._lock:
+            shapes = list(IndexAdvisor._shapes.items())
+        report = []
+        for (shape, sort), entry in sorted(shapes, key=lambda item: -item[1]["count"]):
+            plan = IndexAdvisor.explain(entry["query"], entry["sort"])
+            report.append({
+                "filters": [f"{field}:{kind}" for field, kind in shape],
+                "sort": [f"{field}:{direction}" for field, direction in sort],
+                "count": entry["count"],
+                "missing_index": plan["collection_scan"] or plan["in_memory_sort"],
+                **plan,
+            })
+        return report
+
+    # Method for forgetting the recorded shapes
+    @staticmethod
+    def reset() -> None:
+        with IndexAdvisor._lock:
+            IndexAdvisor._shapes.clear()
+
+os.register_at_fork(after_in_child=IndexAdvisor.reset_after_fork)
@@ -0,0 +1,228 @@
+# Importing libraries
+import asyncio
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from dotenv import load_dotenv
+
+# Load environment variables from the .env file
+load_dotenv()
+
+# Set METRICS_ENABLED=false to drop the middleware, the Mongo listeners and the /metrics route
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() not in ('0', 'false', 'no')
+
+# Seconds between two event loop / threadpool lag probes
+METRICS_LAG_INTERVAL = float(os.getenv('METRICS_LAG_INTERVAL', 1))
+
+# Media type of the Prometheus text exposition format
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Histogram buckets in seconds, from sub-millisecond Mongo commands to slow report requests
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# A sample line: metric name suffix, label pairs and value
+Sample = Tuple[str, Tuple[Tuple[str, str], ...], float]
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in labels)
+    return f"{{{pairs}}}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+# Base class of the metric families, one child value per label combination
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Tuple[str, ...]) -> Tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        return tuple(str(label) for label in labels)
+
+    def samples(self) -> List[Sample]:
+        raise NotImplementedError
+
+    # Method for dropping every child value, with a lock no parent thread can be holding
+    def reset(self) -> None:
+        self._values = {}
+        self._lock = threading.Lock()
+
+# Counter, a value that only goes up
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            values = list(self._values.items())
+        return [("_total", tuple(zip(self.labelnames, key)), value) for key, value in values]
+
+# Gauge, a value that goes up and down
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, *labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            values = list(self._values.items())
+        return [("", tuple(zip(self.labelnames, key)), value) for key, value in values]
+
+# Histogram, observations counted into cumulative buckets
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    # Observing is a bisect and three additions under the lock, cheap enough for every request
+    def observe(self, value: float, *labels: str) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            values = [(key, (list(state[0]), state[1], state[2])) for key, state in self._values.items()]
+        samples = []
+        for key, (counts, total, count) in values:
+            labels = tuple(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                samples.append(("_bucket", labels + (("le", _format_value(bound)),), cumulative))
+            samples.append(("_sum", labels, total))
+            samples.append(("_count", labels, count))
+        return samples
+
+# Collector callback run at scrape time, returns (name, kind, documentation, samples) families
+Collector = Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]
+
+# MetricsRegistry class holding the metric families and the scrape time collectors
+class MetricsRegistry:
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Collector] = []
+
+    # Method for registering a metric family
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    # Method for giving a forked worker zeroed metrics, the parent's requests and queries are not its own
+    def reset_after_fork(self) -> None:
+        for metric in self._metrics:
+            metric.reset()
+
+    # Method for registering a callback that reads values owned elsewhere only when scraped
+    def collector(self, collector: Collector) -> Collector:
+        self._collectors.append(collector)
+        return collector
+
+    # Method for rendering every family in the Prometheus text exposition format
+    def render(self) -> str:
+        families = [(metric.name, metric.kind, metric.documentation, metric.samples()) for metric in self._metrics]
+        for collector in self._collectors:
+            try:
+                families.extend(collector())
+            except Exception as e:
+                logging.error(f"Metrics collector {getattr(collector, '__name__', collector)} failed: {e}")
+        lines = []
+        for name, kind, documentation, samples in families:
+            # HELP and TYPE name the samples, those of a counter carry the _total suffix
+            family = f"{name}_total" if kind == "counter" else name
+            lines.append(f"# HELP {family} {documentation}")
+            lines.append(f"# TYPE {family} {kind}")
+            for suffix, labels, value in samples:
+                lines.append(f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+# Registry of the process, scraped through GET /metrics
+REGISTRY = MetricsRegistry()
+os.register_at_fork(after_in_child=REGISTRY.reset_after_fork)
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "http_requests", "HTTP requests answered, by method, route template and status code.", ("method", "route", "status"))
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "http_request_duration_seconds", "Time from receiving an HTTP request to sending the end of its response.", ("method", "route"))
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled.", ("method", "route"))
+MONGO_COMMAND_DURATION = REGISTRY.histogram(
+    "mongo_command_duration_seconds", "Round-trip time of MongoDB commands, by command name and outcome.", ("command", "outcome"))
+MONGO_POOL_CHECKOUT_WAIT = REGISTRY.histogram(
+    "mongo_pool_checkout_wait_seconds", "Time spent waiting for a pooled MongoDB connection.", ("client",))
+EVENT_LOOP_LAG = REGISTRY.gauge(
+    "event_loop_lag_seconds", "Delay of the last event loop wake-up past its scheduled time.")
+THREADPOOL_LAG = REGISTRY.gauge(
+    "threadpool_lag_seconds", "Time the last probe waited for a worker thread of the sync route threadpool.")
+
+# MetricsHelper class for the runtime probes feeding the registry
+class MetricsHelper:
+
+    # Method for measuring how late the loop wakes up and how long a threadpool task waits for a thread
+    @staticmethod
+    async def probe_lag(interval: float = METRICS_LAG_INTERVAL) -> None:
+        from fastapi.concurrency import run_in_threadpool
+        while True:
+            scheduled = time.perf_counter() + interval
+            await asyncio.sleep(interval)
+            EVENT_LOOP_LAG.set(max(0.0, time.perf_counter() - scheduled))
+            submitted = time.perf_counter()
+            started = await run_in_threadpool(time.perf_counter)
+            THREADPOOL_LAG.set(max(0.0, started - submitted))
+
+    # Method for starting the lag probe on the running loop, returns its task so shutdown can cancel it
+    @staticmethod
+    def start_lag_probe() -> Optional[asyncio.Task]:
+        if not METRICS_ENABLED or METRICS_LAG_INTERVAL <= 0:
+            return None
+        return asyncio.get_running_loop().create_task(MetricsHelper.probe_lag())
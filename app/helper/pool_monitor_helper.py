@@ -0,0 +1,76 @@
+# Importing libraries
+import threading
+from pymongo import monitoring
+from app.helper.metrics_helper import MONGO_POOL_CHECKOUT_WAIT
+
+# PoolMonitor class tracking the size and the use of a MongoClient connection pool
+class PoolMonitor(monitoring.ConnectionPoolListener):
+
+    def __init__(self, client: str = "sync"):
+        self.client = client
+        self.open = 0
+        self.in_use = 0
+        self.waiting = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self._lock = threading.Lock()
+
+    # Pool level events carry nothing the gauges need
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    # Connection level events keep the gauges up to date
+    def connection_created(self, event):
+        with self._lock:
+            self.open += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open -= 1
+
+    def connection_check_out_started(self, event):
+        with self._lock:
+            self.waiting += 1
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.waiting -= 1
+            self.checkout_failures += 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.waiting -= 1
+            self.in_use += 1
+            self.checkouts += 1
+        # pymongo reports how long the checkout waited for a connection
+        duration = getattr(event, "duration", None)
+        if duration is not None:
+            MONGO_POOL_CHECKOUT_WAIT.observe(duration, self.client)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.in_use -= 1
+
+    # Method for reporting the pool gauges, saturation is the share of max_pool_size in use
+    def stats(self, max_pool_size: int) -> dict:
+        return {
+            "max_pool_size": max_pool_size,
+            "open": self.open,
+            "in_use": self.in_use,
+            "waiting": self.waiting,
+            "saturation": self.in_use / max_pool_size if max_pool_size else 0.0,
+            "checkouts": self.checkouts,
+            "checkout_failures": self.checkout_failures,
+        }
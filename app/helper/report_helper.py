@@ -0,0 +1,178 @@
+# Importing libraries
+import csv
+import io
+import os
+from itertools import islice
+from typing import AsyncIterator, Iterable, Iterator, List
+import pyarrow as pa
+import pyarrow.parquet as pq
+from dotenv import load_dotenv
+from app.models.candidate import Candidate
+
+# Load environment variables from the .env file
+load_dotenv()
+
+# Number of candidates read from the database per cursor batch while exporting
+REPORT_BATCH_SIZE = int(os.getenv('REPORT_BATCH_SIZE', 1000))
+
+# Size in bytes a CSV chunk is allowed to reach before it is sent to the client
+REPORT_CHUNK_SIZE = 64 * 1024
+
+# Columns of the candidate report, also used as the projection of the export query
+REPORT_COLUMNS: List[str] = ["_id"] + list(Candidate.model_fields)
+
+# Typed schema of the columnar (Parquet / Arrow) exports
+REPORT_SCHEMA = pa.schema([
+    ("_id", pa.string()),
+    ("first_name", pa.string()),
+    ("last_name", pa.string()),
+    ("email", pa.string()),
+    ("uuid", pa.string()),
+    ("career_level", pa.string()),
+    ("job_major", pa.string()),
+    ("years_of_experience", pa.int64()),
+    ("degree_type", pa.string()),
+    ("skills", pa.list_(pa.string())),
+    ("nationality", pa.string()),
+    ("city", pa.string()),
+    ("salary", pa.float64()),
+    ("gender", pa.string()),
+    ("user_id", pa.string()),
+])
+
+# Media type and file extension of each report format
+REPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrow"),
+}
+
+# Write-only file object that hands back what the columnar writers produced since the last drain
+class _ChunkSink(io.RawIOBase):
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+# ReportHelper class for writing candidate exports incrementally
+class ReportHelper:
+
+    # Method for building the projection that only reads the report columns
+    @staticmethod
+    def projection() -> dict:
+        return {column: 1 for column in REPORT_COLUMNS}
+
+    # Method for turning one candidate document into a CSV row
+    @staticmethod
+    def csv_row(document: dict) -> list:
+        return [document.get(column) for column in REPORT_COLUMNS]
+
+    # Method for encoding candidates as CSV, yielding chunks of about REPORT_CHUNK_SIZE bytes
+    @staticmethod
+    def csv_chunks(documents: Iterable[dict]) -> Iterator[bytes]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(REPORT_COLUMNS)
+        for document in documents:
+            writer.writerow(ReportHelper.csv_row(document))
+            if buffer.tell() >= REPORT_CHUNK_SIZE:
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode()
+
+    # Method for encoding candidates from an async cursor as CSV chunks
+    @staticmethod
+    async def csv_chunks_async(documents: AsyncIterator[dict]) -> AsyncIterator[bytes]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(REPORT_COLUMNS)
+        async for document in documents:
+            writer.writerow(ReportHelper.csv_row(document))
+            if buffer.tell() >= REPORT_CHUNK_SIZE:
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode()
+
+    # Method for converting a batch of candidate documents into a typed record batch
+    @staticmethod
+    def record_batch(documents: List[dict]) -> pa.RecordBatch:
+        columns = {column: [] for column in REPORT_SCHEMA.names}
+        for document in documents:
+            for column, values in columns.items():
+                values.append(document.get(column))
+        columns["_id"] = [str(value) for value in columns["_id"]]
+        # Candidates store the owning user document, the export only keeps its id
+        columns["user_id"] = [
+            value.get("_id") if isinstance(value, dict) else value
+            for value in columns["user_id"]
+        ]
+        return pa.RecordBatch.from_pydict(columns, schema=REPORT_SCHEMA)
+
+    # Method for opening the Parquet or Arrow IPC stream writer of a report
+    @staticmethod
+    def columnar_writer(report_format: str, sink: _ChunkSink):
+        if report_format == "parquet":
+            return pq.ParquetWriter(sink, REPORT_SCHEMA, compression="zstd")
+        return pa.ipc.new_stream(sink, REPORT_SCHEMA)
+
+    # Method for encoding candidates as Parquet or Arrow, one row group / record batch per cursor batch
+    @staticmethod
+    def columnar_chunks(documents: Iterable[dict], report_format: str) -> Iterator[bytes]:
+        sink = _ChunkSink()
+        writer = ReportHelper.columnar_writer(report_format, sink)
+        documents = iter(documents)
+        while batch := list(islice(documents, REPORT_BATCH_SIZE)):
+            writer.write_batch(ReportHelper.record_batch(batch))
+            yield sink.drain()
+        writer.close()
+        yield sink.drain()
+
+    # Method for encoding candidates from an async cursor as Parquet or Arrow chunks
+    @staticmethod
+    async def columnar_chunks_async(documents: AsyncIterator[dict], report_format: str) -> AsyncIterator[bytes]:
+        sink = _ChunkSink()
+        writer = ReportHelper.columnar_writer(report_format, sink)
+        batch = []
+        async for document in documents:
+            batch.append(document)
+            if len(batch) >= REPORT_BATCH_SIZE:
+                writer.write_batch(ReportHelper.record_batch(batch))
+                batch = []
+                yield sink.drain()
+        if batch:
+            writer.write_batch(ReportHelper.record_batch(batch))
+        writer.close()
+        yield sink.drain()
+
+    # Method for encoding candidates in the requested report format
+    @staticmethod
+    def chunks(documents: Iterable[dict], report_format: str) -> Iterator[bytes]:
+        if report_format == "csv":
+            return ReportHelper.csv_chunks(documents)
+        return ReportHelper.columnar_chunks(documents, report_format)
+
+    # Method for encoding candidates from an async cursor in the requested report format
+    @staticmethod
+    def chunks_async(documents: AsyncIterator[dict], report_format: str) -> AsyncIterator[bytes]:
+        if report_format == "csv":
+            return ReportHelper.csv_chunks_async(documents)
+        return ReportHelper.columnar_chunks_async(documents, report_format)
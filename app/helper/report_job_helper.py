@@ -0,0 +1,427 @@
+# Importing libraries
+import glob
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+from dotenv import load_dotenv
+from fastapi.responses import StreamingResponse
+from app.helper.report_helper import ReportHelper, REPORT_FORMATS
+
+# Load environment variables from the .env file
+load_dotenv()
+
+# Directory the finished reports are written to, shared by the workers of a host
+REPORT_JOB_DIR = os.getenv('REPORT_JOB_DIR', os.path.join(tempfile.gettempdir(), 'recruitment-reports'))
+
+# Number of reports generated at the same time by the background workers
+REPORT_JOB_WORKERS = int(os.getenv('REPORT_JOB_WORKERS', 1))
+
+# Finished reports kept per format, older versions stay downloadable so interrupted downloads can resume
+REPORT_JOB_KEEP = int(os.getenv('REPORT_JOB_KEEP', 2))
+
+# Size in bytes of the chunks a download is read and sent in
+REPORT_DOWNLOAD_CHUNK_SIZE = 256 * 1024
+
+# Seconds between two writes of the progress of a running job to its state file
+REPORT_JOB_PROGRESS_INTERVAL = 1.0
+
+# Job ids are "<format>-<collection version>-<random token>", the same export of the same data shares one job.
+# The report is stored under its id, so it can only be polled or downloaded by whoever was given the token.
+JOB_ID_PATTERN = re.compile(r"^(?P<format>[a-z]+)-(?P<version>\d+)-(?P<token>[0-9a-f]{32})$")
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+FINISHED = "finished"
+FAILED = "failed"
+
+# ReportJobs class for generating candidate reports in the background and serving them from disk.
+# The state of every job is also written next to the reports, and each (format, version) is claimed
+# with an exclusive lock file, so every worker of the host sees the jobs of the others and none
+# starts a duplicate export.
+class ReportJobs:
+    _jobs: Dict[str, dict] = {}
+    # (format, version) -> id of the job of that report
+    _versions: Dict[Tuple[str, int], str] = {}
+    _lock = threading.Lock()
+    _executor = ThreadPoolExecutor(max_workers=REPORT_JOB_WORKERS, thread_name_prefix="report-job")
+
+    # Method for giving a forked worker its own job table and worker threads, the parent's threads do not exist in it
+    @staticmethod
+    def reset_after_fork() -> None:
+        ReportJobs._jobs = {}
+        ReportJobs._versions = {}
+        ReportJobs._lock = threading.Lock()
+        ReportJobs._executor = ThreadPoolExecutor(max_workers=REPORT_JOB_WORKERS, thread_name_prefix="report-job")
+
+    # Method for building a new id of the report of a format at a collection version, with a random token
+    @staticmethod
+    def job_id(report_format: str, version: int) -> str:
+        return f"{report_format}-{version}-{uuid.uuid4().hex}"
+
+    # Method for reading the format and version back from a job id, None if it is not one
+    @staticmethod
+    def parse_job_id(job_id: str) -> Optional[Tuple[str, int]]:
+        match = JOB_ID_PATTERN.match(job_id)
+        if match is None or match["format"] not in REPORT_FORMATS:
+            return None
+        return match["format"], int(match["version"])
+
+    # Method for building the path of the finished report of a job
+    @staticmethod
+    def path(job_id: str) -> str:
+        report_format, _ = ReportJobs.parse_job_id(job_id)
+        return os.path.join(REPORT_JOB_DIR, f"candidates_{job_id}.{REPORT_FORMATS[report_format][1]}")
+
+    # Method for building the path of the state file of a job
+    @staticmethod
+    def state_path(job_id: str) -> str:
+        return os.path.join(REPORT_JOB_DIR, f"candidates_{job_id}.json")
+
+    # Method for building the path of the lock file claiming the report of a format at a version
+    @staticmethod
+    def lock_path(report_format: str, version: int) -> str:
+        return os.path.join(REPORT_JOB_DIR, f"candidates_{report_format}-{version}.lock")
+
+    # Method for writing the state of a job for the other workers, replaced atomically so it is never read half written
+    @staticmethod
+    def save_state(job: dict) -> None:
+        path = ReportJobs.state_path(job["id"])
+        partial_path = f"{path}.{os.getpid()}.{threading.get_ident()}.part"
+        try:
+            with open(partial_path, "w") as state_file:
+                json.dump({**job, "pid": os.getpid()}, state_file)
+            os.replace(partial_path, path)
+        except OSError as e:
+            logging.error(f"Report job {job['id']} state could not be saved: {e}")
+
+    # Method for deleting the state of a job
+    @staticmethod
+    def remove_state(job_id: str) -> None:
+        try:
+            os.remove(ReportJobs.state_path(job_id))
+        except OSError:
+            pass
+
+    # Method for reading the state of a job written by this or another worker, None if there is none
+    @staticmethod
+    def load_state(job_id: str) -> Optional[dict]:
+        try:
+            with open(ReportJobs.state_path(job_id)) as state_file:
+                job = json.load(state_file)
+        except (OSError, ValueError):
+            return None
+        pid = job.pop("pid", None)
+        # A queued or running job of a worker that no longer exists will never finish
+        if job["status"] in (QUEUED, RUNNING) and not ReportJobs.process_alive(pid):
+            job["status"] = FAILED
+            job["error"] = "Report generation was interrupted"
+        return job
+
+    # Method for telling whether the worker process that owns a job is still running
+    @staticmethod
+    def process_alive(pid: Optional[int]) -> bool:
+        if not pid:
+            return False
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    # Method for claiming the report of a format at a version for a job whose state is saved,
+    # returns the state of the live job of another worker holding the claim, None once claimed
+    @staticmethod
+    def claim(job: dict) -> Optional[dict]:
+        path = ReportJobs.lock_path(job["format"], job["version"])
+        partial_path = f"{path}.{os.getpid()}.{threading.get_ident()}.part"
+        with open(partial_path, "w") as lock_file:
+            lock_file.write(job["id"])
+        try:
+            for _ in range(2):
+                # Linking a complete file into place fails when the lock exists, so it is never read empty
+                try:
+                    os.link(partial_path, path)
+                    return None
+                except FileExistsError:
+                    pass
+                try:
+                    with open(path) as lock_file:
+                        holder = lock_file.read().strip()
+                except OSError:
+                    continue
+                state = ReportJobs.load_state(holder)
+                if state is not None and state["status"] != FAILED:
+                    return state
+                # The job holding the claim failed or its worker died, the claim is taken over
+                ReportJobs.release(job["format"], job["version"], holder)
+            return None
+        finally:
+            os.remove(partial_path)
+
+    # Method for releasing the claim of the report of a format at a version, if it is still held by the job
+    @staticmethod
+    def release(report_format: str, version: int, job_id: str) -> None:
+        path = ReportJobs.lock_path(report_format, version)
+        try:
+            with open(path) as lock_file:
+                if lock_file.read().strip() != job_id:
+                    return
+            os.remove(path)
+        except OSError:
+            pass
+
+    # Method for finding the id of a finished report of a format at a version on disk, written by this or another worker
+    @staticmethod
+    def find_on_disk(report_format: str, version: int) -> Optional[str]:
+        extension = REPORT_FORMATS[report_format][1]
+        for path in glob.glob(os.path.join(REPORT_JOB_DIR, f"candidates_{report_format}-{version}-*.{extension}")):
+            job_id = os.path.basename(path)[len("candidates_"):-len(extension) - 1]
+            if ReportJobs.parse_job_id(job_id) is not None:
+                return job_id
+        return None
+
+    # Method for describing a finished report found on disk, written by this or another worker
+    @staticmethod
+    def finished_on_disk(job_id: str) -> Optional[dict]:
+        path = ReportJobs.path(job_id)
+        if not os.path.exists(path):
+            return None
+        report_format, version = ReportJobs.parse_job_id(job_id)
+        finished_at = datetime.fromtimestamp(os.path.getmtime(path), timezone.utc).isoformat()
+        size = os.path.getsize(path)
+        return {
+            "id": job_id, "format": report_format, "version": version, "status": FINISHED,
+            "rows_written": None, "total_rows": None, "bytes_written": size, "size": size,
+            "created_at": finished_at, "finished_at": finished_at, "error": None,
+        }
+
+    # Method for copying a job for the API, with its progress and download link
+    @staticmethod
+    def snapshot(job: dict) -> dict:
+        job = dict(job)
+        if job["status"] == FINISHED:
+            job["progress"] = 1.0
+        elif job["total_rows"]:
+            job["progress"] = round(min(job["rows_written"] / job["total_rows"], 0.99), 4)
+        else:
+            job["progress"] = 0.0
+        job["download_url"] = f"/reports/{job['id']}/download" if job["status"] == FINISHED else None
+        return job
+
+    # Method for submitting a report, reusing the queued, running or finished job of the same version
+    @staticmethod
+    def submit(report_format: str, version: int, documents: Callable[[], Iterable[dict]], total: Callable[[], int]) -> Tuple[dict, bool]:
+        """
+        Submit the report of a format at a collection version.
+
+        - **report_format**: One of "csv", "parquet" or "arrow"
+        - **version**: Version of the candidate collection the report is generated at
+        - **documents**: Opens the cursor of the candidates to export, called by the worker
+        - **total**: Estimates the number of candidates, for the progress
+
+        Returns:
+        - The job, and whether it was created by this call.
+        """
+        with ReportJobs._lock:
+            job = ReportJobs._jobs.get(ReportJobs._versions.get((report_format, version)))
+            if job is not None and job["status"] != FAILED and (job["status"] != FINISHED or os.path.exists(ReportJobs.path(job["id"]))):
+                return ReportJobs.snapshot(job), False
+            job_id = ReportJobs.find_on_disk(report_format, version)
+            if job_id is not None:
+                job = ReportJobs._jobs[job_id] = ReportJobs.finished_on_disk(job_id)
+                ReportJobs._versions[(report_format, version)] = job_id
+                return ReportJobs.snapshot(job), False
+            job_id = ReportJobs.job_id(report_format, version)
+            job = {
+                "id": job_id, "format": report_format, "version": version, "status": QUEUED,
+                "rows_written": 0, "total_rows": None, "bytes_written": 0, "size": None,
+                "created_at": datetime.now(timezone.utc).isoformat(), "finished_at": None, "error": None,
+            }
+            os.makedirs(REPORT_JOB_DIR, exist_ok=True)
+            ReportJobs.save_state(job)
+            # Another worker may be generating the same report, its job is answered instead
+            holder = ReportJobs.claim(job)
+            if holder is not None:
+                ReportJobs.remove_state(job_id)
+                return ReportJobs.snapshot(holder), False
+            ReportJobs._versions[(report_format, version)] = job_id
+            ReportJobs._jobs[job_id] = job
+        ReportJobs._executor.submit(ReportJobs.run, job, documents, total)
+        return ReportJobs.snapshot(job), True
+
+    # Method for generating a report into a temporary file, renamed into place once complete
+    @staticmethod
+    def run(job: dict, documents: Callable[[], Iterable[dict]], total: Callable[[], int]) -> None:
+        path = ReportJobs.path(job["id"])
+        partial_path = f"{path}.{os.getpid()}.{threading.get_ident()}.part"
+        saved_at = time.monotonic()
+
+        def counted(cursor: Iterable[dict]) -> Iterator[dict]:
+            nonlocal saved_at
+            for document in cursor:
+                job["rows_written"] += 1
+                if time.monotonic() - saved_at >= REPORT_JOB_PROGRESS_INTERVAL:
+                    saved_at = time.monotonic()
+                    ReportJobs.save_state(job)
+                yield document
+
+        job["status"] = RUNNING
+        try:
+            os.makedirs(REPORT_JOB_DIR, exist_ok=True)
+            job["total_rows"] = total()
+            ReportJobs.save_state(job)
+            with open(partial_path, "wb") as report_file:
+                for chunk in ReportHelper.chunks(counted(documents()), job["format"]):
+                    report_file.write(chunk)
+                    job["bytes_written"] += len(chunk)
+            os.replace(partial_path, path)
+        except Exception as e:
+            logging.error(f"Report job {job['id']} failed: {e}")
+            job["error"] = "Report generation failed"
+            job["status"] = FAILED
+            ReportJobs.save_state(job)
+            # The next submission of the same report starts a new job
+            ReportJobs.release(job["format"], job["version"], job["id"])
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            return
+        job["size"] = job["bytes_written"]
+        job["finished_at"] = datetime.now(timezone.utc).isoformat()
+        job["status"] = FINISHED
+        ReportJobs.save_state(job)
+        logging.info(f"Report job {job['id']} finished: {job['rows_written']} rows, {job['size']} bytes")
+        ReportJobs.remove_superseded(job)
+
+    # Method for deleting the reports of the same format beyond the REPORT_JOB_KEEP most recent versions,
+    # with their state and lock files
+    @staticmethod
+    def remove_superseded(job: dict) -> None:
+        extension = REPORT_FORMATS[job["format"]][1]
+        reports = []
+        for path in glob.glob(os.path.join(REPORT_JOB_DIR, f"candidates_{job['format']}-*.{extension}")):
+            job_id = os.path.basename(path)[len("candidates_"):-len(extension) - 1]
+            parsed = ReportJobs.parse_job_id(job_id)
+            if parsed is not None:
+                reports.append((parsed[1], job_id, path))
+        reports.sort(reverse=True)
+        kept, superseded = reports[:max(REPORT_JOB_KEEP, 1)], reports[max(REPORT_JOB_KEEP, 1):]
+        if not kept:
+            return
+        for version, job_id, path in superseded:
+            for stale_path in (path, ReportJobs.state_path(job_id), ReportJobs.lock_path(job["format"], version)):
+                try:
+                    os.remove(stale_path)
+                except OSError:
+                    pass
+            with ReportJobs._lock:
+                ReportJobs._jobs.pop(job_id, None)
+                if ReportJobs._versions.get((job["format"], version)) == job_id:
+                    del ReportJobs._versions[(job["format"], version)]
+        # The state files of the jobs that failed at versions older than every kept report go too
+        for path in glob.glob(os.path.join(REPORT_JOB_DIR, f"candidates_{job['format']}-*.json")):
+            job_id = os.path.basename(path)[len("candidates_"):-len(".json")]
+            parsed = ReportJobs.parse_job_id(job_id)
+            if parsed is None or parsed[1] >= kept[-1][0]:
+                continue
+            state = ReportJobs.load_state(job_id)
+            if state is None or state["status"] == FAILED:
+                ReportJobs.remove_state(job_id)
+
+    # Method for reading the state of a job, None if it is unknown
+    @staticmethod
+    def status(job_id: str) -> Optional[dict]:
+        if ReportJobs.parse_job_id(job_id) is None:
+            return None
+        with ReportJobs._lock:
+            job = ReportJobs._jobs.get(job_id)
+        if job is None:
+            # A job submitted to another worker
+            job = ReportJobs.load_state(job_id)
+        if job is None or (job["status"] == FINISHED and not os.path.exists(ReportJobs.path(job_id))):
+            job = ReportJobs.finished_on_disk(job_id)
+        return ReportJobs.snapshot(job) if job is not None else None
+
+    # Method for parsing a single "bytes=" range against the report size
+    @staticmethod
+    def byte_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+        """
+        Parse the Range header of a download.
+
+        - **range_header**: The Range request header
+        - **size**: Size of the report in bytes
+
+        Returns:
+        - The first and last byte to send, None to send the whole report
+          (no header, another unit, several ranges or a malformed one).
+
+        Raises:
+        - ValueError if the range cannot be satisfied.
+        """
+        if not range_header or not range_header.strip().lower().startswith("bytes="):
+            return None
+        spec = range_header.strip()[len("bytes="):].strip()
+        if "," in spec:
+            return None
+        first, _, last = spec.partition("-")
+        try:
+            start = int(first) if first else None
+            end = int(last) if last else None
+        except ValueError:
+            return None
+        if start is None:
+            # "bytes=-N" asks for the last N bytes
+            if end is None or end <= 0 or size == 0:
+                raise ValueError("Unsatisfiable range")
+            return max(0, size - end), size - 1
+        end = size - 1 if end is None else min(end, size - 1)
+        if start < 0 or start >= size or start > end:
+            raise ValueError("Unsatisfiable range")
+        return start, end
+
+    # Method for reading a byte range of a report in chunks
+    @staticmethod
+    def file_chunks(path: str, start: int, end: int) -> Iterator[bytes]:
+        with open(path, "rb") as report_file:
+            report_file.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = report_file.read(min(REPORT_DOWNLOAD_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    # Method for answering the download of a finished report, whole or the requested range
+    @staticmethod
+    def download(job: dict, range_header: Optional[str], if_range: Optional[str]) -> StreamingResponse:
+        path = ReportJobs.path(job["id"])
+        size = os.path.getsize(path)
+        media_type, extension = REPORT_FORMATS[job["format"]]
+        etag = f'"{job["id"]}"'
+        headers = {
+            "Accept-Ranges": "bytes",
+            "ETag": etag,
+            "Content-Disposition": f"attachment; filename=candidates_report.{extension}",
+        }
+        # A resume validated against another report gets the whole new one
+        byte_range = ReportJobs.byte_range(range_header, size) if if_range in (None, etag) else None
+        if byte_range is None:
+            headers["Content-Length"] = str(size)
+            return StreamingResponse(ReportJobs.file_chunks(path, 0, size - 1), media_type=media_type, headers=headers)
+        start, end = byte_range
+        headers["Content-Length"] = str(end - start + 1)
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        return StreamingResponse(ReportJobs.file_chunks(path, start, end), status_code=206, media_type=media_type, headers=headers)
+
+os.register_at_fork(after_in_child=ReportJobs.reset_after_fork)
@@ -0,0 +1,151 @@
+# Importing libraries
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+from bson import json_util
+from dotenv import load_dotenv
+from app.helper.cache_helper import TTLCache
+
+# Load environment variables from the .env file
+load_dotenv()
+
+# Result cache settings: "memory" keeps results per worker, "sqlite" shares them between the workers of a host
+RESULT_CACHE_BACKEND = os.getenv('RESULT_CACHE_BACKEND', 'memory')
+RESULT_CACHE_SIZE = int(os.getenv('RESULT_CACHE_SIZE', 1024))
+RESULT_CACHE_TTL = float(os.getenv('RESULT_CACHE_TTL', 30))
+RESULT_CACHE_PATH = os.getenv('RESULT_CACHE_PATH', '/tmp/recruitment-result-cache.sqlite3')
+
+# In-process backend, an LRU/TTL cache
+class MemoryResultCacheBackend:
+    name = "memory"
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.entries = TTLCache(maxsize, ttl)
+
+    # The entries are emptied by the TTLCache fork hook
+    def reset_after_fork(self) -> None:
+        pass
+
+    def get(self, key: str) -> Any:
+        return self.entries.get(key)
+
+    def set(self, key: str, value: Any) -> None:
+        self.entries.set(key, value)
+
+    def stats(self) -> dict:
+        return self.entries.stats()
+
+# Backend shared by the worker processes of one host through a SQLite file,
+# a local stand-in for a networked cache such as Redis
+class SQLiteResultCacheBackend:
+    name = "sqlite"
+
+    def __init__(self, path: str, maxsize: int, ttl: float):
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value TEXT, expires_at REAL, used_at REAL)")
+            connection.execute("CREATE INDEX IF NOT EXISTS entries_used_at ON entries (used_at)")
+
+    # SQLite connections cannot be shared between threads, each thread opens its own
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    # A connection opened by the parent must not be used by a forked worker, it opens its own
+    def reset_after_fork(self) -> None:
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Any:
+        connection = self._connection()
+        now = time.time()
+        row = connection.execute("SELECT value FROM entries WHERE key = ? AND expires_at > ?", (key, now)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        connection.execute("UPDATE entries SET used_at = ? WHERE key = ?", (now, key))
+        self.hits += 1
+        return json_util.loads(row[0])
+
+    def set(self, key: str, value: Any) -> None:
+        connection = self._connection()
+        now = time.time()
+        connection.execute(
+            "INSERT OR REPLACE INTO entries (key, value, expires_at, used_at) VALUES (?, ?, ?, ?)",
+            (key, json_util.dumps(value), now + self.ttl, now)
+        )
+        connection.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+        # Evict the least recently used entries beyond maxsize
+        connection.execute(
+            "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+            (self.maxsize,)
+        )
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        size = self._connection().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return {
+            "size": size,
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+def create_backend():
+    if RESULT_CACHE_BACKEND == "sqlite":
+        return SQLiteResultCacheBackend(RESULT_CACHE_PATH, RESULT_CACHE_SIZE, RESULT_CACHE_TTL)
+    return MemoryResultCacheBackend(RESULT_CACHE_SIZE, RESULT_CACHE_TTL)
+
+# ResultCache class caching /all-candidates pages per user.
+# Keys embed the version of the user's candidate list stored in MongoDB, which every
+# candidate write bumps whatever worker handles it, so a result computed before a
+# write can never be served after it. Entries of older versions age out by LRU/TTL.
+class ResultCache:
+    backend = create_backend()
+
+    # Method for giving a forked worker a backend state of its own
+    @staticmethod
+    def reset_after_fork() -> None:
+        ResultCache.backend.reset_after_fork()
+
+    # Method for building the cache key of a query, with the filters normalized so equivalent queries share it
+    @staticmethod
+    def make_key(user_key: str, version: int, filters: dict, **page) -> str:
+        normalized = {
+            field: {**value, "$in": sorted(value["$in"])} if isinstance(value, dict) and "$in" in value else value
+            for field, value in filters.items()
+        }
+        raw = json_util.dumps({"filters": normalized, "page": page}, sort_keys=True)
+        return f"{user_key}:{version}:{hashlib.sha1(raw.encode()).hexdigest()}"
+
+    # Method for reading a cached result of a user at the given version
+    @staticmethod
+    def get(user_key: str, version: int, filters: dict, **page) -> Optional[Any]:
+        return ResultCache.backend.get(ResultCache.make_key(user_key, version, filters, **page))
+
+    # Method for caching a result of a user, keyed by the version read before the query ran
+    @staticmethod
+    def set(user_key: str, version: int, filters: dict, value: Any, **page) -> None:
+        ResultCache.backend.set(ResultCache.make_key(user_key, version, filters, **page), value)
+
+    # Method for reporting the hit ratio of the cache
+    @staticmethod
+    def stats() -> dict:
+        return {"backend": ResultCache.backend.name, **ResultCache.backend.stats()}
+
+os.register_at_fork(after_in_child=ResultCache.reset_after_fork)
@@ -0,0 +1,80 @@
+# Importing libraries
+from datetime import date, datetime
+from typing import Any, Dict, Optional
+import msgpack
+import orjson
+from bson import ObjectId
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+
+# Media types a client can send in Accept to receive MessagePack instead of JSON
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+
+# Media ranges that select JSON
+JSON_MEDIA_RANGES = ("application/json", "application/*", "*/*")
+
+# Method for encoding the BSON types neither orjson nor msgpack know, only called for those values
+def _encode_default(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+# JSON response rendered by orjson in one pass, without jsonable_encoder
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_encode_default, option=orjson.OPT_NON_STR_KEYS)
+
+# Binary MessagePack response for internal services
+class MsgPackResponse(Response):
+    media_type = "application/msgpack"
+
+    def render(self, content: Any) -> bytes:
+        return msgpack.packb(content, default=_encode_default, use_bin_type=True, datetime=False)
+
+# SerializationHelper class for rendering responses in the format negotiated with the client
+class SerializationHelper:
+
+    # Method for encoding a value as JSON bytes, the BSON types included
+    @staticmethod
+    def dumps_json(content: Any) -> bytes:
+        return orjson.dumps(content, default=_encode_default, option=orjson.OPT_NON_STR_KEYS)
+
+    # Method for reading the quality of each media type of an Accept header
+    @staticmethod
+    def accepted(accept: Optional[str]) -> Dict[str, float]:
+        qualities = {}
+        for part in (accept or "").split(","):
+            media_type, *params = [item.strip() for item in part.split(";")]
+            if not media_type:
+                continue
+            quality = 1.0
+            for param in params:
+                name, _, value = param.partition("=")
+                if name.strip() == "q":
+                    try:
+                        quality = float(value)
+                    except ValueError:
+                        quality = 0.0
+            qualities[media_type.lower()] = max(quality, qualities.get(media_type.lower(), 0.0))
+        return qualities
+
+    # Method for telling whether the client prefers MessagePack, JSON stays the default and wins ties
+    @staticmethod
+    def wants_msgpack(accept: Optional[str]) -> bool:
+        qualities = SerializationHelper.accepted(accept)
+        msgpack_quality = max((qualities.get(media_type, 0.0) for media_type in MSGPACK_MEDIA_TYPES), default=0.0)
+        json_quality = max((qualities.get(media_range, 0.0) for media_range in JSON_MEDIA_RANGES), default=0.0)
+        return msgpack_quality > json_quality
+
+    # Method for rendering content as MessagePack or JSON according to the Accept header of the request
+    @staticmethod
+    def response(request: Request, content: Any, status_code: int = 200, headers: Optional[dict] = None) -> Response:
+        headers = {**(headers or {}), "Vary": "Accept"}
+        if SerializationHelper.wants_msgpack(request.headers.get("accept")):
+            return MsgPackResponse(content, status_code=status_code, headers=headers)
+        return FastJSONResponse(content, status_code=status_code, headers=headers)
+
+# OpenAPI description of the negotiated responses, next to the default JSON
+NEGOTIATED_RESPONSES = {200: {"content": {"application/msgpack": {}}}}
@@ -0,0 +1,142 @@
+# Importing libraries
+import math
+import os
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+from dotenv import load_dotenv
+from app.helper.cache_helper import TTLCache
+from app.models.job import JobProfile
+
+# Load environment variables from the .env file
+load_dotenv()
+
+# Number of users whose candidate snapshot is kept in memory, and seconds before an unused one is dropped
+SHORTLIST_SNAPSHOT_USERS = int(os.getenv('SHORTLIST_SNAPSHOT_USERS', 100))
+SHORTLIST_SNAPSHOT_TTL = float(os.getenv('SHORTLIST_SNAPSHOT_TTL', 600))
+
+# Number of candidates shortlisted when the client does not send a limit
+DEFAULT_SHORTLIST = 20
+MAX_SHORTLIST = 500
+
+# A salary over the budget scores down linearly, to 0 at this share over it
+SALARY_TOLERANCE = 1.0
+
+# Cache of user key -> (candidate list version, snapshot), a write bumps the version and the snapshot is rebuilt
+snapshot_cache = TTLCache(maxsize=SHORTLIST_SNAPSHOT_USERS, ttl=SHORTLIST_SNAPSHOT_TTL)
+
+# CandidateColumns class, a columnar snapshot of the scored fields of a user's candidates
+class CandidateColumns:
+
+    def __init__(self, documents: Iterable[dict]):
+        ids, years, salaries, cities, skill_rows, skill_codes = [], [], [], [], [], []
+        # Case-folded value -> code of the skills and cities
+        self.skills: Dict[str, int] = {}
+        self.cities: Dict[str, int] = {}
+        for row, document in enumerate(documents):
+            ids.append(str(document["_id"]))
+            years.append(CandidateColumns.number(document.get("years_of_experience")))
+            salaries.append(CandidateColumns.number(document.get("salary")))
+            city = document.get("city")
+            cities.append(self.cities.setdefault(city.strip().casefold(), len(self.cities)) if isinstance(city, str) else -1)
+            skills = document.get("skills")
+            codes = {
+                self.skills.setdefault(skill.strip().casefold(), len(self.skills))
+                for skill in (skills if isinstance(skills, list) else []) if isinstance(skill, str)
+            }
+            skill_rows.extend([row] * len(codes))
+            skill_codes.extend(codes)
+        self.ids = ids
+        self.years = np.array(years, dtype=np.float64)
+        self.salaries = np.array(salaries, dtype=np.float64)
+        self.city_codes = np.array(cities, dtype=np.int32)
+        # Rows of the candidates having each skill, grouped by skill code: those of code c are postings[offsets[c]:offsets[c + 1]]
+        skill_codes = np.array(skill_codes, dtype=np.int32)
+        self.skill_postings = np.array(skill_rows, dtype=np.int32)[np.argsort(skill_codes, kind="stable")]
+        self.skill_offsets = np.concatenate(([0], np.cumsum(np.bincount(skill_codes, minlength=len(self.skills)))))
+
+    # Method for reading a numeric field, NaN when it is missing
+    @staticmethod
+    def number(value) -> float:
+        return float(value) if isinstance(value, (int, float)) else math.nan
+
+    # Method for computing the codes of the values known to the snapshot
+    @staticmethod
+    def codes(vocabulary: Dict[str, int], values: List[str]) -> List[int]:
+        return sorted({vocabulary[key] for key in (value.strip().casefold() for value in values) if key in vocabulary})
+
+    # Method for counting, per candidate, how many of the given skills it has, reading only the postings of those skills
+    def skill_matches(self, skills: List[str]) -> np.ndarray:
+        postings = [self.skill_postings[self.skill_offsets[code]:self.skill_offsets[code + 1]] for code in self.codes(self.skills, skills)]
+        rows = np.concatenate(postings) if postings else np.zeros(0, dtype=np.int32)
+        return np.bincount(rows, minlength=len(self.ids))
+
+    # Method for scoring every candidate on each criterion the job profile sets, each score between 0 and 1
+    def criteria_scores(self, profile: JobProfile) -> Dict[str, np.ndarray]:
+        scores = {}
+        required = {skill.strip().casefold() for skill in profile.required_skills} - {""}
+        if required:
+            scores["required_skills"] = self.skill_matches(list(required)) / len(required)
+        nice_to_have = {skill.strip().casefold() for skill in profile.nice_to_have_skills} - {""}
+        if nice_to_have:
+            scores["nice_to_have_skills"] = self.skill_matches(list(nice_to_have)) / len(nice_to_have)
+        if profile.min_years_of_experience:
+            scores["experience"] = np.nan_to_num(np.clip(self.years / profile.min_years_of_experience, 0, 1))
+        if profile.max_salary:
+            over = (self.salaries - profile.max_salary) / (profile.max_salary * SALARY_TOLERANCE)
+            scores["salary"] = np.nan_to_num(np.clip(1 - over, 0, 1))
+        if profile.preferred_cities:
+            wanted = np.zeros(len(self.cities) + 1, dtype=bool)
+            wanted[self.codes(self.cities, profile.preferred_cities)] = True
+            # Code -1 of a missing city reads the extra last entry, which is never wanted
+            scores["city"] = wanted[self.city_codes].astype(np.float64)
+        return scores
+
+    # Method for ranking the candidates by their weighted score, returns the total scored and the best ones with their breakdown
+    def rank(self, profile: JobProfile, limit: int) -> dict:
+        scores = self.criteria_scores(profile)
+        weights = {criterion: getattr(profile.weights, criterion) for criterion in scores}
+        weight_sum = sum(weights.values())
+        total = np.zeros(len(self.ids))
+        for criterion, score in scores.items():
+            total += score * (weights[criterion] / weight_sum if weight_sum else 1 / len(scores))
+        eligible = np.ones(len(self.ids), dtype=bool)
+        if profile.require_all_required_skills and "required_skills" in scores:
+            eligible &= scores["required_skills"] == 1
+        rows = np.flatnonzero(eligible)
+        if rows.size > limit:
+            # Partial sort: only the best `limit` scores are ordered
+            rows = rows[np.argpartition(-total[rows], limit - 1)[:limit]]
+        rows = rows[np.lexsort((rows, -total[rows]))]
+        return {
+            "scored": int(eligible.sum()),
+            "weights": {criterion: round(weight / weight_sum, 4) if weight_sum else None for criterion, weight in weights.items()},
+            "shortlist": [
+                {
+                    "candidate_id": self.ids[row],
+                    "score": round(float(total[row]), 4),
+                    "breakdown": {criterion: round(float(score[row]), 4) for criterion, score in scores.items()},
+                }
+                for row in rows
+            ],
+        }
+
+# ShortlistHelper class, cached candidate snapshots of the shortlist scoring
+class ShortlistHelper:
+
+    # Method for building the projection that only reads the scored fields
+    @staticmethod
+    def projection() -> dict:
+        return {"skills": 1, "years_of_experience": 1, "salary": 1, "city": 1}
+
+    # Method for returning the snapshot of a user at a version, or None when it must be built
+    @staticmethod
+    def loaded(user_key: str, version: int) -> Optional[CandidateColumns]:
+        cached = snapshot_cache.get(user_key, is_valid=lambda cached: cached[0] == version)
+        return cached[1] if cached is not None else None
+
+    # Method for building and caching the snapshot of a user at the version read before its candidates
+    @staticmethod
+    def store(user_key: str, version: int, documents: Iterable[dict]) -> CandidateColumns:
+        columns = CandidateColumns(documents)
+        snapshot_cache.set(user_key, (version, columns))
+        return columns
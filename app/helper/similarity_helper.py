@@ -0,0 +1,278 @@
+# Importing libraries
+import os
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from dotenv import load_dotenv
+from app.helper.candidate_events_helper import CandidateEvents
+
+# Load environment variables from the .env file
+load_dotenv()
+
+# Number of users whose candidate vectors are kept in memory, least recently used first out
+SIMILARITY_MAX_USERS = int(os.getenv('SIMILARITY_MAX_USERS', 100))
+
+# Number of similar candidates returned when the client does not send a limit
+DEFAULT_SIMILAR = 10
+MAX_SIMILAR = 100
+
+# Similarity scores of two feature sets
+SIMILARITY_METRICS = ("jaccard", "cosine")
+
+# Lower bounds of the years of experience ranges, a candidate has the bit of its range
+EXPERIENCE_BUCKETS = (0, 2, 5, 10, 15)
+EXPERIENCE_RANGES = tuple(
+    f"{low}-{high - 1}" for low, high in zip(EXPERIENCE_BUCKETS, EXPERIENCE_BUCKETS[1:])
+) + (f"{EXPERIENCE_BUCKETS[-1]}+",)
+
+# Rows allocated for a new user, doubled whenever they are all in use
+INITIAL_ROWS = 1024
+
+_ONE = np.uint64(1)
+
+# CandidateVectors class, the features of a user's candidates as one bitset per candidate, stored column-major
+class CandidateVectors:
+
+    def __init__(self):
+        # Case-folded feature -> bit, exact spelling -> bit, and the (field, value as first seen) of each bit
+        self.columns: Dict[Tuple[str, str], int] = {}
+        self.spellings: Dict[Tuple[str, str], int] = {}
+        self.features: List[Tuple[str, str]] = []
+        # Candidate id -> row, the id of each row (None once deleted) and the rows free for reuse
+        self.rows: Dict[str, int] = {}
+        self.ids: List[Optional[str]] = []
+        self.free: List[int] = []
+        # One word of 64 feature bits per row, words[w, row] holds bits 64w to 64w+63 of the row
+        self.words = np.zeros((1, INITIAL_ROWS), dtype=np.uint64)
+        # Number of features of each row
+        self.sizes = np.zeros(INITIAL_ROWS, dtype=np.int32)
+        # (row, bit) pairs of a bulk build, set in one vectorized pass by seal
+        self.pending: Optional[Tuple[List[int], List[int]]] = ([], [])
+        # Held while the vectors are scored or written, a user's scoring pass never stalls another user's writes
+        self.lock = threading.Lock()
+        # Version of the user's candidate list the vectors reflect, see SimilarityIndex.loaded
+        self.version = 0
+
+    # Method for listing the features of a candidate: skills, career level, job major and experience range
+    @staticmethod
+    def candidate_features(document: dict) -> List[Tuple[str, str]]:
+        skills = document.get("skills")
+        features = [("skills", skill) for skill in skills if isinstance(skill, str)] if isinstance(skills, list) else []
+        for field in ("career_level", "job_major"):
+            value = document.get(field)
+            if isinstance(value, str):
+                features.append((field, value))
+        years = document.get("years_of_experience")
+        if isinstance(years, (int, float)):
+            features.append(("years_of_experience", EXPERIENCE_RANGES[max(bisect_right(EXPERIENCE_BUCKETS, years) - 1, 0)]))
+        return features
+
+    # Method for returning the bit of a feature, a new feature widens the words when they are all taken
+    def column(self, feature: Tuple[str, str]) -> Optional[int]:
+        bit = self.spellings.get(feature)
+        if bit is None:
+            field, value = feature
+            key = (field, value.strip().casefold())
+            if not key[1]:
+                return None
+            bit = self.columns.get(key)
+            if bit is None:
+                bit = self.columns[key] = len(self.features)
+                self.features.append((field, value.strip()))
+                if bit >> 6 >= self.words.shape[0]:
+                    self.words = np.vstack([self.words, np.zeros_like(self.words[:1])])
+            self.spellings[feature] = bit
+        return bit
+
+    # Method for returning a free row, the arrays double when every row is in use
+    def allocate(self) -> int:
+        if self.free:
+            return self.free.pop()
+        row = len(self.ids)
+        self.ids.append(None)
+        if row >= self.sizes.shape[0]:
+            self.words = np.hstack([self.words, np.zeros_like(self.words)])
+            self.sizes = np.concatenate([self.sizes, np.zeros_like(self.sizes)])
+        return row
+
+    # Method for setting the bits of (row, bit) pairs in one vectorized pass
+    def set_bits(self, rows: List[int], bits: List[int]) -> None:
+        if not rows:
+            return
+        rows = np.asarray(rows, dtype=np.int64)
+        bits = np.asarray(bits, dtype=np.int64)
+        np.bitwise_or.at(self.words, (bits >> 6, rows), _ONE << (bits & 63).astype(np.uint64))
+
+    # Method for adding or replacing the features of a candidate
+    def add(self, document: dict) -> None:
+        candidate_id = str(document["_id"])
+        row = self.rows.get(candidate_id)
+        if row is None:
+            row = self.rows[candidate_id] = self.allocate()
+            self.ids[row] = candidate_id
+        else:
+            self.words[:, row] = 0
+        bits = set(map(self.column, self.candidate_features(document)))
+        bits.discard(None)
+        bits = list(bits)
+        self.sizes[row] = len(bits)
+        if self.pending is not None:
+            self.pending[0].extend([row] * len(bits))
+            self.pending[1].extend(bits)
+        else:
+            self.set_bits([row] * len(bits), bits)
+
+    # Method for removing a candidate, its row is cleared and reused by the next one added
+    def remove(self, candidate_id: str) -> None:
+        row = self.rows.pop(candidate_id, None)
+        if row is None:
+            return
+        self.words[:, row] = 0
+        self.sizes[row] = 0
+        self.ids[row] = None
+        self.free.append(row)
+
+    # Method for setting the bits collected by a bulk build, later writes set their bits directly
+    def seal(self) -> None:
+        if self.pending is not None:
+            self.set_bits(*self.pending)
+            self.pending = None
+
+    # Method for decoding the features of a bit mask given as one word per 64 bits
+    def decode(self, mask: np.ndarray) -> Dict[str, List[str]]:
+        decoded: Dict[str, List[str]] = {}
+        for word in np.flatnonzero(mask):
+            value = int(mask[word])
+            while value:
+                low = value & -value
+                field, feature = self.features[(int(word) << 6) + low.bit_length() - 1]
+                decoded.setdefault(field, []).append(feature)
+                value ^= low
+        return decoded
+
+    # Method for scoring every candidate against one of them and returning the best ones with their shared features
+    def similar(self, candidate_id: str, limit: int, metric: str = "jaccard") -> Optional[List[dict]]:
+        row = self.rows.get(candidate_id)
+        if row is None:
+            return None
+        count = len(self.ids)
+        query = self.words[:, row]
+        # Only the words where the candidate has features can intersect, whatever the number of distinct features
+        shared = np.zeros(count, dtype=np.int32)
+        for word in np.flatnonzero(query):
+            shared += np.bitwise_count(self.words[word, :count] & query[word]).astype(np.int32)
+        sizes = self.sizes[:count]
+        if metric == "cosine":
+            norms = np.sqrt(sizes.astype(np.float64) * int(self.sizes[row]))
+        else:
+            norms = (sizes + self.sizes[row] - shared).astype(np.float64)
+        scores = np.divide(shared, norms, out=np.zeros(count), where=norms > 0)
+        scores[row] = 0
+        matches = np.flatnonzero(scores)
+        if matches.size > limit:
+            # Partial sort: only the best `limit` scores are ordered
+            matches = matches[np.argpartition(-scores[matches], limit - 1)[:limit]]
+        matches = matches[np.lexsort((matches, -scores[matches]))]
+        return [
+            {
+                "candidate_id": self.ids[match],
+                "score": round(float(scores[match]), 4),
+                "shared": self.decode(self.words[:, match] & query),
+            }
+            for match in matches
+        ]
+
+# SimilarityIndex class, per-user candidate vectors built lazily and kept current by the candidate writes.
+# Vectors are tagged with the candidate list version stored in MongoDB, so a write handled
+# by another worker makes them stale and they are rebuilt on the next request.
+class SimilarityIndex:
+    _vectors: "OrderedDict[str, CandidateVectors]" = OrderedDict()
+    # Guards the loaded vectors, each user's vectors have their own lock
+    _lock = threading.Lock()
+
+    # Method for giving a forked worker no loaded vectors and locks no parent thread can be holding
+    @staticmethod
+    def reset_after_fork() -> None:
+        SimilarityIndex._vectors = OrderedDict()
+        SimilarityIndex._lock = threading.Lock()
+
+    # Method for building the projection that only reads the compared fields
+    @staticmethod
+    def projection() -> dict:
+        return {"skills": 1, "career_level": 1, "job_major": 1, "years_of_experience": 1}
+
+    # Method for returning the loaded vectors of a user at a list version, or None when they must be built
+    @staticmethod
+    def loaded(user_key: str, version: int) -> Optional[CandidateVectors]:
+        with SimilarityIndex._lock:
+            vectors = SimilarityIndex._vectors.get(user_key)
+            if vectors is None or vectors.version != version:
+                return None
+            SimilarityIndex._vectors.move_to_end(user_key)
+            return vectors
+
+    # Method for creating the empty vectors of a build
+    @staticmethod
+    def empty() -> CandidateVectors:
+        return CandidateVectors()
+
+    # Method for building the vectors of a user from their candidates
+    @staticmethod
+    def build(documents: Iterable[dict]) -> CandidateVectors:
+        vectors = SimilarityIndex.empty()
+        for document in documents:
+            vectors.add(document)
+        return vectors
+
+    # Method for building the vectors of a user from their candidates and keeping them, see store
+    @staticmethod
+    def load(user_key: str, version: int, documents: Iterable[dict]) -> CandidateVectors:
+        return SimilarityIndex.store(user_key, version, SimilarityIndex.build(documents))
+
+    # Method for sealing and keeping a build, tagged with the list version read before its candidates
+    @staticmethod
+    def store(user_key: str, version: int, vectors: CandidateVectors) -> CandidateVectors:
+        vectors.seal()
+        vectors.version = version
+        with SimilarityIndex._lock:
+            SimilarityIndex._vectors[user_key] = vectors
+            SimilarityIndex._vectors.move_to_end(user_key)
+            while len(SimilarityIndex._vectors) > SIMILARITY_MAX_USERS:
+                SimilarityIndex._vectors.popitem(last=False)
+        return vectors
+
+    # Method for returning the candidates most similar to one of them, None when it is not indexed
+    @staticmethod
+    def similar(vectors: CandidateVectors, candidate_id: str, limit: int, metric: str = "jaccard") -> Optional[List[dict]]:
+        with vectors.lock:
+            return vectors.similar(candidate_id, limit, metric)
+
+    # Method for applying a candidate write of this worker to the loaded vectors of its user.
+    # The write bumped the list version by one and so do the vectors, when another worker
+    # wrote meanwhile the versions differ and the next request rebuilds them.
+    @staticmethod
+    def on_event(event: str, user_key: str, before: Optional[dict], after: Optional[dict]) -> None:
+        with SimilarityIndex._lock:
+            vectors = SimilarityIndex._vectors.get(user_key)
+        if vectors is None:
+            return
+        # Applied under the user's lock only, a scoring pass of this user delays this write and no other
+        with vectors.lock:
+            if after:
+                vectors.add(after)
+            elif before:
+                vectors.remove(str(before["_id"]))
+            vectors.version += 1
+
+    # Method for dropping every loaded vector set
+    @staticmethod
+    def reset() -> None:
+        with SimilarityIndex._lock:
+            SimilarityIndex._vectors.clear()
+
+# Keep the loaded vectors current with every candidate write
+CandidateEvents.subscribe(SimilarityIndex.on_event)
+
+os.register_at_fork(after_in_child=SimilarityIndex.reset_after_fork)
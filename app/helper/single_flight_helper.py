@@ -0,0 +1,156 @@
+# Importing libraries
+import asyncio
+import os
+import threading
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Hashable
+from dotenv import load_dotenv
+from app.helper.metrics_helper import REGISTRY
+
+# Load environment variables from the .env file
+load_dotenv()
+
+# Seconds a caller waits on an identical query in flight before running its own, 0 disables coalescing
+SINGLE_FLIGHT_TIMEOUT = float(os.getenv('SINGLE_FLIGHT_TIMEOUT', 5))
+
+SINGLE_FLIGHT_CALLS = REGISTRY.counter(
+    "single_flight_calls",
+    "Coalesced reads by operation and outcome: executed, coalesced (query saved) or timeout (waited, then queried).",
+    ("operation", "outcome"),
+)
+
+# One query in flight on the sync path, its result or error is handed to every waiter
+class _Flight:
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+
+# SingleFlight class running one query per key at a time, identical concurrent callers share its outcome
+class SingleFlight:
+    instances: Dict[str, "SingleFlight"] = {}
+    # Every instance, registered or not, held weakly for the fork hook
+    _all: "weakref.WeakSet[SingleFlight]" = weakref.WeakSet()
+
+    # An unregistered instance is left out of /admin/cache-stats
+    def __init__(self, operation: str, timeout: float = SINGLE_FLIGHT_TIMEOUT, register: bool = True):
+        self.operation = operation
+        self.timeout = timeout
+        self.executed = 0
+        self.coalesced = 0
+        self.timeouts = 0
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+        self._lock = threading.Lock()
+        if register:
+            SingleFlight.instances[operation] = self
+        SingleFlight._all.add(self)
+
+    # Method for giving a forked worker no query in flight, zeroed counters and a lock no parent thread can be holding
+    @staticmethod
+    def reset_all_after_fork() -> None:
+        for flights in list(SingleFlight._all):
+            flights.executed = flights.coalesced = flights.timeouts = 0
+            flights._flights = {}
+            flights._tasks = {}
+            flights._lock = threading.Lock()
+
+    def _count(self, outcome: str) -> None:
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+        SINGLE_FLIGHT_CALLS.inc(self.operation, outcome)
+
+    # Method for running a blocking query, or waiting for the identical one already running in another thread
+    def do(self, key: Hashable, query: Callable[[], Any]) -> Any:
+        if self.timeout <= 0:
+            return query()
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            if not flight.done.wait(self.timeout):
+                # The query in flight is stuck, do not let every caller queue behind it
+                self._count("timeouts")
+                return query()
+            self._count("coalesced")
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        self._count("executed")
+        try:
+            flight.result = query()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.done.set()
+
+    # Method for running a query coroutine, or awaiting the identical one already running on the event loop
+    async def do_async(self, key: Hashable, query: Callable[[], Awaitable[Any]]) -> Any:
+        if self.timeout <= 0:
+            return await query()
+        task = self._tasks.get(key)
+        if task is None:
+            self._count("executed")
+            # The query runs in a task of its own, so a caller that disconnects does not cancel it for the others
+            task = self._tasks[key] = asyncio.ensure_future(query())
+            task.add_done_callback(lambda done: self._finished(key, done))
+            return await asyncio.shield(task)
+        try:
+            result = await asyncio.wait_for(asyncio.shield(task), self.timeout)
+        except asyncio.TimeoutError:
+            if task.done():
+                # The query itself failed with a timeout, its error is shared like any other
+                self._count("coalesced")
+                raise
+            self._count("timeouts")
+            return await query()
+        self._count("coalesced")
+        return result
+
+    # Method for forgetting a finished query task, its error is retrieved so an unawaited one is not reported
+    def _finished(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            task.exception()
+
+    # Method for detaching the query in flight for a key, so callers arriving after a write run a query of their own
+    def forget(self, key: Hashable) -> None:
+        with self._lock:
+            self._flights.pop(key, None)
+            self._tasks.pop(key, None)
+
+    # Method for reporting how many queries were executed and how many were saved
+    def stats(self) -> dict:
+        calls = self.executed + self.coalesced + self.timeouts
+        return {
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "timeouts": self.timeouts,
+            "saved_ratio": self.coalesced / calls if calls else 0.0,
+        }
+
+    # Method for reporting the counters of every coalesced operation
+    @staticmethod
+    def all_stats() -> dict:
+        return {operation: flights.stats() for operation, flights in SingleFlight.instances.items()}
+
+# Coalesced candidate reads, shared by the sync and async services
+candidate_reads = SingleFlight("get_candidate")
+candidate_page_reads = SingleFlight("get_all_candidates")
+
+# Coalesced builds of the candidate snapshot scored by the shortlist
+shortlist_snapshots = SingleFlight("shortlist_snapshot")
+
+# Coalesced first builds of the candidate vectors scored by the similar candidates
+similarity_builds = SingleFlight("similarity_build")
+
+os.register_at_fork(after_in_child=SingleFlight.reset_all_after_fork)
@@ -0,0 +1,237 @@
+# Importing libraries
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+from dotenv import load_dotenv
+from app.config.db_config import get_database, get_candidate_collection
+from app.helper.index_helper import IndexAdvisor
+from app.helper.metrics_helper import REGISTRY
+
+# Load environment variables from the .env file
+load_dotenv()
+
+# Candidate operations slower than this many milliseconds are recorded, 0 disables the log
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 100))
+
+# Share of slow operations whose plan is captured with explain(), 1 explains every one of them
+SLOW_QUERY_EXPLAIN_SAMPLE = float(os.getenv('SLOW_QUERY_EXPLAIN_SAMPLE', 1))
+
+# Seconds before the plan of an already explained shape is captured again
+SLOW_QUERY_EXPLAIN_INTERVAL = float(os.getenv('SLOW_QUERY_EXPLAIN_INTERVAL', 60))
+
+# Number of recent slow operations kept for /admin/slow-queries
+SLOW_QUERY_LOG_SIZE = int(os.getenv('SLOW_QUERY_LOG_SIZE', 200))
+
+# Maximum number of distinct slow shapes aggregated
+MAX_SLOW_SHAPES = 256
+
+SLOW_OPERATIONS = REGISTRY.counter(
+    "mongo_slow_operations", "Candidate operations slower than SLOW_QUERY_MS, by operation.", ("operation",))
+
+# One timed repository call, the caller fills in how many documents it returned
+class SlowQueryTimer:
+
+    def __init__(self, operation: str, command: dict):
+        self.operation = operation
+        self.command = command
+        self.returned: Optional[int] = None
+        # Exception class the call failed with, such as a timeout
+        self.error: Optional[str] = None
+
+# SlowQueryLog class recording slow candidate operations with their shape and a sampled query plan
+class SlowQueryLog:
+    _recent: deque = deque(maxlen=SLOW_QUERY_LOG_SIZE)
+    _shapes: Dict[Tuple, dict] = {}
+    _explained_at: Dict[Tuple, float] = {}
+    _lock = threading.Lock()
+    # explain() re-runs the query, one background thread keeps it off the request path and serialized
+    _explainer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+
+    # Method for giving a forked worker its own log and explain thread, the parent's thread does not exist in it
+    @staticmethod
+    def reset_after_fork() -> None:
+        SlowQueryLog._recent = deque(maxlen=SLOW_QUERY_LOG_SIZE)
+        SlowQueryLog._shapes = {}
+        SlowQueryLog._explained_at = {}
+        SlowQueryLog._lock = threading.Lock()
+        SlowQueryLog._explainer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+
+    # Method for building the find command of a listing, as explain() expects it
+    @staticmethod
+    def find_command(query: dict, sort: Optional[List[Tuple[str, int]]] = None, limit: int = 0) -> dict:
+        command = {"find": get_candidate_collection().name, "filter": query}
+        if sort:
+            command["sort"] = dict(sort)
+        if limit:
+            command["limit"] = limit
+        return command
+
+    # Method for building the count command of a listing total
+    @staticmethod
+    def count_command(query: dict) -> dict:
+        return {"count": get_candidate_collection().name, "query": query}
+
+    # Method for building the aggregate command of a pipeline
+    @staticmethod
+    def aggregate_command(pipeline: List[dict]) -> dict:
+        return {"aggregate": get_candidate_collection().name, "pipeline": pipeline, "cursor": {}}
+
+    # Method for extracting the filter and sort a command runs with
+    @staticmethod
+    def command_query(command: dict) -> Tuple[dict, List[Tuple[str, int]]]:
+        if "aggregate" in command:
+            match = next((stage["$match"] for stage in command["pipeline"] if "$match" in stage), {})
+            return match, []
+        return command.get("filter", command.get("query", {})), list(command.get("sort", {}).items())
+
+    # Method for reducing an operation to its normalized shape: operation, filtered fields and sort, never values
+    @staticmethod
+    def shape(operation: str, command: dict) -> Tuple:
+        query, sort = SlowQueryLog.command_query(command)
+        return (operation, IndexAdvisor.query_shape(query), tuple(sort))
+
+    # Method for timing a repository call, usable around sync and awaited calls alike.
+    # A call that fails is recorded too, the slowest operations are often those that time out.
+    @staticmethod
+    @contextmanager
+    def timed(operation: str, command: dict) -> Iterator[SlowQueryTimer]:
+        timer = SlowQueryTimer(operation, command)
+        started = time.perf_counter()
+        try:
+            yield timer
+        except BaseException as e:
+            timer.error = type(e).__name__
+            raise
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            if SLOW_QUERY_MS > 0 and duration_ms >= SLOW_QUERY_MS:
+                SlowQueryLog.record(timer, duration_ms)
+
+    # Method for recording one slow operation, its plan is captured in the background when sampled
+    @staticmethod
+    def record(timer: SlowQueryTimer, duration_ms: float) -> dict:
+        key = SlowQueryLog.shape(timer.operation, timer.command)
+        operation, filters, sort = key
+        entry = {
+            "at": datetime.now(timezone.utc).isoformat(),
+            "operation": operation,
+            "filters": [f"{field}:{kind}" for field, kind in filters],
+            "sort": [f"{field}:{direction}" for field, direction in sort],
+            "duration_ms": round(duration_ms, 2),
+            "returned": timer.returned,
+            "error": timer.error,
+            "plan": None,
+        }
+        now = time.monotonic()
+        with SlowQueryLog._lock:
+            SlowQueryLog._recent.append(entry)
+            shape = SlowQueryLog._shapes.get(key)
+            if shape is None and len(SlowQueryLog._shapes) < MAX_SLOW_SHAPES:
+                shape = SlowQueryLog._shapes[key] = {
+                    "operation": operation, "filters": entry["filters"], "sort": entry["sort"],
+                    "count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0, "plan": None,
+                }
+            if shape is not None:
+                shape["count"] += 1
+                shape["errors"] += timer.error is not None
+                shape["total_ms"] += duration_ms
+                shape["max_ms"] = max(shape["max_ms"], duration_ms)
+            explain = (
+                now - SlowQueryLog._explained_at.get(key, float("-inf")) >= SLOW_QUERY_EXPLAIN_INTERVAL
+                and random.random() < SLOW_QUERY_EXPLAIN_SAMPLE
+            )
+            if explain:
+                SlowQueryLog._explained_at[key] = now
+        SLOW_OPERATIONS.inc(operation)
+        outcome = f"failed with {timer.error}" if timer.error else f"{timer.returned} returned"
+        logging.warning(
+            f"Slow candidate {operation} ({entry['duration_ms']} ms, {outcome}): "
+            f"filters={entry['filters']} sort={entry['sort']}"
+        )
+        if explain:
+            SlowQueryLog._explainer.submit(SlowQueryLog.capture_plan, key, timer.command, entry)
+        return entry
+
+    # Method for searching an explain() output for the first value stored under a key, at any depth
+    @staticmethod
+    def find_key(document, key: str):
+        if isinstance(document, dict):
+            if key in document:
+                return document[key]
+            values = document.values()
+        elif isinstance(document, list):
+            values = document
+        else:
+            return None
+        for value in values:
+            found = SlowQueryLog.find_key(value, key)
+            if found is not None:
+                return found
+        return None
+
+    # Method for explaining a command with its execution statistics
+    @staticmethod
+    def explain(command: dict) -> dict:
+        explained = get_database().command("explain", command, verbosity="executionStats")
+        stages = list(IndexAdvisor.plan_stages(SlowQueryLog.find_key(explained, "winningPlan") or {}))
+        stats = SlowQueryLog.find_key(explained, "executionStats") or {}
+        return {
+            "stages": [stage["stage"] for stage in stages],
+            "indexes": sorted({stage["indexName"] for stage in stages if "indexName" in stage}),
+            "collection_scan": any(stage["stage"] == "COLLSCAN" for stage in stages),
+            "in_memory_sort": any(stage["stage"] == "SORT" for stage in stages),
+            "docs_examined": stats.get("totalDocsExamined"),
+            "keys_examined": stats.get("totalKeysExamined"),
+            "returned": stats.get("nReturned"),
+        }
+
+    # Method for capturing the plan of a slow operation and attaching it to its entry and shape
+    @staticmethod
+    def capture_plan(key: Tuple, command: dict, entry: dict) -> None:
+        try:
+            plan = SlowQueryLog.explain(command)
+        except Exception as e:
+            logging.error(f"Could not explain slow candidate {key[0]}: {e}")
+            return
+        with SlowQueryLog._lock:
+            entry["plan"] = plan
+            if key in SlowQueryLog._shapes:
+                SlowQueryLog._shapes[key]["plan"] = plan
+        level = logging.WARNING if plan["collection_scan"] else logging.INFO
+        logging.log(
+            level,
+            f"Plan of slow candidate {key[0]} filters={entry['filters']}: {' > '.join(plan['stages'])}, "
+            f"{plan['docs_examined']} docs / {plan['keys_examined']} keys examined for {plan['returned']} returned"
+            + (" (COLLSCAN)" if plan["collection_scan"] else ""),
+        )
+
+    # Method for reporting the slow shapes, slowest in total first, and the most recent slow operations
+    @staticmethod
+    def report(recent: int = 50) -> dict:
+        with SlowQueryLog._lock:
+            shapes = [dict(shape) for shape in SlowQueryLog._shapes.values()]
+            entries = [dict(entry) for entry in list(SlowQueryLog._recent)[-recent:]] if recent else []
+        for shape in shapes:
+            shape["total_ms"] = round(shape["total_ms"], 2)
+            shape["max_ms"] = round(shape["max_ms"], 2)
+            shape["avg_ms"] = round(shape["total_ms"] / shape["count"], 2)
+            shape["collection_scan"] = bool(shape["plan"] and shape["plan"]["collection_scan"])
+        shapes.sort(key=lambda shape: -shape["total_ms"])
+        return {"threshold_ms": SLOW_QUERY_MS, "shapes": shapes, "recent": entries[::-1]}
+
+    # Method for forgetting the recorded operations
+    @staticmethod
+    def reset() -> None:
+        with SlowQueryLog._lock:
+            SlowQueryLog._recent.clear()
+            SlowQueryLog._shapes.clear()
+            SlowQueryLog._explained_at.clear()
+
+os.register_at_fork(after_in_child=SlowQueryLog.reset_after_fork)
@@ -1,13 +1,17 @@
 # Importing libraries
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
-from fastapi import Depends, Header
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 import os
+import threading
+import time
+from typing import Optional
 from dotenv import load_dotenv
-from app.config.db_config import user_collection
+from app.config.db_config import get_user_collection, get_async_user_collection
 from bson import ObjectId
 from app.models.user import UserResponseModel
+from app.helper.cache_helper import TTLCache
 from fastapi.security import OAuth2PasswordBearer
 
 # Load environment variables from the .env file
@@ -24,6 +28,22 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/user")
 JWT_SECRET = os.getenv('JWT_SECRET')
 ALGORITHM = "HS256"
 
+# Cache of verified token -> user document, so repeated requests skip the JWT decode and the user lookup
+token_cache = TTLCache(
+    maxsize=int(os.getenv('TOKEN_CACHE_SIZE', 10000)),
+    ttl=float(os.getenv('TOKEN_CACHE_TTL', 60))
+)
+
+# Cache of token -> user id read by the admission control, kept apart so rate limiting does not skew the token cache hit ratio
+identity_cache = TTLCache(
+    maxsize=int(os.getenv('TOKEN_CACHE_SIZE', 10000)),
+    ttl=float(os.getenv('TOKEN_CACHE_TTL', 60))
+)
+
+# Per-user generation, bumped to invalidate every cached token of a user at once
+_user_generations = {}
+_generations_lock = threading.Lock()
+
 # TokenHelper class for managing JWT creation and verification
 class TokenHelper:
     
@@ -37,6 +57,9 @@ class TokenHelper:
     
     # Method for verifying the JWT token
     def verify_token(token: str = Depends(oauth2_scheme)) -> UserResponseModel:
+        cached_user = TokenHelper.get_cached_user(token)
+        if cached_user is not None:
+            return cached_user
         try:                      
             payload = jwt.decode(token, JWT_SECRET, algorithms=[ALGORITHM]) 
             user_id: str = payload.get("id")
@@ -44,8 +67,90 @@ class TokenHelper:
                 return {"message": "Unauthorized"}
         except JWTError:
             return {"message": "Unauthorized"}
-        user = user_collection.find_one({"_id": ObjectId(user_id)}) 
-        user["_id"] = str(user["_id"])
+        # Read the generation before the lookup so an invalidation racing with it is not lost
+        generation = _user_generations.get(user_id, 0)
+        user = get_user_collection().find_one({"_id": ObjectId(user_id)}) 
         if user is None: 
             return {"message": "Unauthorized"}
+        user["_id"] = str(user["_id"])
+        TokenHelper.cache_user(token, payload, user, generation)
+        return user
+    
+    # Method for verifying the JWT token without blocking the event loop
+    async def verify_token_async(token: str = Depends(oauth2_scheme)) -> UserResponseModel:
+        cached_user = TokenHelper.get_cached_user(token)
+        if cached_user is not None:
+            return cached_user
+        try:
+            payload = jwt.decode(token, JWT_SECRET, algorithms=[ALGORITHM])
+            user_id: str = payload.get("id")
+            if user_id is None:
+                return {"message": "Unauthorized"}
+        except JWTError:
+            return {"message": "Unauthorized"}
+        generation = _user_generations.get(user_id, 0)
+        user = await get_async_user_collection().find_one({"_id": ObjectId(user_id)})
+        if user is None:
+            return {"message": "Unauthorized"}
+        user["_id"] = str(user["_id"])
+        TokenHelper.cache_user(token, payload, user, generation)
         return user
+    
+    # Method for verifying the JWT token of the routes that must never answer an anonymous caller
+    def require_user(current_user: dict = Depends(verify_token)) -> UserResponseModel:
+        return TokenHelper.authenticated(current_user)
+    
+    # Method for verifying the JWT token of the routes that must never answer an anonymous caller, without blocking the event loop
+    async def require_user_async(current_user: dict = Depends(verify_token_async)) -> UserResponseModel:
+        return TokenHelper.authenticated(current_user)
+    
+    # Method for rejecting with 401 the result of a token verification that found no user
+    def authenticated(current_user) -> dict:
+        if not isinstance(current_user, dict) or "_id" not in current_user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Unauthorized",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        return current_user
+    
+    # Method for reading the user of an already verified token from the cache
+    def get_cached_user(token: str) -> Optional[dict]:
+        entry = token_cache.get(token, is_valid=lambda entry: entry[0] == _user_generations.get(entry[1]["_id"], 0))
+        if entry is None:
+            return None
+        return dict(entry[1])
+    
+    # Method for caching the user of a verified token, never beyond the token expiry
+    def cache_user(token: str, payload: dict, user: dict, generation: int) -> None:
+        ttl = payload["exp"] - time.time() if "exp" in payload else None
+        token_cache.set(token, (generation, dict(user)), ttl)
+    
+    # Method for dropping every cached token of a user, to be called when the user changes or is removed
+    def invalidate_user(user_id: str) -> None:
+        with _generations_lock:
+            _user_generations[str(user_id)] = _user_generations.get(str(user_id), 0) + 1
+    
+    # Method for reducing the authenticated user passed around by the routes to a stable key
+    def user_key(current_user) -> str:
+        if isinstance(current_user, dict):
+            return str(current_user.get("_id"))
+        return str(current_user)
+    
+    # Method for reading the user id a token was issued for from its signed payload, without looking the user up
+    def token_identity(token: str) -> Optional[str]:
+        identity = identity_cache.get(token)
+        if identity is not None:
+            return identity
+        try:
+            identity = jwt.decode(token, JWT_SECRET, algorithms=[ALGORITHM]).get("id")
+        except JWTError:
+            return None
+        if identity is None:
+            return None
+        identity_cache.set(token, str(identity))
+        return str(identity)
+    
+    # Method for reporting the hit/miss counters of the token cache
+    def cache_stats() -> dict:
+        return token_cache.stats()
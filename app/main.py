@@ -1,10 +1,24 @@
 # main.py
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 import uvicorn
 from app.routes.user_routes import user
 from app.routes.candidate_routes import candidate
+from app.routes.async_user_routes import async_user
+from app.routes.async_candidate_routes import async_candidate
+from app.routes.admin_routes import admin
+from app.routes.health_routes import health
+from app.routes.metrics_routes import metrics
+from app.config.db_config import MongoDB, database_mode
+from app.helper.index_helper import IndexHelper
 from app.helper.logger_helper import setup_logger
+from app.helper.metrics_helper import METRICS_ENABLED, MetricsHelper
+from app.helper.admission_helper import ADMISSION_ENABLED
+from app.middleware.admission_middleware import AdmissionMiddleware
+from app.middleware.compression_middleware import CompressionMiddleware
+from app.middleware.metrics_middleware import MetricsMiddleware
 import os
 import logging
 from dotenv import load_dotenv
@@ -16,22 +30,50 @@ load_dotenv(dotenv_path)
 
 setup_logger()
 
+# Connect and warm the MongoDB connection pools before serving traffic, close them on shutdown
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await run_in_threadpool(MongoDB.connect)
+    if database_mode == "async":
+        await MongoDB.connect_async()
+    # Build the declared candidate indexes without delaying startup
+    IndexHelper.ensure_indexes_in_background()
+    # Sample the event loop and threadpool lag for /metrics
+    lag_probe = MetricsHelper.start_lag_probe()
+    yield
+    if lag_probe is not None:
+        lag_probe.cancel()
+    MongoDB.close()
+
 # Create the FastAPI application instance
 app = FastAPI(
     title="FastAPI",
     version="0.0.1",
+    lifespan=lifespan,
 )
-    
-# Health check route
-@app.get("/health", status_code=200)
-def health_check():
-    """
-    Health check endpoint to verify that the server is running.
-    """
-    return {"status": "healthy"}
-
-# Include routers for user and candidate endpoints
-app.include_router(user)  # Register the user router for user-related routes
-app.include_router(candidate)  # Register the candidate router for candidate-related routes
+
+# Compress list and report bodies with the coding negotiated through Accept-Encoding
+app.add_middleware(CompressionMiddleware)
+
+# Shed load and apply the per-user rate limits and per-route concurrency limits before compressing or routing
+if ADMISSION_ENABLED:
+    app.add_middleware(AdmissionMiddleware)
+
+# Record per-route latency, status and in-flight requests, outermost so compression time is included
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+app.include_router(health)  # Register the health router for liveness and readiness checks
+if METRICS_ENABLED:
+    app.include_router(metrics)  # Register the metrics router for Prometheus scrapes
+
+# Include routers for user and candidate endpoints, on the storage path selected by DATABASE_MODE
+if database_mode == "async":
+    app.include_router(async_user)  # Register the async user router for user-related routes
+    app.include_router(async_candidate)  # Register the async candidate router for candidate-related routes
+else:
+    app.include_router(user)  # Register the user router for user-related routes
+    app.include_router(candidate)  # Register the candidate router for candidate-related routes
+app.include_router(admin)  # Register the admin router for operational endpoints
 
 
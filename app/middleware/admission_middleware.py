@@ -0,0 +1,66 @@
+# Importing libraries
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.helper.admission_helper import (
+    ADMISSION_REJECTIONS, ADMISSION_RETRY_AFTER, EXEMPT_ROUTES, AdmissionControl,
+)
+from app.helper.token_helper import TokenHelper
+from app.middleware.metrics_middleware import MetricsMiddleware, UNMATCHED_ROUTE
+
+# AdmissionMiddleware class, sheds load when the process is overloaded, then applies the per-user rate limits
+# and the per-route concurrency limits before a request reaches its route
+class AdmissionMiddleware:
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    # Method for keying a request to its user, from the bearer token, or to its client address when anonymous
+    @staticmethod
+    def identity(scope: Scope) -> str:
+        authorization = Headers(scope=scope).get("authorization", "")
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() == "bearer" and token:
+            user_id = TokenHelper.token_identity(token.strip())
+            if user_id is not None:
+                return f"user:{user_id}"
+        client = scope.get("client")
+        return f"ip:{client[0] if client else 'unknown'}"
+
+    # Method for answering a rejected request without running its route
+    @staticmethod
+    async def reject(scope: Scope, receive: Receive, send: Send, status_code: int, reason: str, retry_after: str) -> None:
+        ADMISSION_REJECTIONS.inc(reason)
+        detail = "Too Many Requests" if status_code == 429 else "Service Unavailable"
+        response = JSONResponse({"detail": detail, "reason": reason}, status_code=status_code, headers={"Retry-After": retry_after})
+        await response(scope, receive, send)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        route = scope.get("route_template") or MetricsMiddleware.route_template(scope)
+        if route in EXEMPT_ROUTES or route == UNMATCHED_ROUTE:
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        expensive = AdmissionControl.is_expensive(method, route, scope.get("query_string", b""))
+
+        # Shed first, so requests turned away under overload do not spend the tokens of their user
+        reason = AdmissionControl.overload(expensive)
+        if reason is not None:
+            await self.reject(scope, receive, send, 503, reason, str(ADMISSION_RETRY_AFTER))
+            return
+        limited = AdmissionControl.rate_limit(self.identity(scope), expensive)
+        if limited is not None:
+            reason, wait = limited
+            await self.reject(scope, receive, send, 429, reason, AdmissionControl.retry_after(wait))
+            return
+        slots = AdmissionControl.slots(method, route, expensive)
+        if not AdmissionControl.concurrency.acquire(slots):
+            await self.reject(scope, receive, send, 503, "concurrency_limit", str(ADMISSION_RETRY_AFTER))
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            AdmissionControl.concurrency.release(slots)
@@ -0,0 +1,100 @@
+# Importing libraries
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Optional
+from app.helper import compression_helper
+from app.helper.compression_helper import CompressionHelper
+
+# CompressionMiddleware class, compresses response bodies chunk by chunk with the coding negotiated with the client
+class CompressionMiddleware:
+
+    def __init__(self, app: ASGIApp, minimum_size: Optional[int] = None):
+        self.app = app
+        # None follows COMPRESSION_MINIMUM_SIZE, read per request so it can be changed at runtime
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        coding = CompressionHelper.choose_encoding(Headers(scope=scope).get("accept-encoding"))
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+        minimum_size = compression_helper.COMPRESSION_MINIMUM_SIZE if self.minimum_size is None else self.minimum_size
+        await _CompressionResponder(scope, send, coding, minimum_size).run(self.app, receive)
+
+# Compresses one response, the body is only buffered until it reaches the minimum size
+class _CompressionResponder:
+
+    def __init__(self, scope: Scope, send: Send, coding: str, minimum_size: int):
+        self.scope = scope
+        self.send = send
+        self.coding = coding
+        self.minimum_size = minimum_size
+        self.start_message: Message = None
+        self.pending = []
+        self.pending_size = 0
+        self.encoder = None
+        self.passthrough = False
+
+    async def run(self, app: ASGIApp, receive: Receive) -> None:
+        await app(self.scope, receive, self.send_compressed)
+
+    # Method for deciding, once the response starts, whether it can be compressed at all
+    def eligible(self, message: Message) -> bool:
+        headers = Headers(raw=message["headers"])
+        # The router stored the matched endpoint in the scope before the response started
+        endpoint = self.scope.get("endpoint")
+        return (
+            message["status"] not in (204, 206, 304)
+            and "content-encoding" not in headers
+            and "content-range" not in headers
+            and CompressionHelper.compressible(headers.get("content-type", ""))
+            and not getattr(endpoint, "skip_compression", False)
+        )
+
+    async def send_compressed(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            self.passthrough = not self.eligible(message)
+            if self.passthrough:
+                await self.send(message)
+            return
+        if self.passthrough or message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        body, more_body = message.get("body", b""), message.get("more_body", False)
+        if self.encoder is not None:
+            data = self.encoder.compress(body) if body else b""
+            if not more_body:
+                data += self.encoder.finish()
+            if data or not more_body:
+                await self.send({"type": "http.response.body", "body": data, "more_body": more_body})
+            return
+
+        # Hold the first chunks until the body is known to reach the minimum size
+        self.pending.append(body)
+        self.pending_size += len(body)
+        if more_body and self.pending_size < self.minimum_size:
+            return
+        buffered = b"".join(self.pending)
+        self.pending = []
+        if self.pending_size < self.minimum_size:
+            await self.send(self.start_message)
+            await self.send({"type": "http.response.body", "body": buffered, "more_body": False})
+            return
+
+        self.encoder = CompressionHelper.encoder(self.coding)
+        headers = MutableHeaders(raw=self.start_message["headers"])
+        headers["Content-Encoding"] = self.coding
+        headers.add_vary_header("Accept-Encoding")
+        data = self.encoder.compress(buffered)
+        if more_body:
+            del headers["Content-Length"]
+        else:
+            data += self.encoder.finish()
+            headers["Content-Length"] = str(len(data))
+        await self.send(self.start_message)
+        await self.send({"type": "http.response.body", "body": data, "more_body": more_body})
@@ -0,0 +1,51 @@
+# Importing libraries
+import time
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.helper.metrics_helper import HTTP_REQUEST_DURATION, HTTP_REQUESTS, HTTP_REQUESTS_IN_FLIGHT
+
+# Label of the requests no route matches, so unknown paths never grow the label set
+UNMATCHED_ROUTE = "unmatched"
+
+# MetricsMiddleware class, records the latency, status and concurrency of every HTTP request per route template
+class MetricsMiddleware:
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    # Method for resolving the route template of a request, "/candidate/{candidate_id}" rather than the raw path
+    @staticmethod
+    def route_template(scope: Scope) -> str:
+        partial = None
+        for route in scope["app"].router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route.path
+            if match == Match.PARTIAL and partial is None:
+                partial = route.path
+        return partial or UNMATCHED_ROUTE
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        route = self.route_template(scope)
+        # Kept on the scope so the inner middlewares do not match the routes again
+        scope["route_template"] = route
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc(method, route)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - started, method, route)
+            HTTP_REQUESTS.inc(method, route, status)
+            HTTP_REQUESTS_IN_FLIGHT.dec(method, route)
@@ -1,5 +1,5 @@
 # Importing necessary libraries
-from pydantic import BaseModel, EmailStr  # Pydantic BaseModel for data validation, EmailStr for email validation
+from pydantic import BaseModel, EmailStr, model_validator  # Pydantic BaseModel for data validation, EmailStr for email validation, model_validator for cross-field checks
 from typing import List, Literal  # List for typing lists of values, Literal for defining allowed values
 from uuid import uuid4  # UUID generation for unique identification
 from typing import Optional  # Optional to allow some fields to be optional
@@ -20,3 +20,27 @@ class Candidate(BaseModel):
     salary: float
     gender: Literal['Male', 'Female', 'NotSpecified']
     user_id: Optional[str] = None
+
+# Define the CandidateUpdate class, a partial Candidate for PATCH where only the sent fields are written
+class CandidateUpdate(BaseModel):
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    email: Optional[EmailStr] = None
+    uuid: Optional[str] = None
+    career_level: Optional[str] = None
+    job_major: Optional[str] = None
+    years_of_experience: Optional[int] = None
+    degree_type: Optional[str] = None
+    skills: Optional[List[str]] = None
+    nationality: Optional[str] = None
+    city: Optional[str] = None
+    salary: Optional[float] = None
+    gender: Optional[Literal['Male', 'Female', 'NotSpecified']] = None
+
+    # Fields are optional to leave out, but a sent field cannot be null
+    @model_validator(mode="after")
+    def check_no_null_fields(self) -> "CandidateUpdate":
+        null_fields = [field for field in self.model_fields_set if getattr(self, field) is None]
+        if null_fields:
+            raise ValueError(f"Fields cannot be null: {', '.join(sorted(null_fields))}")
+        return self
@@ -0,0 +1,22 @@
+# Importing necessary libraries
+from pydantic import BaseModel, Field  # Pydantic BaseModel for data validation, Field for bounded values
+from typing import List, Optional  # List for typing lists of values, Optional for criteria that can be left out
+
+# Define the MatchWeights class, the weight of each criterion in the match score
+class MatchWeights(BaseModel):
+    required_skills: float = Field(0.4, ge=0)
+    nice_to_have_skills: float = Field(0.2, ge=0)
+    experience: float = Field(0.2, ge=0)
+    salary: float = Field(0.1, ge=0)
+    city: float = Field(0.1, ge=0)
+
+# Define the JobProfile class, the requirements candidates are scored against, a criterion left empty is not scored
+class JobProfile(BaseModel):
+    required_skills: List[str] = []
+    nice_to_have_skills: List[str] = []
+    min_years_of_experience: Optional[float] = Field(None, ge=0)
+    max_salary: Optional[float] = Field(None, gt=0)
+    preferred_cities: List[str] = []
+    # Leave out the candidates missing any required skill instead of lowering their score
+    require_all_required_skills: bool = False
+    weights: MatchWeights = MatchWeights()
@@ -0,0 +1,28 @@
+from app.config.db_config import get_async_user_collection
+from app.models.user import User
+from bson import ObjectId
+from pymongo.results import InsertOneResult
+from typing import List, Optional
+
+class AsyncUserRepository:
+    @staticmethod
+    async def create_user(user: User) -> dict:
+        user_data = user.__dict__  # Convert Pydantic model to dict
+        result: InsertOneResult = await get_async_user_collection().insert_one(user_data)
+        if result.acknowledged:
+            user_data["_id"] = str(result.inserted_id)  # Convert ObjectId to string
+            return user_data
+        raise Exception("User could not be created")
+    
+    @staticmethod
+    async def get_user(user_id: str) -> Optional[dict]:
+        user_data = await get_async_user_collection().find_one({"_id": ObjectId(user_id)})
+        if user_data:
+            user_data["_id"] = str(user_data["_id"])  # Convert ObjectId to string
+            return user_data
+        return None
+    
+    @staticmethod
+    async def get_user_ids_by_email(email: str) -> List[str]:
+        cursor = get_async_user_collection().find({"email": email}, {"_id": 1})
+        return [str(user_data["_id"]) async for user_data in cursor]
@@ -1,8 +1,17 @@
-from app.config.db_config import candidate_collection
+from app.config.db_config import get_candidate_collection, get_candidate_version_collection
 from app.models.candidate import Candidate
 from bson import ObjectId
-from pymongo.results import InsertOneResult, UpdateResult, DeleteResult
-from typing import Optional, List
+from datetime import datetime, timezone
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError
+from pymongo.results import InsertOneResult, InsertManyResult
+from app.helper.cursor_helper import CursorHelper
+from app.helper.cache_helper import count_cache
+from app.helper.index_helper import IndexAdvisor
+from app.helper.slow_query_helper import SlowQueryLog
+from app.helper.token_helper import TokenHelper
+from bson import json_util
+from typing import Any, Dict, Iterator, Optional, List, Tuple
 
 class CandidateRepository:
     @staticmethod
@@ -18,13 +27,38 @@ class CandidateRepository:
         Raises:
         - Exception if the candidate could not be created.
         """
-        candidate_data = candidate.__dict__
-        result: InsertOneResult = candidate_collection.insert_one(candidate_data)
+        candidate_data = dict(candidate.__dict__, version=1, updated_at=datetime.now(timezone.utc))
+        result: InsertOneResult = get_candidate_collection().insert_one(candidate_data)
         if result.acknowledged:
+            CandidateRepository.bump_list_version(candidate.user_id)
             candidate_data["_id"] = str(result.inserted_id)
             return candidate_data
         raise Exception("Candidate could not be created")
 
+    @staticmethod
+    def insert_candidates(candidates: List[dict]) -> Tuple[int, List[Tuple[int, str]]]:
+        """
+        Insert a chunk of candidates with one unordered insert_many.
+        
+        - **candidates**: Validated candidate documents
+        
+        Returns:
+        - The number of inserted candidates, and (index in the chunk, error message)
+          for every candidate that could not be written.
+        """
+        now = datetime.now(timezone.utc)
+        for candidate in candidates:
+            candidate.update(version=1, updated_at=now)
+        try:
+            result: InsertManyResult = get_candidate_collection().insert_many(candidates, ordered=False)
+            inserted, failures = len(result.inserted_ids), []
+        except BulkWriteError as e:
+            failures = [(error["index"], error["errmsg"]) for error in e.details.get("writeErrors", [])]
+            inserted = e.details.get("nInserted", 0)
+        if inserted and candidates:
+            CandidateRepository.bump_list_version(candidates[0]["user_id"])
+        return inserted, failures
+
     @staticmethod
     def get_candidate(candidate_id: str, user_id: str) -> Optional[dict]:
         """
@@ -36,85 +70,268 @@ class CandidateRepository:
         Returns:
         - The candidate data if found, otherwise None.
         """
-        candidate_data = candidate_collection.find_one({"_id": ObjectId(candidate_id), "user_id": user_id})
+        candidate_data = get_candidate_collection().find_one({"_id": ObjectId(candidate_id), "user_id": user_id})
         if candidate_data:
             candidate_data["_id"] = str(candidate_data["_id"])
             return candidate_data
         return None
 
     @staticmethod
-    def edit_candidate(candidate_id: str, updated_candidate: Candidate, user_id: str) -> dict:
+    def get_candidates_by_ids(candidate_ids: List[str], user_id: str) -> Dict[str, dict]:
         """
-        Update an existing candidate's information.
+        Retrieve several candidates of a user by their IDs in one query.
+        
+        - **candidate_ids**: IDs of the candidates to retrieve
+        - **user_id**: ID of the user associated with the candidates
+        
+        Returns:
+        - The candidates found, keyed by their ID.
+        """
+        candidates = {}
+        for candidate_data in get_candidate_collection().find({"_id": {"$in": [ObjectId(candidate_id) for candidate_id in candidate_ids]}, "user_id": user_id}):
+            candidate_data["_id"] = str(candidate_data["_id"])
+            candidates[candidate_data["_id"]] = candidate_data
+        return candidates
+
+    @staticmethod
+    def update_candidate(candidate_id: str, changes: dict, user_id: str, expected_version: Optional[int] = None) -> Optional[Tuple[dict, dict]]:
+        """
+        Write the changed fields of a candidate in a single atomic round trip.
+        
+        The update only matches when a field actually changes, so an unchanged candidate
+        keeps its version and is read back instead.
         
         - **candidate_id**: ID of the candidate to update
-        - **updated_candidate**: New candidate data (validated with Candidate model)
+        - **changes**: Fields to set, field name -> new value
         - **user_id**: ID of the user making the update
+        - **expected_version**: Only update the candidate if it is still at this version (If-Match)
         
         Returns:
-        - A dictionary containing the updated candidate data.
-        
-        Raises:
-        - Exception if the candidate is not found or the update fails.
+        - A tuple of the candidate data before and after the update, the same data twice when
+          nothing changed, or None if the candidate is not found at the expected version.
         """
-        result: UpdateResult = candidate_collection.update_one(
-            {"_id": ObjectId(candidate_id), "user_id": user_id},
-            {"$set": updated_candidate.dict(exclude_unset=True)}
-        )
-        if result.matched_count == 0:
-            raise Exception("Candidate not found")
-        if result.modified_count == 0:
-            raise Exception("Candidate update failed")
-        updated_candidate_data = candidate_collection.find_one({"_id": ObjectId(candidate_id)})
-        updated_candidate_data["_id"] = str(updated_candidate_data["_id"])
-        return updated_candidate_data
+        query = {"_id": ObjectId(candidate_id), "user_id": user_id}
+        query.update(CandidateRepository.version_filter(expected_version))
+        previous_candidate_data = None
+        if changes:
+            now = datetime.now(timezone.utc)
+            previous_candidate_data = get_candidate_collection().find_one_and_update(
+                {**query, "$or": [{field: {"$ne": value}} for field, value in changes.items()]},
+                {"$set": {**changes, "updated_at": now}, "$inc": {"version": 1}},
+                return_document=ReturnDocument.BEFORE
+            )
+        if previous_candidate_data is None:
+            candidate_data = get_candidate_collection().find_one(query)
+            if candidate_data is None:
+                return None
+            candidate_data["_id"] = str(candidate_data["_id"])
+            return candidate_data, candidate_data
+        CandidateRepository.bump_list_version(user_id)
+        previous_candidate_data["_id"] = str(previous_candidate_data["_id"])
+        # The update is atomic, so the stored document is the previous one with the changes applied
+        return previous_candidate_data, {
+            **previous_candidate_data,
+            **changes,
+            "version": previous_candidate_data.get("version", 0) + 1,
+            "updated_at": now
+        }
 
     @staticmethod
-    def delete_candidate(candidate_id: str, user_id: str) -> dict:
+    def delete_candidate(candidate_id: str, user_id: str, expected_version: Optional[int] = None) -> Optional[dict]:
         """
         Delete a candidate by their ID and associated user ID.
         
         - **candidate_id**: ID of the candidate to delete
         - **user_id**: ID of the user associated with the candidate
+        - **expected_version**: Only delete the candidate if it is still at this version (If-Match)
+        
+        Returns:
+        - The deleted candidate data, or None if the candidate is not found at the expected version.
+        """
+        query = {"_id": ObjectId(candidate_id), "user_id": user_id}
+        query.update(CandidateRepository.version_filter(expected_version))
+        deleted_candidate_data = get_candidate_collection().find_one_and_delete(query)
+        if deleted_candidate_data is None:
+            return None
+        CandidateRepository.bump_list_version(user_id)
+        deleted_candidate_data["_id"] = str(deleted_candidate_data["_id"])
+        return deleted_candidate_data
+
+    @staticmethod
+    def version_filter(expected_version: Optional[int]) -> dict:
+        """
+        Build the filter matching a candidate at the expected version.
+        
+        - **expected_version**: Version the candidate must have, None to match any version
         
         Returns:
-        - A dictionary indicating the success of the deletion operation.
+        - The filter criteria, candidates written before versioning count as version 0.
+        """
+        if expected_version is None:
+            return {}
+        if expected_version == 0:
+            return {"version": {"$in": [None, 0]}}
+        return {"version": expected_version}
+
+    @staticmethod
+    def bump_list_version(user_id: str) -> None:
+        """
+        Increment the version of a user's candidate list after a write.
         
-        Raises:
-        - Exception if the candidate is not found.
+        - **user_id**: ID of the user whose candidates changed
         """
-        result: DeleteResult = candidate_collection.delete_one({"_id": ObjectId(candidate_id), "user_id": user_id})
-        if result.deleted_count == 0:
-            raise Exception("Candidate not found")
-        return {"status": "success", "message": "Candidate deleted"}
+        get_candidate_version_collection().update_one({"_id": TokenHelper.user_key(user_id)}, {"$inc": {"version": 1}}, upsert=True)
 
     @staticmethod
-    def get_all_candidates(user_id: str, filters: dict) -> List[dict]:
+    def get_list_version(user_id: str) -> int:
         """
-        Retrieve all candidates for a specific user with optional filters.
+        Read the version of a user's candidate list, a single _id lookup.
+        
+        - **user_id**: ID of the user whose candidate list is read
+        
+        Returns:
+        - The number of candidate writes of the user, 0 if none was recorded.
+        """
+        version_data = get_candidate_version_collection().find_one({"_id": TokenHelper.user_key(user_id)})
+        return version_data["version"] if version_data else 0
+
+    @staticmethod
+    def get_collection_version() -> int:
+        """
+        Read the version of the whole candidate collection, the sum of the per-user list versions.
+        
+        Every candidate write bumps one list version, so the sum changes with any write
+        without all writers contending on a single counter document.
+        
+        Returns:
+        - The number of candidate writes recorded, 0 if none was recorded.
+        """
+        pipeline = [{"$group": {"_id": None, "version": {"$sum": "$version"}}}]
+        results = list(get_candidate_version_collection().aggregate(pipeline))
+        return results[0]["version"] if results else 0
+
+    @staticmethod
+    def estimate_candidate_count() -> int:
+        """
+        Estimate the number of candidates from the collection metadata, without scanning it.
+        
+        Returns:
+        - The approximate number of candidates.
+        """
+        return get_candidate_collection().estimated_document_count()
+
+    @staticmethod
+    def get_all_candidates(
+        user_id: str,
+        filters: dict,
+        limit: int = 0,
+        sort_field: str = "_id",
+        sort_direction: int = 1,
+        after: Optional[Tuple[Any, ObjectId]] = None
+    ) -> List[dict]:
+        """
+        Retrieve one page of candidates for a specific user with optional filters.
         
         - **user_id**: ID of the user requesting the candidates
         - **filters**: Dictionary of filter criteria for querying candidates
+        - **limit**: Maximum number of candidates to return, 0 for no limit
+        - **sort_field**: Field to sort on, ties are broken by _id
+        - **sort_direction**: 1 for ascending, -1 for descending
+        - **after**: (sort value, _id) of the last candidate of the previous page
         
         Returns:
-        - A list of candidates matching the filters.
+        - A list of candidates matching the filters, their _id left as ObjectId for the response serializer.
         """
         query = {"user_id": user_id}
         query.update(filters)
-        candidates_cursor = candidate_collection.find(query)
-        candidates = list(candidates_cursor)
-        for candidate in candidates:
-            candidate["_id"] = str(candidate["_id"])
+        sort = CursorHelper.sort_spec(sort_field, sort_direction)
+        IndexAdvisor.record(query, sort)
+        if after is not None:
+            query.update(CursorHelper.seek_filter(sort_field, sort_direction, *after))
+        with SlowQueryLog.timed("find", SlowQueryLog.find_command(query, sort, limit)) as timer:
+            candidates = list(get_candidate_collection().find(query).sort(sort).limit(limit))
+            timer.returned = len(candidates)
         return candidates
 
     @staticmethod
-    def fetch_all_candidates() -> List[dict]:
+    def count_candidates(user_id: str, filters: dict, version: int = 0) -> int:
         """
-        Retrieve all candidates from the database.
+        Count the candidates of a user matching the filters.
+        
+        Counts are cached for CANDIDATE_COUNT_CACHE_TTL seconds, so repeated pages of the
+        same listing do not recount the whole result set.
+        
+        - **user_id**: ID of the user requesting the candidates
+        - **filters**: Dictionary of filter criteria for querying candidates
+        - **version**: Version of the user's candidates, a write starts a new count
         
         Returns:
-        - A list of all candidates.
+        - The number of matching candidates.
         """
-        candidates_cursor = candidate_collection.find()
-        candidates = list(candidates_cursor)
-        return candidates
+        query = {"user_id": user_id}
+        query.update(filters)
+        key = (version, json_util.dumps(query, sort_keys=True))
+        cached = count_cache.get(key)
+        if cached is not None:
+            return cached
+        with SlowQueryLog.timed("count", SlowQueryLog.count_command(query)):
+            total = get_candidate_collection().count_documents(query)
+        count_cache.set(key, total)
+        return total
+
+    @staticmethod
+    def aggregate_facets(user_id: str, filters: dict, facets: dict) -> dict:
+        """
+        Compute facets over the candidates of a user matching the filters, in one $facet pass.
+        
+        - **user_id**: ID of the user requesting the facets
+        - **filters**: Dictionary of filter criteria for querying candidates
+        - **facets**: $facet specification, facet name -> sub-pipeline
+        
+        Returns:
+        - A dictionary holding the output of every facet.
+        """
+        query = {"user_id": user_id}
+        query.update(filters)
+        pipeline = [{"$match": query}, {"$facet": facets}]
+        with SlowQueryLog.timed("aggregate", SlowQueryLog.aggregate_command(pipeline)) as timer:
+            results = list(get_candidate_collection().aggregate(pipeline))
+            timer.returned = len(results)
+        return results[0] if results else {}
+
+    @staticmethod
+    def has_candidates() -> bool:
+        """
+        Check whether the database holds any candidate.
+        
+        Returns:
+        - True if at least one candidate exists.
+        """
+        return get_candidate_collection().find_one({}, {"_id": 1}) is not None
+
+    @staticmethod
+    def iter_all_candidates(projection: Optional[dict] = None, batch_size: int = 1000) -> Iterator[dict]:
+        """
+        Iterate over all candidates without loading them into memory.
+        
+        - **projection**: Fields to read for each candidate
+        - **batch_size**: Number of candidates fetched per round-trip
+        
+        Returns:
+        - A cursor yielding the candidates batch by batch.
+        """
+        return get_candidate_collection().find({}, projection).batch_size(batch_size)
+
+    @staticmethod
+    def iter_user_candidates(user_id: str, projection: Optional[dict] = None, batch_size: int = 1000) -> Iterator[dict]:
+        """
+        Iterate over the candidates of a user without loading them into memory.
+        
+        - **user_id**: ID of the user associated with the candidates
+        - **projection**: Fields to read for each candidate
+        - **batch_size**: Number of candidates fetched per round-trip
+        
+        Returns:
+        - A cursor yielding the candidates batch by batch.
+        """
+        return get_candidate_collection().find({"user_id": user_id}, projection).batch_size(batch_size)
@@ -0,0 +1,75 @@
+# Import necessary libraries and modules
+from fastapi import APIRouter, Depends, Query  # FastAPI components for routing and dependency injection
+from app.models.user import UserResponseModel  # Import UserResponseModel for response typing and authentication
+from app.helper.token_helper import TokenHelper  # Import TokenHelper for token verification
+from app.config.db_config import database_mode  # Import the storage path the users are read from
+from app.helper.index_helper import IndexHelper, IndexAdvisor  # Import the index registry checks and the query shape advisor
+from app.helper.result_cache_helper import ResultCache  # Import ResultCache for its hit ratio
+from app.helper.single_flight_helper import SingleFlight  # Import SingleFlight for the coalesced read counters
+from app.helper.slow_query_helper import SlowQueryLog  # Import SlowQueryLog for the recorded slow operations
+from app.helper.shortlist_helper import snapshot_cache  # Import the shortlist snapshot cache for its hit ratio
+
+# Create an APIRouter instance for routing administration endpoints
+admin = APIRouter(prefix="/admin")
+
+# The admin reports span every user, anonymous callers are rejected with 401 on the storage path selected by DATABASE_MODE
+require_user = TokenHelper.require_user_async if database_mode == "async" else TokenHelper.require_user
+
+# Route to report the observed candidate filter shapes and the indexes serving them
+@admin.get("/index-advice")
+def index_advice(current_user: UserResponseModel = Depends(require_user)):
+    """
+    Report the filter shapes seen by /all-candidates since startup, with the query plan of each.
+    
+    - **current_user**: The currently authenticated user (validated with TokenHelper)
+    
+    Returns:
+    - The declared indexes missing from the database, and per shape whether it lacks a supporting index
+    
+    Raises:
+    - HTTPException with status code 401 if the token is missing or invalid.
+    """
+    return {
+        "missing_indexes": [index.document["name"] for index in IndexHelper.missing_indexes()],
+        "shapes": IndexAdvisor.report(),
+    }
+
+# Route to report the hit ratios of the in-process caches
+@admin.get("/cache-stats")
+def cache_stats(current_user: UserResponseModel = Depends(require_user)):
+    """
+    Report the size and hit ratio of the token cache, of the /all-candidates result cache and of
+    the shortlist snapshots, and how many candidate reads were saved by coalescing identical concurrent queries.
+    
+    - **current_user**: The currently authenticated user (validated with TokenHelper)
+    
+    Raises:
+    - HTTPException with status code 401 if the token is missing or invalid.
+    """
+    return {
+        "tokens": TokenHelper.cache_stats(),
+        "results": ResultCache.stats(),
+        "shortlist_snapshots": snapshot_cache.stats(),
+        "coalescing": SingleFlight.all_stats(),
+    }
+
+# Route to report the slow candidate operations and their captured query plans
+@admin.get("/slow-queries")
+def slow_queries(
+    recent: int = Query(50, ge=0, le=1000),  # Number of recent slow operations to return
+    current_user: UserResponseModel = Depends(require_user)
+):
+    """
+    Report the candidate operations slower than SLOW_QUERY_MS since startup.
+    
+    - **recent**: Number of most recent slow operations to return
+    - **current_user**: The currently authenticated user (validated with TokenHelper)
+    
+    Returns:
+    - The slow query shapes, slowest in total first, with their sampled plan and whether it scans the collection
+    - The most recent slow operations, newest first, with the exception of those that failed
+    
+    Raises:
+    - HTTPException with status code 401 if the token is missing or invalid.
+    """
+    return SlowQueryLog.report(recent)
@@ -0,0 +1,33 @@
+# Import necessary libraries and modules
+from fastapi import APIRouter, Depends  # FastAPI components for routing and dependency injection
+from app.models.user import User  # Import User model for request validation
+from app.service.async_user_service import AsyncUserService  # Import AsyncUserService to handle user-related operations
+
+# Create an APIRouter instance for routing user-related endpoints on the async storage path
+async_user = APIRouter()
+
+# Route to create a new user
+@async_user.post("/user")
+async def create_user(user: User):
+    """
+    Create a new user.
+    
+    - **user**: User data for creation (validated with User model)
+    
+    Returns:
+    - Response from AsyncUserService.create_user method
+    """
+    return await AsyncUserService.create_user(user)
+
+# Route to retrieve a user by their ID
+@async_user.get("/user/{user_id}")
+async def get_user(user_id: str):
+    """
+    Retrieve a user by their ID.
+    
+    - **user_id**: ID of the user to retrieve
+    
+    Returns:
+    - Response from AsyncUserService.get_user method
+    """
+    return await AsyncUserService.get_user(user_id)
@@ -0,0 +1,38 @@
+# Import necessary libraries and modules
+from fastapi import Query  # FastAPI component for query parameters
+from typing import Optional, List, Literal  # Type hints for optional, list, and literal types
+
+# Dependency collecting the candidate filter query parameters shared by the candidate analytics routes,
+# returned as keyword arguments for CandidateService.build_filters
+def candidate_filters(
+    first_name: Optional[str] = Query(None),  # Optional query parameter for filtering by first name
+    last_name: Optional[str] = Query(None),  # Optional query parameter for filtering by last name
+    email: Optional[str] = Query(None),  # Optional query parameter for filtering by email
+    career_level: Optional[str] = Query(None),  # Optional query parameter for filtering by career level
+    job_major: Optional[str] = Query(None),  # Optional query parameter for filtering by job major
+    years_of_experience: Optional[int] = Query(None),  # Optional query parameter for filtering by years of experience
+    degree_type: Optional[str] = Query(None),  # Optional query parameter for filtering by degree type
+    skills: Optional[List[str]] = Query(None),  # Optional query parameter for filtering by skills (list of skills)
+    nationality: Optional[str] = Query(None),  # Optional query parameter for filtering by nationality
+    city: Optional[str] = Query(None),  # Optional query parameter for filtering by city
+    salary_min: Optional[float] = Query(None),  # Optional query parameter for filtering by minimum salary
+    salary_max: Optional[float] = Query(None),  # Optional query parameter for filtering by maximum salary
+    gender: Optional[Literal['Male', 'Female', 'NotSpecified']] = Query(None),  # Optional query parameter for filtering by gender
+    search: Optional[str] = Query(None)  # Optional query parameter for a free-text search
+) -> dict:
+    return {
+        "first_name": first_name,
+        "last_name": last_name,
+        "email": email,
+        "career_level": career_level,
+        "job_major": job_major,
+        "years_of_experience": years_of_experience,
+        "degree_type": degree_type,
+        "skills": skills,
+        "nationality": nationality,
+        "city": city,
+        "salary_min": salary_min,
+        "salary_max": salary_max,
+        "gender": gender,
+        "search": search,
+    }
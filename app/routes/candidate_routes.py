@@ -1,11 +1,21 @@
 # Import necessary libraries and modules
-from fastapi import APIRouter, Depends, Query  # FastAPI components for creating routes, dependency injection, and query parameters
+from fastapi import APIRouter, Depends, Header, Query, Request, Response  # FastAPI components for creating routes, dependency injection, headers, query parameters, request bodies and response headers
 from app.models.user import User  # Import User model (though not used in the provided code)
-from app.models.candidate import Candidate  # Import Candidate model for request body validation
+from app.models.candidate import Candidate, CandidateUpdate  # Import Candidate models for request body validation
 from app.service.candidate_service import CandidateService  # Service class for candidate-related operations
 from typing import Optional, List, Literal  # Type hints for optional, list, and literal types
 from app.models.user import UserResponseModel  # Import UserResponseModel for response typing and authentication
 from app.helper.token_helper import TokenHelper  # Import TokenHelper for token verification
+from app.routes.candidate_filters import candidate_filters  # Shared candidate filter query parameters
+from app.helper.cursor_helper import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE  # Page size bounds for the candidate list
+from app.helper.import_helper import IMPORT_CHUNK_SIZE, MAX_IMPORT_CHUNK_SIZE  # Chunk size bounds for bulk imports
+from app.helper.autocomplete_helper import DEFAULT_SUGGESTIONS, MAX_SUGGESTIONS  # Suggestion count bounds for the autocomplete
+from app.helper.similarity_helper import DEFAULT_SIMILAR, MAX_SIMILAR  # Result count bounds for the similar candidates
+from app.helper.shortlist_helper import DEFAULT_SHORTLIST, MAX_SHORTLIST  # Result count bounds for the shortlist
+from app.models.job import JobProfile  # Import JobProfile for the shortlist request body
+from app.helper.serialization_helper import SerializationHelper, FastJSONResponse, NEGOTIATED_RESPONSES  # JSON / MessagePack response rendering
+from app.helper.etag_helper import ETagHelper  # ETag / Last-Modified validators and conditional requests
+from app.helper.compression_helper import CompressionHelper  # Per-route opt-out of response compression
 
 # Create an APIRouter instance for routing candidate-related endpoints
 candidate = APIRouter()
@@ -21,51 +31,275 @@ def create_candidate(candidate: Candidate, current_user: UserResponseModel = Dep
     """
     return CandidateService.create_candidate(candidate, current_user)
 
+# Route to import candidates in bulk from a streamed NDJSON or CSV body
+@candidate.post("/candidates/import")
+async def import_candidates(
+    request: Request,
+    chunk_size: int = Query(IMPORT_CHUNK_SIZE, ge=1, le=MAX_IMPORT_CHUNK_SIZE),  # Number of candidates written per insert_many
+    current_user: UserResponseModel = Depends(TokenHelper.verify_token)
+):
+    """
+    Import candidates in bulk.
+    
+    The request body is read as a stream: NDJSON (application/x-ndjson, one candidate per line)
+    or CSV (text/csv, with a header row of candidate field names and skills separated by ";").
+    
+    - **chunk_size**: Number of candidates written per insert_many
+    - **current_user**: The currently authenticated user (validated with TokenHelper)
+    """
+    return await CandidateService.import_candidates(request.stream(), request.headers.get("content-type"), current_user, chunk_size)
+
 # Route to retrieve a candidate by their ID
-@candidate.get("/candidate/{candidate_id}")
-def get_candidate(candidate_id: str, current_user: UserResponseModel = Depends(TokenHelper.verify_token)):
+@candidate.get("/candidate/{candidate_id}", response_class=FastJSONResponse, responses=NEGOTIATED_RESPONSES)
+def get_candidate(candidate_id: str, request: Request, current_user: UserResponseModel = Depends(TokenHelper.verify_token)):
     """
-    Retrieve a candidate by their ID.
+    Retrieve a candidate by their ID, or 304 Not Modified when If-None-Match holds its current ETag.
     
     - **candidate_id**: ID of the candidate to retrieve
     - **current_user**: The currently authenticated user (validated with TokenHelper)
     """
-    return CandidateService.get_candidate(candidate_id, current_user)
+    candidate_data = CandidateService.get_candidate(candidate_id, current_user)
+    headers = ETagHelper.document_headers(candidate_data)
+    if ETagHelper.none_match(request.headers.get("if-none-match"), headers["ETag"]):
+        return ETagHelper.not_modified(headers)
+    return SerializationHelper.response(request, candidate_data, headers=headers)
 
 # Route to delete a candidate by their ID
 @candidate.delete("/candidate/{candidate_id}")
-def delete_candidate(candidate_id: str, current_user: UserResponseModel = Depends(TokenHelper.verify_token)):
+def delete_candidate(
+    candidate_id: str,
+    current_user: UserResponseModel = Depends(TokenHelper.verify_token),
+    if_match: Optional[str] = Header(None)  # Only delete the candidate if it still has this ETag
+):
     """
     Delete a candidate by their ID.
     
     - **candidate_id**: ID of the candidate to delete
     - **current_user**: The currently authenticated user (validated with TokenHelper)
+    - **if_match**: ETag the candidate must still have, 412 otherwise
     """
-    return CandidateService.delete_candidate(candidate_id, current_user)
+    return CandidateService.delete_candidate(candidate_id, current_user, if_match)
 
 # Route to update (edit) a candidate's information
 @candidate.put("/candidate/{candidate_id}")
-def edit_candidate(candidate_id: str, updated_candidate: Candidate, current_user: UserResponseModel = Depends(TokenHelper.verify_token)):
+def edit_candidate(
+    candidate_id: str,
+    updated_candidate: Candidate,
+    response: Response,
+    current_user: UserResponseModel = Depends(TokenHelper.verify_token),
+    if_match: Optional[str] = Header(None)  # Only update the candidate if it still has this ETag
+):
     """
     Update an existing candidate's information.
     
     - **candidate_id**: ID of the candidate to update
     - **updated_candidate**: New candidate data (validated with Candidate model)
     - **current_user**: The currently authenticated user (validated with TokenHelper)
+    - **if_match**: ETag the candidate must still have, 412 otherwise
+    """
+    result = CandidateService.edit_candidate(candidate_id, updated_candidate, current_user, if_match)
+    response.headers.update(ETagHelper.document_headers(result["candidate"]))
+    return result
+
+# Route to partially update a candidate, only the sent fields are written
+@candidate.patch("/candidate/{candidate_id}")
+def patch_candidate(
+    candidate_id: str,
+    candidate_update: CandidateUpdate,
+    response: Response,
+    current_user: UserResponseModel = Depends(TokenHelper.verify_token),
+    if_match: Optional[str] = Header(None)  # Only update the candidate if it still has this ETag
+):
+    """
+    Partially update a candidate in a single round trip.
+    
+    - **candidate_id**: ID of the candidate to update
+    - **candidate_update**: Changed candidate fields (validated with CandidateUpdate model)
+    - **current_user**: The currently authenticated user (validated with TokenHelper)
+    - **if_match**: ETag the candidate must still have, 412 otherwise
     """
-    return CandidateService.edit_candidate(candidate_id, updated_candidate, current_user)
+    result = CandidateService.patch_candidate(candidate_id, candidate_update, current_user, if_match)
+    response.headers.update(ETagHelper.document_headers(result["candidate"]))
+    return result
 
 # Route to generate a report (e.g., of all candidates or specific data)
 @candidate.get("/generate-report")
-def generate_report():
+def generate_report(
+    report_format: Literal['csv', 'parquet', 'arrow'] = Query('csv', alias="format")  # Export format of the report
+):
     """
     Generate a report based on candidate data.
+    
+    - **format**: csv (default), parquet or arrow (Arrow IPC stream) for typed columnar exports
+    """
+    return CandidateService.generate_report(report_format)
+
+# Route to submit a report job, generated to local disk in the background
+@candidate.post("/reports", status_code=202)
+def submit_report(
+    response: Response,
+    report_format: Literal['csv', 'parquet', 'arrow'] = Query('csv', alias="format"),  # Export format of the report
+    current_user: UserResponseModel = Depends(TokenHelper.require_user)
+):
+    """
+    Submit a report of all candidates and return its job, to poll until it is finished.
+    
+    - **format**: csv (default), parquet or arrow (Arrow IPC stream) for typed columnar exports
+    - **current_user**: The currently authenticated user (validated with TokenHelper)
+    
+    Returns:
+    - 202 with the new or still running job, 200 with the finished report of the current candidate data.
+    
+    Raises:
+    - HTTPException with status code 401 if the token is missing or invalid.
+    """
+    job, _ = CandidateService.submit_report_job(report_format)
+    if job["status"] == "finished":
+        response.status_code = 200
+    response.headers["Location"] = f"/reports/{job['id']}"
+    return job
+
+# Route to poll the state and progress of a report job
+@candidate.get("/reports/{job_id}")
+def get_report(job_id: str, current_user: UserResponseModel = Depends(TokenHelper.require_user)):
+    """
+    Read the state and progress of a report job.
+    
+    - **job_id**: ID of the report job
+    - **current_user**: The currently authenticated user (validated with TokenHelper)
+    
+    Raises:
+    - HTTPException with status code 401 if the token is missing or invalid.
+    """
+    return CandidateService.get_report_job(job_id)
+
+# Route to download a finished report, resumable with HTTP Range
+@candidate.get("/reports/{job_id}/download")
+@CompressionHelper.no_compression
+def download_report(
+    job_id: str,
+    range_header: Optional[str] = Header(None, alias="Range"),  # Single "bytes=" range to resume from
+    if_range: Optional[str] = Header(None),  # ETag the range is valid for
+    current_user: UserResponseModel = Depends(TokenHelper.require_user)
+):
+    """
+    Download a finished report. A Range request answers 206 (Partial Content) with that part of the file.
+    
+    - **job_id**: ID of the report job
+    - **current_user**: The currently authenticated user (validated with TokenHelper)
+    
+    Raises:
+    - HTTPException with status code 401 if the token is missing or invalid.
     """
-    return CandidateService.generate_report()
+    return CandidateService.download_report(job_id, range_header, if_range)
+
+# Route to compute filter sidebar facets over the candidates matching the filters
+@candidate.get("/candidates/facets", response_class=FastJSONResponse, responses=NEGOTIATED_RESPONSES)
+def get_candidate_facets(
+    request: Request,
+    current_user: UserResponseModel = Depends(TokenHelper.verify_token),
+    filter_params: dict = Depends(candidate_filters),  # Same filters as /all-candidates
+    top: int = Query(10, ge=1, le=100),  # Number of values returned by each count facet
+    buckets: int = Query(10, ge=1, le=100),  # Number of buckets of the salary and experience histograms
+    percentiles: bool = Query(False)  # Also compute salary and experience percentiles
+):
+    """
+    Compute candidate facets in one aggregation pass: career level, skill, city and nationality
+    counts, salary and years of experience histograms, and optionally percentiles.
+    
+    - **current_user**: The currently authenticated user (validated with TokenHelper)
+    - **filter_params**: The /all-candidates filters
+    - **top**: Number of values returned by each count facet
+    - **buckets**: Number of buckets of the histograms
+    - **percentiles**: Also compute salary and experience percentiles
+    """
+    facets = CandidateService.get_candidate_facets(current_user, filter_params, top, buckets, percentiles)
+    return SerializationHelper.response(request, facets)
+
+# Route to suggest skills, cities, job majors and career levels while typing
+@candidate.get("/candidates/autocomplete", response_class=FastJSONResponse, responses=NEGOTIATED_RESPONSES)
+@CompressionHelper.no_compression
+def autocomplete(
+    request: Request,
+    field: Literal["skills", "city", "job_major", "career_level"] = Query(...),  # Candidate field to complete
+    prefix: str = Query("", max_length=100),  # Typed start of the value, case-insensitive
+    limit: int = Query(DEFAULT_SUGGESTIONS, ge=1, le=MAX_SUGGESTIONS),  # Maximum number of suggestions
+    current_user: UserResponseModel = Depends(TokenHelper.verify_token)
+):
+    """
+    Suggest the most frequent values of a candidate field starting with the prefix,
+    served from an in-memory index of the user's candidates.
+    
+    - **field**: One of skills, city, job_major or career_level
+    - **prefix**: Typed start of the value
+    - **limit**: Maximum number of suggestions
+    - **current_user**: The currently authenticated user (validated with TokenHelper)
+    """
+    return SerializationHelper.response(request, CandidateService.autocomplete(current_user, field, prefix, limit))
+
+# Route to find the candidates most similar to one of them
+@candidate.get("/candidate/{candidate_id}/similar", response_class=FastJSONResponse, responses=NEGOTIATED_RESPONSES)
+def get_similar_candidates(
+    request: Request,
+    candidate_id: str,
+    limit: int = Query(DEFAULT_SIMILAR, ge=1, le=MAX_SIMILAR),  # Maximum number of similar candidates
+    metric: Literal["jaccard", "cosine"] = Query("jaccard"),  # Similarity of the skill, career level, job major and experience sets
+    current_user: UserResponseModel = Depends(TokenHelper.verify_token)
+):
+    """
+    Find the candidates sharing the most skills, career level, job major and experience range
+    with a candidate, best first, each with its score and the features it shares.
+    
+    - **candidate_id**: ID of the candidate to compare with
+    - **limit**: Maximum number of similar candidates
+    - **metric**: jaccard or cosine
+    - **current_user**: The currently authenticated user (validated with TokenHelper)
+    """
+    return SerializationHelper.response(request, CandidateService.get_similar_candidates(candidate_id, current_user, limit, metric))
+
+# Route to rank the candidates against a job profile
+@candidate.post("/candidates/shortlist", response_class=FastJSONResponse, responses=NEGOTIATED_RESPONSES)
+def get_shortlist(
+    request: Request,
+    profile: JobProfile,
+    limit: int = Query(DEFAULT_SHORTLIST, ge=1, le=MAX_SHORTLIST),  # Maximum number of shortlisted candidates
+    current_user: UserResponseModel = Depends(TokenHelper.verify_token)
+):
+    """
+    Score every candidate against required and nice-to-have skills, minimum years of experience,
+    salary budget and preferred cities, and return the best ones with their score per criterion.
+    
+    - **profile**: Job requirements and criterion weights (validated with JobProfile model)
+    - **limit**: Maximum number of shortlisted candidates
+    - **current_user**: The currently authenticated user (validated with TokenHelper)
+    """
+    return SerializationHelper.response(request, CandidateService.get_shortlist(profile, current_user, limit))
+
+# Route to stream the candidate creations, updates and deletions as server-sent events
+@candidate.get("/candidates/changes")
+@CompressionHelper.no_compression
+async def stream_changes(
+    last_event_id: Optional[str] = Header(None),  # Id of the last event received, sent by EventSource on reconnect
+    current_user: UserResponseModel = Depends(TokenHelper.require_user)
+):
+    """
+    Stream the changes of the user's candidates (created, updated with the changed fields, deleted)
+    as text/event-stream, instead of polling /all-candidates. Reconnecting with Last-Event-ID
+    replays the missed events, or sends a reset event when the list must be reloaded.
+    
+    - **last_event_id**: Id of the last event received
+    - **current_user**: The currently authenticated user (validated with TokenHelper), a stream is never opened for an anonymous caller
+    
+    Raises:
+    - HTTPException with status code 401 if the token is missing or invalid.
+    - HTTPException with status code 503 if the worker has no stream left.
+    """
+    return await CandidateService.stream_changes(current_user, last_event_id)
 
 # Route to retrieve all candidates with optional filtering
-@candidate.get("/all-candidates")
+@candidate.get("/all-candidates", response_class=FastJSONResponse, responses=NEGOTIATED_RESPONSES)
 def get_all_candidates(
+    request: Request,
     current_user: UserResponseModel = Depends(TokenHelper.verify_token),
     first_name: Optional[str] = Query(None),  # Optional query parameter for filtering by first name
     last_name: Optional[str] = Query(None),  # Optional query parameter for filtering by last name
@@ -80,7 +314,11 @@ def get_all_candidates(
     salary_min: Optional[float] = Query(None),  # Optional query parameter for filtering by minimum salary
     salary_max: Optional[float] = Query(None),  # Optional query parameter for filtering by maximum salary
     gender: Optional[Literal['Male', 'Female', 'NotSpecified']] = Query(None),  # Optional query parameter for filtering by gender
-    search: Optional[str] = Query(None)  # Optional query parameter for a free-text search
+    search: Optional[str] = Query(None),  # Optional query parameter for a free-text search
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),  # Maximum number of candidates per page
+    sort: str = Query("_id"),  # Sort field, prefixed with "-" for descending order
+    cursor: Optional[str] = Query(None),  # Opaque cursor from the X-Next-Cursor header of the previous page
+    include_total: bool = Query(False)  # Return the number of matching candidates in the X-Total-Count header
 ):
     """
     Retrieve a list of candidates with optional search.
@@ -100,8 +338,20 @@ def get_all_candidates(
     - **salary_max**: Filter by maximum salary
     - **gender**: Filter by candidate's gender
     - **search**: Perform a free-text search across various fields
+    - **limit**: Maximum number of candidates per page
+    - **sort**: Sort field (_id, first_name, last_name, years_of_experience, salary), prefixed with "-" for descending order
+    - **cursor**: Cursor of the next page, as returned in the X-Next-Cursor header
+    - **include_total**: Return the number of matching candidates in the X-Total-Count header
+    
+    Answers 304 Not Modified, without running the query, when If-None-Match holds the ETag
+    of the page and the user's candidates have not changed since.
     """
-    return CandidateService.get_all_candidates(
+    # The list version is read before the query, a concurrent write can only make the ETag older
+    version = CandidateService.get_list_version(current_user)
+    etag = ETagHelper.list_etag(TokenHelper.user_key(current_user), version, request.url.query)
+    if ETagHelper.none_match(request.headers.get("if-none-match"), etag):
+        return ETagHelper.not_modified({"ETag": etag})
+    page = CandidateService.get_all_candidates(
         current_user,
         first_name=first_name,
         last_name=last_name,
@@ -116,5 +366,16 @@ def get_all_candidates(
         salary_min=salary_min,
         salary_max=salary_max,
         gender=gender,
-        search=search
+        search=search,
+        limit=limit,
+        sort=sort,
+        cursor=cursor,
+        include_total=include_total,
+        version=version
     )
+    headers = {"ETag": etag}
+    if page["next_cursor"]:
+        headers["X-Next-Cursor"] = page["next_cursor"]
+    if page["total"] is not None:
+        headers["X-Total-Count"] = str(page["total"])
+    return SerializationHelper.response(request, page["candidates"], headers=headers)
@@ -0,0 +1,44 @@
+# Import necessary libraries and modules
+from fastapi import APIRouter  # FastAPI components for routing
+from fastapi.concurrency import run_in_threadpool  # Run the blocking pymongo ping outside the event loop
+from fastapi.responses import JSONResponse  # JSONResponse to answer readiness failures with a 503
+from app.config.db_config import MongoDB, database_mode, get_async_user_collection, get_database  # MongoDB clients and their pool gauges
+import logging  # Import logging for error logging
+import time  # Import time to measure the database round-trip
+from app.helper.compression_helper import CompressionHelper  # Health answers are tiny, never compress them
+
+# Create an APIRouter instance for routing health endpoints
+health = APIRouter()
+
+# Liveness route, answered without touching the database
+@health.get("/health", status_code=200)
+@health.get("/health/live", status_code=200)
+@CompressionHelper.no_compression
+def liveness_check():
+    """
+    Liveness endpoint to verify that the server is running.
+    """
+    return {"status": "healthy"}
+
+# Readiness route, checks the database round-trip and reports the connection pool
+@health.get("/health/ready", status_code=200)
+@CompressionHelper.no_compression
+async def readiness_check():
+    """
+    Readiness endpoint to verify that the server can reach the database.
+    
+    Returns:
+    - The database round-trip latency in milliseconds and the connection pool gauges.
+    - A 503 response if the database cannot be reached.
+    """
+    started = time.perf_counter()
+    try:
+        if database_mode == "async":
+            await get_async_user_collection().database.command('ping')
+        else:
+            await run_in_threadpool(get_database().command, 'ping')
+    except Exception as e:
+        logging.error(f"Readiness check failed: {e}")
+        return JSONResponse(status_code=503, content={"status": "unavailable", "pools": MongoDB.pool_stats()})
+    latency_ms = (time.perf_counter() - started) * 1000
+    return {"status": "ready", "database_latency_ms": round(latency_ms, 2), "pools": MongoDB.pool_stats()}
@@ -0,0 +1,66 @@
+# Import necessary libraries and modules
+from fastapi import APIRouter, Response  # FastAPI components for routing
+from anyio.to_thread import current_default_thread_limiter  # Threadpool running the sync routes and pymongo calls
+from app.config.db_config import MongoDB  # MongoDB clients and their pool gauges
+from app.helper.compression_helper import CompressionHelper  # Scrapes are frequent and small, never compress them
+from app.helper.metrics_helper import METRICS_CONTENT_TYPE, REGISTRY  # Process metrics registry
+from app.helper.result_cache_helper import ResultCache  # /all-candidates result cache
+from app.helper.token_helper import TokenHelper  # Verified token cache
+
+# Create an APIRouter instance for routing the metrics endpoint
+metrics = APIRouter()
+
+# Pool gauges of the open MongoDB clients, read when scraped
+@REGISTRY.collector
+def collect_pools():
+    pools = MongoDB.pool_stats()
+    gauges = [
+        ("mongo_pool_max_size", "Maximum number of pooled MongoDB connections.", "max_pool_size"),
+        ("mongo_pool_open_connections", "Open pooled MongoDB connections.", "open"),
+        ("mongo_pool_in_use_connections", "Pooled MongoDB connections checked out.", "in_use"),
+        ("mongo_pool_waiting_checkouts", "Operations waiting for a pooled MongoDB connection.", "waiting"),
+    ]
+    families = [
+        (name, "gauge", documentation, [("", (("client", client),), stats[key]) for client, stats in pools.items()])
+        for name, documentation, key in gauges
+    ]
+    families.append(("mongo_pool_checkout_failures", "counter", "Failed pooled MongoDB connection checkouts.",
+                     [("_total", (("client", client),), stats["checkout_failures"]) for client, stats in pools.items()]))
+    return families
+
+# Size and hit ratio of the token and result caches, read when scraped
+@REGISTRY.collector
+def collect_caches():
+    caches = {"tokens": TokenHelper.cache_stats(), "results": ResultCache.stats()}
+    return [
+        ("cache_hits", "counter", "Cache lookups answered from the cache.",
+         [("_total", (("cache", cache),), stats["hits"]) for cache, stats in caches.items()]),
+        ("cache_misses", "counter", "Cache lookups that missed.",
+         [("_total", (("cache", cache),), stats["misses"]) for cache, stats in caches.items()]),
+        ("cache_hit_ratio", "gauge", "Share of cache lookups answered from the cache.",
+         [("", (("cache", cache),), stats["hit_ratio"]) for cache, stats in caches.items()]),
+        ("cache_entries", "gauge", "Entries held by the cache.",
+         [("", (("cache", cache),), stats["size"]) for cache, stats in caches.items()]),
+    ]
+
+# Use of the threadpool the sync routes run in, read when scraped from the event loop
+@REGISTRY.collector
+def collect_threadpool():
+    limiter = current_default_thread_limiter()
+    return [
+        ("threadpool_threads_in_use", "gauge", "Worker threads of the threadpool currently busy.", [("", (), limiter.borrowed_tokens)]),
+        ("threadpool_threads_max", "gauge", "Size of the threadpool.", [("", (), limiter.total_tokens)]),
+        ("threadpool_tasks_waiting", "gauge", "Tasks waiting for a worker thread of the threadpool.", [("", (), limiter.statistics().tasks_waiting)]),
+    ]
+
+# Metrics route, in the Prometheus text exposition format
+@metrics.get("/metrics", response_class=Response)
+@CompressionHelper.no_compression
+async def get_metrics():
+    """
+    Expose the request, MongoDB, cache and runtime metrics of this process for Prometheus.
+
+    Returns:
+    - The metrics in the Prometheus text exposition format (version 0.0.4).
+    """
+    return Response(content=REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
@@ -0,0 +1,72 @@
+# Import necessary libraries and modules
+from app.repository.async_user_repository import AsyncUserRepository  # Import AsyncUserRepository for non-blocking database operations
+from app.models.user import User  # Import User model for type hinting and validation
+from fastapi import HTTPException, status  # Import FastAPI components for handling HTTP exceptions
+import logging  # Import logging for error logging
+from app.helper.token_helper import TokenHelper  # Import TokenHelper for JWT token operations
+
+class AsyncUserService:
+    @staticmethod
+    async def create_user(user: User) -> dict:
+        """
+        Create a new user and generate an access token.
+        
+        The cached tokens of the users already registered with the same email stop authenticating from the token cache.
+        
+        - **user**: User data for creation (validated with User model)
+        
+        Returns:
+        - A dictionary containing the status of the operation, an access token, and the created user data.
+        
+        Raises:
+        - HTTPException with status code 500 if an error occurs during user creation.
+        """
+        
+        try:
+            # Drop the cached tokens of the users already registered with this email, their identity is being claimed again
+            for user_id in await AsyncUserRepository.get_user_ids_by_email(user.email):
+                TokenHelper.invalidate_user(user_id)
+            
+            # Attempt to create a user in the database
+            user_data = await AsyncUserRepository.create_user(user)
+            
+            # Generate an access token for the created user
+            access_token = TokenHelper.create_access_token(
+                data={"id": str(user_data["_id"])}
+            )
+            
+            # Return a success response with the token and user data
+            return {
+                "status": "success",
+                "token": access_token,
+                "user": user_data,
+            }
+        except Exception as e:
+            # Log any errors that occur during user creation
+            logging.error(f"An error occurred while creating a user: {e}")
+            
+            # Raise an HTTPException with status code 500 for internal server errors
+            raise HTTPException(status_code=500, detail="Internal Server Error")
+    
+    @staticmethod
+    async def get_user(user_id: str) -> dict:
+        """
+        Retrieve a user by their ID.
+        
+        - **user_id**: ID of the user to retrieve
+        
+        Returns:
+        - User data if found.
+        
+        Raises:
+        - HTTPException with status code 404 if the user is not found.
+        """
+        # Attempt to retrieve the user from the database
+        user_data = await AsyncUserRepository.get_user(user_id)
+        
+        if user_data:
+            # Return the user data if found
+            return user_data
+        
+        # Raise an HTTPException with status code 404 if the user is not found
+        raise HTTPException(status_code=404, detail="User not found")
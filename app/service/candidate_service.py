@@ -1,12 +1,28 @@
 # Import necessary libraries and modules
 from app.repository.candidate_repository import CandidateRepository  # Import CandidateRepository for database operations
-from app.models.candidate import Candidate  # Import Candidate model for type hinting and validation
+from app.models.candidate import Candidate, CandidateUpdate  # Import Candidate models for type hinting and validation
 from fastapi import HTTPException  # Import FastAPI components for handling HTTP exceptions
+from fastapi.concurrency import run_in_threadpool  # Import run_in_threadpool to keep blocking writes off the event loop
 import logging  # Import logging for error logging
-import pandas as pd  # Import pandas for data manipulation and CSV generation
-import io  # Import io for handling in-memory file-like objects
+from app.helper.report_helper import ReportHelper, REPORT_BATCH_SIZE, REPORT_FORMATS  # Import ReportHelper for streaming report generation
 from fastapi.responses import StreamingResponse  # Import StreamingResponse for streaming file responses
-from typing import List, Optional  # Import type hints for optional and list types
+from typing import AsyncIterator, List, Optional, Tuple  # Import type hints for optional and list types
+from app.helper.import_helper import ImportHelper, IMPORT_CHUNK_SIZE  # Import ImportHelper for streamed bulk imports
+from app.helper.result_cache_helper import ResultCache  # Import ResultCache to cache candidate listings per user
+from app.helper.token_helper import TokenHelper  # Import TokenHelper to key per-user state
+from app.helper.cursor_helper import CursorHelper, DEFAULT_PAGE_SIZE  # Import CursorHelper for keyset pagination
+from app.helper.candidate_events_helper import CandidateEvents, CREATED, UPDATED, DELETED  # Import CandidateEvents to publish candidate writes
+from app.helper.autocomplete_helper import AutocompleteIndex  # Import AutocompleteIndex for prefix suggestions
+from app.helper.similarity_helper import SimilarityIndex  # Import SimilarityIndex for similar candidates
+from app.helper.single_flight_helper import candidate_reads, candidate_page_reads, shortlist_snapshots, similarity_builds  # Import the single-flight groups coalescing identical reads
+from app.helper.shortlist_helper import ShortlistHelper  # Import ShortlistHelper for the cached candidate snapshots of the shortlist
+from app.models.job import JobProfile  # Import JobProfile for the shortlist requirements
+from app.helper.change_feed_helper import ChangeFeed  # Import ChangeFeed to stream the candidate writes
+from app.helper.etag_helper import ETagHelper  # Import ETagHelper to read If-Match validators
+from app.helper.report_job_helper import ReportJobs, FINISHED  # Import ReportJobs for background report generation
+
+# Percentiles reported by the candidate facets, label -> rank
+PERCENTILES = {"p25": 0.25, "p50": 0.5, "p75": 0.75, "p90": 0.9, "p99": 0.99}
 
 class CandidateService:
     @staticmethod
@@ -26,11 +42,49 @@ class CandidateService:
         candidate.user_id = user_id
         try:
             candidate_data = CandidateRepository.create_candidate(candidate)
+            CandidateService.candidate_written(CREATED, user_id, after=candidate_data)
             return {"status": "success", "candidate": candidate_data}
         except Exception as e:
             logging.error(f"An error occurred while creating a candidate: {e}")
             raise HTTPException(status_code=500, detail="Internal Server Error")
     
+    @staticmethod
+    async def import_candidates(stream: AsyncIterator[bytes], content_type: Optional[str], user_id: str, chunk_size: int = IMPORT_CHUNK_SIZE) -> dict:
+        """
+        Import candidates from a streamed NDJSON or CSV upload and associate them with a user.
+        
+        Rows are validated against the Candidate model and written with unordered insert_many
+        in chunks of chunk_size, invalid rows are reported without aborting the import.        
+        Parsing and validation run on the event loop, the blocking inserts in the threadpool.
+        
+        - **stream**: Request body stream
+        - **content_type**: Content type of the upload (application/x-ndjson or text/csv)
+        - **user_id**: ID of the user importing the candidates
+        - **chunk_size**: Number of candidates written per insert_many
+        
+        Returns:
+        - A summary with the received, inserted and failed row counts and the per-row errors.
+        
+        Raises:
+        - HTTPException with status code 415 if the upload is neither NDJSON nor CSV.
+        - HTTPException with status code 500 if an error occurs during the import.
+        """
+        import_format = ImportHelper.import_format(content_type)
+        if import_format is None:
+            raise HTTPException(status_code=415, detail="Unsupported import format, send NDJSON or CSV")
+        rows = ImportHelper.ndjson_rows(stream) if import_format == "ndjson" else ImportHelper.csv_rows(stream)
+
+        async def insert_chunk(documents: List[dict]):
+            inserted, failures = await run_in_threadpool(CandidateRepository.insert_candidates, documents)
+            CandidateService.candidates_imported(user_id, documents, failures)
+            return inserted, failures
+
+        try:
+            return await ImportHelper.import_rows(rows, insert_chunk, user_id, chunk_size)
+        except Exception as e:
+            logging.error(f"An error occurred while importing candidates: {e}")
+            raise HTTPException(status_code=500, detail="Internal Server Error")
+
     @staticmethod
     def get_candidate(candidate_id: str, user_id: str) -> dict:
         """
@@ -45,56 +99,187 @@ class CandidateService:
         Raises:
         - HTTPException with status code 404 if the candidate is not found.
         """
-        candidate_data = CandidateRepository.get_candidate(candidate_id, user_id)
+        # Identical reads in flight share one query, a write detaches it so later reads never join one started before the write
+        key = (TokenHelper.user_key(user_id), candidate_id)
+        candidate_data = candidate_reads.do(key, lambda: CandidateRepository.get_candidate(candidate_id, user_id))
         if candidate_data:
             return candidate_data
         raise HTTPException(status_code=404, detail="Candidate not found")
 
     @staticmethod
-    def edit_candidate(candidate_id: str, updated_candidate: Candidate, user_id: str) -> dict:
+    def edit_candidate(candidate_id: str, updated_candidate: Candidate, user_id: str, if_match: Optional[str] = None) -> dict:
         """
         Update an existing candidate's information.
         
         - **candidate_id**: ID of the candidate to update
         - **updated_candidate**: New candidate data (validated with Candidate model)
         - **user_id**: ID of the user making the update
+        - **if_match**: ETag the candidate must still have, None to update any version
         
         Returns:
         - A dictionary containing the status of the operation and the updated candidate data.
         
         Raises:
+        - HTTPException with status code 404 if the candidate is not found.
+        - HTTPException with status code 412 if the candidate no longer matches if_match.
+        - HTTPException with status code 500 if an error occurs during candidate update.
+        """
+        return CandidateService.update_candidate(candidate_id, updated_candidate.dict(exclude_unset=True), user_id, if_match)
+
+    @staticmethod
+    def patch_candidate(candidate_id: str, candidate_update: CandidateUpdate, user_id: str, if_match: Optional[str] = None) -> dict:
+        """
+        Partially update a candidate, only the fields sent by the client are written.
+        
+        - **candidate_id**: ID of the candidate to update
+        - **candidate_update**: Changed candidate fields (validated with CandidateUpdate model)
+        - **user_id**: ID of the user making the update
+        - **if_match**: ETag the candidate must still have, None to update any version
+        
+        Returns:
+        - A dictionary containing the status of the operation and the updated candidate data.
+        
+        Raises:
+        - HTTPException with status code 404 if the candidate is not found.
+        - HTTPException with status code 412 if the candidate no longer matches if_match.
         - HTTPException with status code 500 if an error occurs during candidate update.
         """
+        return CandidateService.update_candidate(candidate_id, candidate_update.model_dump(exclude_unset=True), user_id, if_match)
+
+    @staticmethod
+    def update_candidate(candidate_id: str, changes: dict, user_id: str, if_match: Optional[str] = None) -> dict:
+        """
+        Write the changed fields of a candidate and return it as stored after the update.
+        
+        An update that leaves the candidate unchanged succeeds without invalidating anything.
+        
+        - **candidate_id**: ID of the candidate to update
+        - **changes**: Fields to set, field name -> new value
+        - **user_id**: ID of the user making the update
+        - **if_match**: ETag the candidate must still have, None to update any version
+        
+        Returns:
+        - A dictionary containing the status of the operation and the updated candidate data.
+        
+        Raises:
+        - HTTPException with status code 404 if the candidate is not found.
+        - HTTPException with status code 412 if the candidate no longer matches if_match.
+        - HTTPException with status code 500 if an error occurs during candidate update.
+        """
+        expected_version = CandidateService.expected_version(if_match)
         try:
-            updated_candidate_data = CandidateRepository.edit_candidate(candidate_id, updated_candidate, user_id)
-            return {"status": "success", "candidate": updated_candidate_data}
+            result = CandidateRepository.update_candidate(candidate_id, changes, user_id, expected_version)
         except Exception as e:
             logging.error(f"An error occurred while updating a candidate: {e}")
             raise HTTPException(status_code=500, detail="Internal Server Error")
+        if result is None:
+            CandidateService.raise_not_matched(candidate_id, user_id, expected_version)
+        previous_candidate_data, updated_candidate_data = result
+        if updated_candidate_data != previous_candidate_data:
+            CandidateService.candidate_written(UPDATED, user_id, previous_candidate_data, updated_candidate_data)
+        return {"status": "success", "candidate": updated_candidate_data}
 
     @staticmethod
-    def delete_candidate(candidate_id: str, user_id: str) -> dict:
+    def delete_candidate(candidate_id: str, user_id: str, if_match: Optional[str] = None) -> dict:
         """
         Delete a candidate by their ID.
         
         - **candidate_id**: ID of the candidate to delete
         - **user_id**: ID of the user requesting the deletion
+        - **if_match**: ETag the candidate must still have, None to delete any version
         
         Returns:
         - A dictionary indicating the success of the deletion operation.
         
         Raises:
+        - HTTPException with status code 404 if the candidate is not found.
+        - HTTPException with status code 412 if the candidate no longer matches if_match.
         - HTTPException with status code 500 if an error occurs during candidate deletion.
         """
+        expected_version = CandidateService.expected_version(if_match)
         try:
-            return CandidateRepository.delete_candidate(candidate_id, user_id)
+            deleted_candidate_data = CandidateRepository.delete_candidate(candidate_id, user_id, expected_version)
         except Exception as e:
             logging.error(f"An error occurred while deleting a candidate: {e}")
             raise HTTPException(status_code=500, detail="Internal Server Error")
+        if deleted_candidate_data is None:
+            CandidateService.raise_not_matched(candidate_id, user_id, expected_version)
+        CandidateService.candidate_written(DELETED, user_id, before=deleted_candidate_data)
+        return {"status": "success", "message": "Candidate deleted"}
 
     @staticmethod
-    def get_all_candidates(
-        user_id: str,
+    def raise_not_matched(candidate_id: str, user_id: str, expected_version: Optional[int]) -> None:
+        """
+        Raise the error of a conditional write that matched no candidate.
+        
+        Raises:
+        - HTTPException with status code 412 if the candidate exists at another version.
+        - HTTPException with status code 404 otherwise.
+        """
+        if expected_version is not None and CandidateRepository.get_candidate(candidate_id, user_id):
+            raise HTTPException(status_code=412, detail="Candidate was modified, fetch it again")
+        raise HTTPException(status_code=404, detail="Candidate not found")
+
+    @staticmethod
+    def get_list_version(user_id: str) -> int:
+        """
+        Read the version of the user's candidate list, bumped by every candidate write.
+        
+        - **user_id**: ID of the user whose candidate list is read
+        
+        Returns:
+        - The version of the list.
+        """
+        return CandidateRepository.get_list_version(user_id)
+
+    @staticmethod
+    def expected_version(if_match: Optional[str]) -> Optional[int]:
+        """
+        Read the candidate version required by an If-Match header.
+        
+        Returns:
+        - The version, or None when any version matches.
+        
+        Raises:
+        - HTTPException with status code 412 if the header is not a single candidate ETag.
+        """
+        try:
+            return ETagHelper.expected_version(if_match)
+        except ValueError as e:
+            raise HTTPException(status_code=412, detail=str(e))
+
+    @staticmethod
+    def candidate_written(event: str, user_id: str, before: Optional[dict] = None, after: Optional[dict] = None) -> None:
+        """
+        Detach the reads in flight of a candidate and publish one of its user's candidate writes.
+        
+        The cached results need no invalidation, the write bumped the list version they are keyed by.
+        
+        - **event**: "created", "updated" or "deleted"
+        - **user_id**: ID of the user who wrote the candidate
+        - **before**: Candidate data before the write, None for a creation
+        - **after**: Candidate data after the write, None for a deletion
+        """
+        user_key = TokenHelper.user_key(user_id)
+        candidate_reads.forget((user_key, str((after or before)["_id"])))
+        CandidateEvents.publish(event, user_key, before, after)
+
+    @staticmethod
+    def candidates_imported(user_id: str, documents: List[dict], failures: List[tuple]) -> None:
+        """
+        Publish the creations of one imported chunk, see candidate_written.
+        
+        - **user_id**: ID of the user importing the candidates
+        - **documents**: Candidate documents of the chunk, with the _id set by insert_many
+        - **failures**: (index in the chunk, message) of the documents that were not inserted
+        """
+        failed = {index for index, _ in failures}
+        for index, document in enumerate(documents):
+            if index not in failed:
+                CandidateService.candidate_written(CREATED, user_id, after=document)
+
+    @staticmethod
+    def build_filters(
         first_name: Optional[str] = None,
         last_name: Optional[str] = None,
         email: Optional[str] = None,
@@ -109,16 +294,12 @@ class CandidateService:
         salary_max: Optional[float] = None,
         gender: Optional[str] = None,
         search: Optional[str] = None
-    ) -> List[dict]:
+    ) -> dict:
         """
-        Retrieve all candidates with optional filters.
+        Build the MongoDB filter document for the candidate search parameters.
         
         Returns:
-        - A list of candidates matching the filters.
-        
-        Raises:
-        - HTTPException with status code 404 if no candidates are found.
-        - HTTPException with status code 500 if an error occurs during candidate retrieval.
+        - A dictionary of filter criteria, without the user scope.
         """
         filters = {}
         if first_name:
@@ -151,44 +332,470 @@ class CandidateService:
             filters["gender"] = gender
         if search:
             filters["$text"] = {"$search": search}
+        return filters
+
+    @staticmethod
+    def get_all_candidates(
+        user_id: str,
+        first_name: Optional[str] = None,
+        last_name: Optional[str] = None,
+        email: Optional[str] = None,
+        career_level: Optional[str] = None,
+        job_major: Optional[str] = None,
+        years_of_experience: Optional[int] = None,
+        degree_type: Optional[str] = None,
+        skills: Optional[List[str]] = None,
+        nationality: Optional[str] = None,
+        city: Optional[str] = None,
+        salary_min: Optional[float] = None,
+        salary_max: Optional[float] = None,
+        gender: Optional[str] = None,
+        search: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        sort: str = "_id",
+        cursor: Optional[str] = None,
+        include_total: bool = False,
+        version: Optional[int] = None
+    ) -> dict:
+        """
+        Retrieve one page of candidates with optional filters.
+        
+        Pages are read with keyset seeks on (sort field, _id), so every page costs
+        the same no matter how deep into the result set it is. Pages are cached per
+        user until the next candidate write of that user.
+        
+        - **limit**: Maximum number of candidates in the page
+        - **sort**: Field to sort on, prefixed with "-" for descending order
+        - **cursor**: Opaque cursor returned with the previous page
+        - **include_total**: Also return the (cached) number of matching candidates
+        - **version**: Version of the user's candidate list already read by the caller, read here when None
+        
+        Returns:
+        - A dictionary with the candidates of the page, the cursor of the next page
+          (None on the last page) and the total when requested.
+        
+        Raises:
+        - HTTPException with status code 400 if the sort or cursor is invalid.
+        - HTTPException with status code 404 if no candidates are found.
+        - HTTPException with status code 500 if an error occurs during candidate retrieval.
+        """
+        filters = CandidateService.build_filters(
+            first_name=first_name,
+            last_name=last_name,
+            email=email,
+            career_level=career_level,
+            job_major=job_major,
+            years_of_experience=years_of_experience,
+            degree_type=degree_type,
+            skills=skills,
+            nationality=nationality,
+            city=city,
+            salary_min=salary_min,
+            salary_max=salary_max,
+            gender=gender,
+            search=search
+        )
 
         try:
-            candidates = CandidateRepository.get_all_candidates(user_id, filters)
+            sort_field, sort_direction = CursorHelper.parse_sort(sort)
+            after = CursorHelper.decode_cursor(cursor, sort_field, sort_direction) if cursor else None
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        # Serve repeated listings from the cache, keyed by the list version read before the query runs,
+        # the version every worker bumps on a write and the ETag of the page is built from
+        user_key = TokenHelper.user_key(user_id)
+        if version is None:
+            version = CandidateRepository.get_list_version(user_id)
+        page_params = {"limit": limit, "sort": sort, "cursor": cursor, "include_total": include_total}
+        cached_page = ResultCache.get(user_key, version, filters, **page_params)
+        if cached_page is not None:
+            return cached_page
+
+        def load_page() -> dict:
+            # Read one extra candidate to know whether another page follows
+            candidates = CandidateRepository.get_all_candidates(user_id, filters, limit + 1, sort_field, sort_direction, after)
             if not candidates:
                 raise HTTPException(status_code=404, detail="No candidates found")
-            return candidates
+            next_cursor = None
+            if len(candidates) > limit:
+                candidates = candidates[:limit]
+                next_cursor = CursorHelper.encode_cursor(candidates[-1], sort_field, sort_direction)
+            total = CandidateRepository.count_candidates(user_id, filters, version) if include_total else None
+            page = {"candidates": candidates, "next_cursor": next_cursor, "total": total}
+            ResultCache.set(user_key, version, filters, page, **page_params)
+            return page
+
+        try:
+            # Identical listings in flight share one query, keyed like the result cache
+            flight_key = ResultCache.make_key(user_key, version, filters, **page_params)
+            return candidate_page_reads.do(flight_key, load_page)
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail="Internal Server Error")
 
     @staticmethod
-    def generate_report() -> StreamingResponse:
+    def facet_stages(top: int, buckets: int, percentiles: bool) -> dict:
         """
-        Generate a CSV report of all candidates.
+        Build the $facet specification of the candidate facets.
+        
+        - **top**: Number of values returned by each count facet
+        - **buckets**: Number of buckets of the salary and experience histograms
+        - **percentiles**: Also compute salary and experience percentiles (MongoDB 7.0+)
         
         Returns:
-        - A StreamingResponse containing the CSV file.
+        - The $facet specification, facet name -> sub-pipeline.
+        """
+        def counts(field: str, unwind: bool = False) -> list:
+            stages = [{"$unwind": f"${field}"}] if unwind else []
+            return stages + [
+                {"$group": {"_id": f"${field}", "count": {"$sum": 1}}},
+                {"$sort": {"count": -1, "_id": 1}},
+                {"$limit": top},
+                {"$project": {"_id": 0, "value": "$_id", "count": 1}},
+            ]
+
+        def histogram(field: str) -> list:
+            return [
+                {"$bucketAuto": {"groupBy": f"${field}", "buckets": buckets}},
+                {"$project": {"_id": 0, "min": "$_id.min", "max": "$_id.max", "count": 1}},
+            ]
+
+        facets = {
+            "total": [{"$count": "count"}],
+            "career_level": counts("career_level"),
+            "skills": counts("skills", unwind=True),
+            "city": counts("city"),
+            "nationality": counts("nationality"),
+            "salary": histogram("salary"),
+            "years_of_experience": histogram("years_of_experience"),
+        }
+        if percentiles:
+            facets["percentiles"] = [
+                {"$group": {
+                    "_id": None,
+                    **{
+                        field: {"$percentile": {"input": f"${field}", "p": list(PERCENTILES.values()), "method": "approximate"}}
+                        for field in ("salary", "years_of_experience")
+                    }
+                }},
+                {"$project": {"_id": 0}},
+            ]
+        return facets
+
+    @staticmethod
+    def format_facets(result: dict) -> dict:
+        """
+        Flatten the raw $facet output into the facets response.
+        """
+        facets = {name: value for name, value in result.items() if name not in ("total", "percentiles")}
+        facets["total"] = result["total"][0]["count"] if result.get("total") else 0
+        if "percentiles" in result:
+            values = result["percentiles"][0] if result["percentiles"] else {}
+            facets["percentiles"] = {
+                field: dict(zip(PERCENTILES, values.get(field) or [None] * len(PERCENTILES)))
+                for field in ("salary", "years_of_experience")
+            }
+        return facets
+
+    @staticmethod
+    def get_candidate_facets(user_id: str, filter_params: dict, top: int = 10, buckets: int = 10, percentiles: bool = False) -> dict:
+        """
+        Compute the filter sidebar facets of the candidates matching the filters.
+        
+        Counts of career levels, skills, cities and nationalities, salary and experience
+        histograms and optionally percentiles are computed in one aggregation pass, and
+        cached per user like the candidate listings.
+        
+        - **user_id**: ID of the user requesting the facets
+        - **filter_params**: Keyword arguments of build_filters
+        - **top**: Number of values returned by each count facet
+        - **buckets**: Number of buckets of the histograms
+        - **percentiles**: Also compute salary and experience percentiles
+        
+        Returns:
+        - A dictionary of facets.
+        
+        Raises:
+        - HTTPException with status code 500 if an error occurs during the aggregation.
+        """
+        filters = CandidateService.build_filters(**filter_params)
+        user_key = TokenHelper.user_key(user_id)
+        version = CandidateRepository.get_list_version(user_id)
+        facet_params = {"view": "facets", "top": top, "buckets": buckets, "percentiles": percentiles}
+        cached_facets = ResultCache.get(user_key, version, filters, **facet_params)
+        if cached_facets is not None:
+            return cached_facets
+
+        try:
+            result = CandidateRepository.aggregate_facets(user_id, filters, CandidateService.facet_stages(top, buckets, percentiles))
+            facets = CandidateService.format_facets(result)
+            ResultCache.set(user_key, version, filters, facets, **facet_params)
+            return facets
+        except Exception as e:
+            logging.error(f"An error occurred while computing candidate facets: {e}")
+            raise HTTPException(status_code=500, detail="Internal Server Error")
+
+    @staticmethod
+    def autocomplete(user_id: str, field: str, prefix: str = "", limit: int = 10) -> dict:
+        """
+        Suggest the most frequent values of a candidate field starting with a prefix.
+        
+        The values of the user's candidates are indexed in memory on the first request,
+        then kept current by every candidate write of this worker. Each request only reads
+        the list version, the index is rebuilt when it shows a write of another worker.
+        
+        - **user_id**: ID of the user requesting the suggestions
+        - **field**: One of "skills", "city", "job_major" or "career_level"
+        - **prefix**: Case-insensitive start of the values, empty for the most frequent ones
+        - **limit**: Maximum number of suggestions
+        
+        Returns:
+        - A dictionary with the field and its suggestions, each a value and its candidate count.
+        
+        Raises:
+        - HTTPException with status code 500 if an error occurs while building the index.
+        """
+        user_key = TokenHelper.user_key(user_id)
+        try:
+            version = CandidateRepository.get_list_version(user_id)
+            indexes = AutocompleteIndex.loaded(user_key, version)
+            if indexes is None:
+                candidates = CandidateRepository.iter_user_candidates(user_id, AutocompleteIndex.projection())
+                indexes = AutocompleteIndex.store(user_key, version, AutocompleteIndex.build(candidates))
+            return {"field": field, "suggestions": AutocompleteIndex.suggest(indexes, field, prefix, limit)}
+        except Exception as e:
+            logging.error(f"An error occurred while building the autocomplete index: {e}")
+            raise HTTPException(status_code=500, detail="Internal Server Error")
+
+    @staticmethod
+    def get_similar_candidates(candidate_id: str, user_id: str, limit: int = 10, metric: str = "jaccard") -> dict:
+        """
+        Find the candidates most similar to one of the user's candidates.
+        
+        Skills, career level, job major and years of experience bucket of the user's candidates
+        are kept in memory as bitsets, built on the first request and then kept current by
+        every candidate write, or rebuilt when the list version shows a write of another worker.
+        All candidates are scored at once and only the best are sorted.
+        
+        - **candidate_id**: ID of the candidate to compare with
+        - **user_id**: ID of the user requesting the similar candidates
+        - **limit**: Maximum number of similar candidates
+        - **metric**: "jaccard" or "cosine"
+        
+        Returns:
+        - A dictionary with the similar candidates, best first, each with its score and shared features.
+        
+        Raises:
+        - HTTPException with status code 404 if the candidate is not found.
+        - HTTPException with status code 500 if an error occurs while scoring the candidates.
+        """
+        user_key = TokenHelper.user_key(user_id)
+        try:
+            version = CandidateRepository.get_list_version(user_id)
+            vectors = SimilarityIndex.loaded(user_key, version)
+            if vectors is None:
+                # Concurrent first requests share one read of the user's candidates
+                vectors = similarity_builds.do((user_key, version), lambda: SimilarityIndex.load(
+                    user_key, version, CandidateRepository.iter_user_candidates(user_id, SimilarityIndex.projection())))
+            matches = SimilarityIndex.similar(vectors, candidate_id, limit, metric)
+            if matches is not None:
+                candidates = CandidateRepository.get_candidates_by_ids([match["candidate_id"] for match in matches], user_id)
+        except Exception as e:
+            logging.error(f"An error occurred while finding similar candidates: {e}")
+            raise HTTPException(status_code=500, detail="Internal Server Error")
+        if matches is None:
+            raise HTTPException(status_code=404, detail="Candidate not found")
+        return CandidateService.similar_candidates(candidate_id, metric, matches, candidates)
+
+    @staticmethod
+    def similar_candidates(candidate_id: str, metric: str, matches: List[dict], candidates: dict) -> dict:
+        """
+        Build the similar candidates response.
+        """
+        return {"candidate_id": candidate_id, "metric": metric, "similar": CandidateService.attach_candidates(matches, candidates)}
+
+    @staticmethod
+    def attach_candidates(matches: List[dict], candidates: dict) -> List[dict]:
+        """
+        Attach the candidate data to scored matches, a candidate deleted meanwhile is left out.
+        """
+        return [dict(match, candidate=candidates[match["candidate_id"]]) for match in matches if match["candidate_id"] in candidates]
+
+    @staticmethod
+    def get_shortlist(profile: JobProfile, user_id: str, limit: int = 20) -> dict:
+        """
+        Rank the user's candidates against a job profile.
+        
+        Every candidate is scored on required and nice-to-have skills, minimum experience,
+        salary budget and preferred cities in vectorized passes over a columnar snapshot
+        of the user's candidates. The snapshot is cached until the user writes a candidate.
+        
+        - **profile**: Job requirements and criterion weights (validated with JobProfile model)
+        - **user_id**: ID of the user requesting the shortlist
+        - **limit**: Maximum number of shortlisted candidates
+        
+        Returns:
+        - A dictionary with the number of candidates scored, the normalized weights and the
+          shortlist, best first, each with its score, per-criterion breakdown and data.
+        
+        Raises:
+        - HTTPException with status code 500 if an error occurs while scoring the candidates.
+        """
+        user_key = TokenHelper.user_key(user_id)
+        try:
+            version = CandidateRepository.get_list_version(user_id)
+            columns = ShortlistHelper.loaded(user_key, version)
+            if columns is None:
+                # Concurrent first requests share one read of the user's candidates
+                columns = shortlist_snapshots.do((user_key, version), lambda: ShortlistHelper.store(
+                    user_key, version, CandidateRepository.iter_user_candidates(user_id, ShortlistHelper.projection())))
+            ranking = columns.rank(profile, limit)
+            candidates = CandidateRepository.get_candidates_by_ids([match["candidate_id"] for match in ranking["shortlist"]], user_id)
+        except Exception as e:
+            logging.error(f"An error occurred while scoring the shortlist: {e}")
+            raise HTTPException(status_code=500, detail="Internal Server Error")
+        ranking["shortlist"] = CandidateService.attach_candidates(ranking["shortlist"], candidates)
+        return ranking
+
+    @staticmethod
+    async def stream_changes(user_id: str, last_event_id: Optional[str] = None) -> StreamingResponse:
+        """
+        Stream the user's candidate writes as server-sent events.
+        
+        Every create, update (with the changed fields) and delete of the user's candidates is
+        pushed as it happens. A client reconnecting with the id of the last event it received
+        first gets the events it missed, or a reset event when they are no longer kept.
+        
+        - **user_id**: ID of the user whose candidate writes are streamed
+        - **last_event_id**: Id of the last event the client received, None for a new stream
+        
+        Returns:
+        - A StreamingResponse of text/event-stream events.
+        
+        Raises:
+        - HTTPException with status code 503 if the worker has no stream left.
+        """
+        subscribed = ChangeFeed.subscribe(TokenHelper.user_key(user_id), last_event_id)
+        if subscribed is None:
+            raise HTTPException(status_code=503, detail="Too many change streams", headers={"Retry-After": "5"})
+        return StreamingResponse(
+            ChangeFeed.stream(*subscribed),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    @staticmethod
+    def generate_report(report_format: str = "csv") -> StreamingResponse:
+        """
+        Generate a report of all candidates as CSV, Parquet or Arrow IPC stream.
+        
+        The candidates are read from a cursor in batches and written to the response
+        chunk by chunk, so memory use stays flat whatever the size of the collection.
+        Parquet and Arrow exports carry typed columns, one row group per batch.
+        
+        - **report_format**: One of "csv", "parquet" or "arrow"
+        
+        Returns:
+        - A StreamingResponse containing the report file.
         
         Raises:
         - HTTPException with status code 404 if no candidates are found.
         - HTTPException with status code 500 if an error occurs during report generation.
         """
         try:
-            candidates = CandidateRepository.fetch_all_candidates()
-            if not candidates:
+            if not CandidateRepository.has_candidates():
                 raise HTTPException(status_code=404, detail="No candidates found")
 
-            df = pd.DataFrame(candidates)
-            df["_id"] = df["_id"].astype(str)
+            candidates = CandidateRepository.iter_all_candidates(ReportHelper.projection(), REPORT_BATCH_SIZE)
 
-            csv_buffer = io.StringIO()
-            df.to_csv(csv_buffer, index=False)
-            csv_buffer.seek(0)
+            media_type, extension = REPORT_FORMATS[report_format]
 
             return StreamingResponse(
-                csv_buffer,
-                media_type="text/csv",
-                headers={"Content-Disposition": "attachment; filename=candidates_report.csv"}
+                ReportHelper.chunks(candidates, report_format),
+                media_type=media_type,
+                headers={"Content-Disposition": f"attachment; filename=candidates_report.{extension}"}
             )
+        except HTTPException:
+            raise
         except Exception as e:
             logging.error(f"An error occurred while generating the report: {e}")
             raise HTTPException(status_code=500, detail="Internal Server Error")
+
+    @staticmethod
+    def submit_report_job(report_format: str = "csv") -> Tuple[dict, bool]:
+        """
+        Submit a report of all candidates, generated to disk by a background worker.
+        
+        The job is keyed by the candidate collection version, so while no candidate
+        is written the finished report is reused instead of being generated again.
+        
+        - **report_format**: One of "csv", "parquet" or "arrow"
+        
+        Returns:
+        - The report job, and whether this call started it.
+        
+        Raises:
+        - HTTPException with status code 404 if no candidates are found.
+        - HTTPException with status code 500 if an error occurs while submitting the job.
+        """
+        try:
+            if not CandidateRepository.has_candidates():
+                raise HTTPException(status_code=404, detail="No candidates found")
+            return ReportJobs.submit(
+                report_format,
+                CandidateRepository.get_collection_version(),
+                lambda: CandidateRepository.iter_all_candidates(ReportHelper.projection(), REPORT_BATCH_SIZE),
+                CandidateRepository.estimate_candidate_count,
+            )
+        except HTTPException:
+            raise
+        except Exception as e:
+            logging.error(f"An error occurred while submitting the report job: {e}")
+            raise HTTPException(status_code=500, detail="Internal Server Error")
+
+    @staticmethod
+    def get_report_job(job_id: str) -> dict:
+        """
+        Read the state and progress of a report job.
+        
+        - **job_id**: ID of the report job
+        
+        Returns:
+        - The report job, with its progress and, once finished, its download URL.
+        
+        Raises:
+        - HTTPException with status code 404 if the job is unknown.
+        """
+        job = ReportJobs.status(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Report job not found")
+        return job
+
+    @staticmethod
+    def download_report(job_id: str, range_header: Optional[str] = None, if_range: Optional[str] = None) -> StreamingResponse:
+        """
+        Download a finished report, whole or from the byte range a client resumes at.
+        
+        - **job_id**: ID of the report job
+        - **range_header**: The Range request header, a single "bytes=" range
+        - **if_range**: The If-Range request header, the range only applies while it matches the report ETag
+        
+        Returns:
+        - A StreamingResponse with the report, 206 (Partial Content) for a range.
+        
+        Raises:
+        - HTTPException with status code 404 if the job is unknown.
+        - HTTPException with status code 409 if the report is not finished yet.
+        - HTTPException with status code 416 if the range is outside the report.
+        """
+        job = CandidateService.get_report_job(job_id)
+        if job["status"] != FINISHED:
+            raise HTTPException(status_code=409, detail=f"Report is {job['status']}")
+        try:
+            return ReportJobs.download(job, range_header, if_range)
+        except ValueError:
+            raise HTTPException(status_code=416, detail="Range Not Satisfiable", headers={"Content-Range": f"bytes */{job['size']}"})
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Report job not found")
@@ -11,6 +11,8 @@ class UserService:
         """
         Create a new user and generate an access token.
         
+        The cached tokens of the users already registered with the same email stop authenticating from the token cache.
+        
         - **user**: User data for creation (validated with User model)
         
         Returns:
@@ -21,6 +23,10 @@ class UserService:
         """
         
         try:
+            # Drop the cached tokens of the users already registered with this email, their identity is being claimed again
+            for user_id in UserRepository.get_user_ids_by_email(user.email):
+                TokenHelper.invalidate_user(user_id)
+            
             # Attempt to create a user in the database
             user_data = UserRepository.create_user(user)
             
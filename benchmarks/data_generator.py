@@ -0,0 +1,106 @@
+# Seeded generator of realistic candidate datasets, skills and cities follow a Zipf-like skew
+import argparse
+import bisect
+import itertools
+import json
+import random
+import sys
+from typing import Iterator, List, Sequence
+
+# Value pools, ordered from the most to the least frequent
+SKILLS = [
+    "Python", "JavaScript", "SQL", "Java", "TypeScript", "Git", "Docker", "AWS", "React", "Linux",
+    "C#", "Node.js", "Kubernetes", "Go", "PostgreSQL", "MongoDB", "FastAPI", "Django", "C++", "Azure",
+    "GCP", "Terraform", "Spark", "Kafka", "Redis", "Rust", "Scala", "Kotlin", "Swift", "PHP",
+    "Ruby", "Pandas", "PyTorch", "TensorFlow", "Airflow", "GraphQL", "Elasticsearch", "Vue", "Angular", "Flutter",
+]
+CITIES = [
+    "New York", "London", "Berlin", "Paris", "Toronto", "San Francisco", "Amsterdam", "Dubai", "Singapore", "Madrid",
+    "Chicago", "Austin", "Seattle", "Boston", "Dublin", "Lisbon", "Warsaw", "Stockholm", "Zurich", "Sydney",
+    "Cairo", "Riyadh", "Bangalore", "Tokyo", "Seoul", "Mexico City", "Sao Paulo", "Lagos", "Nairobi", "Istanbul",
+]
+NATIONALITIES = ["American", "British", "German", "French", "Canadian", "Indian", "Egyptian", "Spanish", "Brazilian", "Japanese"]
+JOB_MAJORS = ["Computer Science", "Software Engineering", "Information Systems", "Data Science", "Mathematics", "Electrical Engineering", "Physics", "Business"]
+CAREER_LEVELS = ["Junior", "Mid", "Senior", "Lead", "Principal"]
+DEGREE_TYPES = ["Bachelor", "Master", "PhD", "Diploma"]
+GENDERS = ["Male", "Female", "NotSpecified"]
+FIRST_NAMES = ["James", "Mary", "Ahmed", "Sara", "Wei", "Olga", "Luis", "Aisha", "John", "Fatima", "Noah", "Emma", "Omar", "Mia", "Ivan", "Yuki"]
+LAST_NAMES = ["Smith", "Garcia", "Khan", "Muller", "Rossi", "Ivanova", "Chen", "Hassan", "Brown", "Silva", "Kim", "Nowak", "Dubois", "Tanaka"]
+
+# Typical salary per career level, the generated salary is spread around it
+BASE_SALARY = {"Junior": 45000, "Mid": 70000, "Senior": 95000, "Lead": 120000, "Principal": 150000}
+EXPERIENCE = {"Junior": (0, 2), "Mid": (2, 6), "Senior": (5, 12), "Lead": (8, 18), "Principal": (12, 30)}
+
+# Cumulative weights of a Zipf distribution over a pool, the i-th value weighs 1 / (i + 1) ** exponent
+def zipf_weights(pool: Sequence, exponent: float = 1.1) -> List[float]:
+    return list(itertools.accumulate(1 / (rank + 1) ** exponent for rank in range(len(pool))))
+
+# Generator of candidate rows, the same seed always yields the same dataset
+class CandidateGenerator:
+
+    def __init__(self, seed: int = 42, skill_skew: float = 1.1, city_skew: float = 1.2):
+        self.random = random.Random(seed)
+        self.skill_weights = zipf_weights(SKILLS, skill_skew)
+        self.city_weights = zipf_weights(CITIES, city_skew)
+
+    # Method for drawing one value of a pool from its cumulative weights
+    def skewed(self, pool: Sequence, cumulative_weights: List[float]):
+        return pool[bisect.bisect(cumulative_weights, self.random.random() * cumulative_weights[-1])]
+
+    # Method for drawing a set of distinct skewed skills
+    def skills(self) -> List[str]:
+        count = self.random.randint(2, 8)
+        skills = []
+        while len(skills) < count:
+            skill = self.skewed(SKILLS, self.skill_weights)
+            if skill not in skills:
+                skills.append(skill)
+        return skills
+
+    # Method for generating one candidate, valid against the Candidate model
+    def candidate(self, index: int) -> dict:
+        career_level = self.random.choices(CAREER_LEVELS, weights=[25, 35, 25, 10, 5])[0]
+        low, high = EXPERIENCE[career_level]
+        first_name = self.random.choice(FIRST_NAMES)
+        last_name = self.random.choice(LAST_NAMES)
+        return {
+            "first_name": first_name,
+            "last_name": last_name,
+            "email": f"{first_name}.{last_name}.{index}@example.com".lower(),
+            "uuid": f"bench-{index}",
+            "career_level": career_level,
+            "job_major": self.random.choice(JOB_MAJORS),
+            "years_of_experience": self.random.randint(low, high),
+            "degree_type": self.random.choices(DEGREE_TYPES, weights=[55, 30, 5, 10])[0],
+            "skills": self.skills(),
+            "nationality": self.random.choice(NATIONALITIES),
+            "city": self.skewed(CITIES, self.city_weights),
+            "salary": round(self.random.lognormvariate(0, 0.25) * BASE_SALARY[career_level], 2),
+            "gender": self.random.choice(GENDERS),
+        }
+
+    # Method for generating count candidates lazily
+    def candidates(self, count: int) -> Iterator[dict]:
+        for index in range(count):
+            yield self.candidate(index)
+
+    # Method for generating count candidates as NDJSON chunks, the body of POST /candidates/import
+    def ndjson_chunks(self, count: int, rows_per_chunk: int = 1000) -> Iterator[bytes]:
+        candidates = self.candidates(count)
+        while chunk := list(itertools.islice(candidates, rows_per_chunk)):
+            yield "".join(json.dumps(candidate) + "\n" for candidate in chunk).encode()
+
+# Write a dataset as NDJSON: python -m benchmarks.data_generator --rows 100000 --seed 42 > candidates.ndjson
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a seeded candidate dataset as NDJSON")
+    parser.add_argument("--rows", type=int, default=10000, help="Number of candidates (10k to 5M)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed, the same seed gives the same dataset")
+    parser.add_argument("--output", default="-", help="Output file, - for stdout")
+    args = parser.parse_args()
+    output = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    with output:
+        for chunk in CandidateGenerator(args.seed).ndjson_chunks(args.rows):
+            output.write(chunk)
+
+if __name__ == "__main__":
+    main()
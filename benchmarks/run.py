@@ -0,0 +1,227 @@
+# Load and latency benchmark of the candidate API, driven in-process (ASGI) or over HTTP at a fixed concurrency
+#
+#   python -m benchmarks.run --in-memory --rows 10000                      # in-process, in-memory MongoDB stand-in
+#   python -m benchmarks.run --rows 100000 --concurrency 32                # in-process, MONGO_URI from the .env
+#   python -m benchmarks.run --base-url http://localhost:8989 --server-pid 1234
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import resource
+import sys
+import time
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+import httpx
+from benchmarks.data_generator import CandidateGenerator, CITIES, SKILLS
+
+SCENARIOS = ("create", "get", "list", "search", "report")
+
+# Method for reading the nearest-rank percentile of sorted latencies
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))]
+
+# Samples the resident set size of a process (this one by default) while a scenario runs
+class RSSSampler:
+
+    def __init__(self, pid: Optional[int] = None, interval: float = 0.05):
+        self.status_path = f"/proc/{pid or 'self'}/status"
+        self.remote = pid is not None
+        self.interval = interval
+        self.peak = 0
+        self._task = None
+
+    # Method for reading the current RSS in bytes, the peak RSS of this process where /proc is missing
+    def read(self) -> int:
+        try:
+            with open(self.status_path) as status:
+                for line in status:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            pass
+        if self.remote:
+            return 0
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+    async def _sample(self) -> None:
+        while True:
+            self.peak = max(self.peak, self.read())
+            await asyncio.sleep(self.interval)
+
+    async def __aenter__(self) -> "RSSSampler":
+        self.peak = self.read()
+        self._task = asyncio.create_task(self._sample())
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self._task.cancel()
+        self.peak = max(self.peak, self.read())
+
+# Method for sending requests from a fixed number of concurrent workers and summarizing their latencies
+async def run_scenario(name: str, make_request: Callable[[], Awaitable[httpx.Response]], requests: int, concurrency: int, server_pid: Optional[int]) -> dict:
+    latencies, errors, client_errors, issued = [], 0, 0, itertools.count()
+
+    async def worker() -> None:
+        nonlocal errors, client_errors
+        while next(issued) < requests:
+            start = time.perf_counter()
+            try:
+                status_code = (await make_request()).status_code
+            except httpx.HTTPError:
+                status_code = None
+            latencies.append(time.perf_counter() - start)
+            # An empty filtered page answers 404, it is counted apart from the server errors
+            errors += status_code is None or status_code >= 500
+            client_errors += status_code is not None and 400 <= status_code < 500
+
+    async with RSSSampler(server_pid) as rss:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "scenario": name,
+        "requests": len(latencies),
+        "errors": errors,
+        "4xx": client_errors,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "peak_rss_mb": round(rss.peak / 2 ** 20, 1),
+    }
+
+# Requests of each scenario, against one benchmark user seeded with a generated dataset
+class Scenarios:
+
+    def __init__(self, client: httpx.AsyncClient, seed: int):
+        self.client = client
+        self.random = random.Random(seed)
+        self.generator = CandidateGenerator(seed)
+        self.created = itertools.count(10 ** 9)
+        self.headers: Dict[str, str] = {}
+        self.candidate_ids: List[str] = []
+
+    # Method for creating the benchmark user and importing rows candidates through the streaming import
+    async def setup(self, rows: int) -> None:
+        response = await self.client.post("/user", json={"first_name": "Bench", "last_name": "User", "email": f"bench.{time.time_ns()}@example.com"})
+        response.raise_for_status()
+        self.headers = {"Authorization": f"Bearer {response.json()['token']}"}
+
+        async def body() -> AsyncIterator[bytes]:
+            for chunk in self.generator.ndjson_chunks(rows):
+                yield chunk
+
+        start = time.perf_counter()
+        response = await self.client.post(
+            "/candidates/import",
+            content=body(),
+            headers={**self.headers, "Content-Type": "application/x-ndjson"},
+            timeout=None
+        )
+        response.raise_for_status()
+        print(f"Seeded {response.json()['inserted']} candidates in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+        response = await self.client.get("/all-candidates", params={"limit": 1000}, headers=self.headers)
+        response.raise_for_status()
+        self.candidate_ids = [candidate["_id"] for candidate in response.json()]
+
+    def create(self) -> Awaitable[httpx.Response]:
+        return self.client.post("/candidate", json=self.generator.candidate(next(self.created)), headers=self.headers)
+
+    def get(self) -> Awaitable[httpx.Response]:
+        return self.client.get(f"/candidate/{self.random.choice(self.candidate_ids)}", headers=self.headers)
+
+    # Filtered listings, the filter values follow the skew of the dataset
+    def list(self) -> Awaitable[httpx.Response]:
+        params = {"limit": 100, "city": self.generator.skewed(CITIES, self.generator.city_weights)}
+        if self.random.random() < 0.5:
+            params["skills"] = self.generator.skewed(SKILLS, self.generator.skill_weights)
+        if self.random.random() < 0.5:
+            params["salary_min"] = self.random.choice([40000, 60000, 80000])
+            params["sort"] = "-salary"
+        return self.client.get("/all-candidates", params=params, headers=self.headers)
+
+    def search(self) -> Awaitable[httpx.Response]:
+        params = {"limit": 100, "search": self.generator.skewed(SKILLS, self.generator.skill_weights)}
+        return self.client.get("/all-candidates", params=params, headers=self.headers)
+
+    def report(self) -> Awaitable[httpx.Response]:
+        return self.client.get("/generate-report", headers=self.headers, timeout=None)
+
+# Method for swapping the MongoDB clients for in-memory stand-ins, before the app is imported
+def use_in_memory_mongo() -> None:
+    import mongomock
+    import motor.motor_asyncio
+    import pymongo.mongo_client
+    from mongomock_motor import AsyncMongoMockClient
+    client, async_client = mongomock.MongoClient(), AsyncMongoMockClient()
+    pymongo.mongo_client.MongoClient = lambda *args, **kwargs: client
+    motor.motor_asyncio.AsyncIOMotorClient = lambda *args, **kwargs: async_client
+    os.environ.setdefault("MONGO_WARM_UP_TIMEOUT", "0")
+
+async def benchmark(args: argparse.Namespace) -> List[dict]:
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=30)
+        lifespan = None
+    else:
+        if args.in_memory:
+            use_in_memory_mongo()
+        # One benchmark user would soon be rate limited, measure the application rather than its limits
+        os.environ.setdefault("ADMISSION_ENABLED", "false")
+        from app.main import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=30)
+        lifespan = app.router.lifespan_context(app)
+        await lifespan.__aenter__()
+    results = []
+    try:
+        async with client:
+            scenarios = Scenarios(client, args.seed)
+            await scenarios.setup(args.rows)
+            for name in args.scenarios:
+                requests = args.report_requests if name == "report" else args.requests
+                result = await run_scenario(name, getattr(scenarios, name), requests, args.concurrency, args.server_pid)
+                results.append(result)
+                print(json.dumps(result), file=sys.stderr)
+    finally:
+        if lifespan is not None:
+            await lifespan.__aexit__(None, None, None)
+    return results
+
+# Method for printing the results as a table
+def print_table(results: List[dict]) -> None:
+    columns = ["scenario", "requests", "errors", "4xx", "p50_ms", "p95_ms", "p99_ms", "rps", "peak_rss_mb"]
+    widths = [max(len(column), *(len(str(result[column])) for result in results)) for column in columns]
+    print("  ".join(column.ljust(width) for column, width in zip(columns, widths)))
+    for result in results:
+        print("  ".join(str(result[column]).ljust(width) for column, width in zip(columns, widths)))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the candidate endpoints")
+    parser.add_argument("--rows", type=int, default=10000, help="Candidates seeded before the scenarios run")
+    parser.add_argument("--seed", type=int, default=42, help="Seed of the dataset and of the request mix")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight at any time")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per scenario")
+    parser.add_argument("--report-requests", type=int, default=5, help="Requests of the generate-report scenario")
+    parser.add_argument("--scenarios", type=lambda value: value.split(","), default=list(SCENARIOS), help=f"Comma separated subset of {','.join(SCENARIOS)}")
+    parser.add_argument("--base-url", help="Benchmark a running server over HTTP instead of the app in-process")
+    parser.add_argument("--server-pid", type=int, help="PID of the server whose RSS is sampled, with --base-url")
+    parser.add_argument("--in-memory", action="store_true", help="Run in-process against an in-memory MongoDB stand-in (mongomock)")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    results = asyncio.run(benchmark(args))
+    print_table(results)
+    if args.json:
+        with open(args.json, "w") as output:
+            json.dump({"args": vars(args), "results": results}, output, indent=2)
+
+if __name__ == "__main__":
+    main()
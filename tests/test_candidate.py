@@ -1,6 +1,36 @@
+import asyncio
+import gc
+import json
+import os
+import threading
+import time
+import weakref
+import msgpack
+import pytest
+from bson import ObjectId
+from fastapi import FastAPI
 from fastapi.testclient import TestClient
 from app.main import app
+from app.routes.async_user_routes import async_user  # Import the async routers served with DATABASE_MODE=async
+from app.routes.async_candidate_routes import async_candidate
 from app.helper.token_helper import TokenHelper  # Import the TokenHelper for token generation
+from app.helper import admission_helper  # Import the admission settings to lower its limits
+from app.helper.admission_helper import AdmissionControl, TokenBuckets  # Import the admission control and its per-user rate limits
+from app.config.db_config import MongoDB  # Import MongoDB for its connection pool monitors
+from app.helper.cache_helper import TTLCache  # Import TTLCache for the in-process caches
+from app.helper.metrics_helper import HTTP_REQUESTS  # Import the request counter of /metrics
+from app.helper.single_flight_helper import SingleFlight  # Import SingleFlight for coalescing identical reads
+from app.helper import change_feed_helper  # Import the change feed settings to lower its limits
+from app.helper.change_feed_helper import ChangeFeed  # Import ChangeFeed for the candidate change streams
+from app.helper.similarity_helper import SimilarityIndex  # Import SimilarityIndex for the per-user candidate vectors
+from app.helper.index_helper import IndexAdvisor  # Import IndexAdvisor for the recorded query shapes
+from app.helper import compression_helper  # Import the compression settings to lower the minimum size
+from app.helper import slow_query_helper  # Import the slow query settings to lower the threshold
+from app.helper.slow_query_helper import SlowQueryLog  # Import SlowQueryLog for the recorded slow operations
+from app.helper.result_cache_helper import ResultCache  # Import ResultCache for its hit counters
+from app.helper import report_job_helper  # Import the report job settings to use a directory of the test
+from app.helper.report_job_helper import ReportJobs  # Import ReportJobs for the background report jobs
+from app.service.candidate_service import CandidateService  # Import CandidateService to skip the in-process handling of a write
 
 # Initialize the TestClient for testing the FastAPI app
 client = TestClient(app)
@@ -25,6 +55,18 @@ sample_candidate = {
 # Create an access token for authorization using TokenHelper
 token = TokenHelper.create_access_token(sample_candidate)
 
+@pytest.fixture(autouse=True)
+def own_identity(monkeypatch) -> None:
+    """
+    Give each test a token of its own, so the per-user rate limits a test runs into never depend on the tests run before it.
+    """
+    monkeypatch.setitem(globals(), "token", TokenHelper.create_access_token({**sample_candidate, "id": str(ObjectId())}))
+
+# Register a user and return its access token, for the routes that reject anonymous callers
+def user_token(email: str) -> str:
+    response = client.post("/user", json={"first_name": "Jane", "last_name": "Doe", "email": email})
+    return response.json()["token"]
+
 def test_create_candidate() -> None:
     """
     Test the candidate creation endpoint with valid data.
@@ -67,6 +109,20 @@ def test_generate_report() -> None:
     # Assert that the content type of the response is CSV
     assert response.headers["Content-Type"] == "text/csv; charset=utf-8"
 
+def test_generate_report_parquet() -> None:
+    """
+    Test the endpoint for generating a report in Parquet format.
+    """
+    # Send a GET request to generate a Parquet report
+    response = client.get("/generate-report", params={"format": "parquet"}, headers={"Authorization": f"Bearer {token}"})
+    
+    # Assert that the response status code is 200 (OK)
+    assert response.status_code == 200
+    
+    # Assert that the content type of the response is Parquet and the file starts with the Parquet magic bytes
+    assert response.headers["Content-Type"] == "application/vnd.apache.parquet"
+    assert response.content[:4] == b"PAR1"
+
 def test_create_candidate_invalid_data() -> None:
     """
     Test candidate creation with invalid data (e.g., invalid email format).
@@ -80,3 +136,843 @@ def test_create_candidate_invalid_data() -> None:
     
     # Assert that the response status code is 422 (Unprocessable Entity)
     assert response.status_code == 422
+
+def test_get_all_candidates_paginated() -> None:
+    """
+    Test that /all-candidates pages with limit and returns the next cursor and total in headers.
+    """
+    # Request a single candidate per page, sorted by salary, along with the total count
+    response = client.get("/all-candidates", params={"limit": 1, "sort": "-salary", "include_total": True}, headers={"Authorization": f"Bearer {token}"})
+    
+    # Assert that the response status code is 200 (OK) and the page holds one candidate
+    assert response.status_code == 200
+    assert len(response.json()) == 1
+    
+    # Assert that the total count is returned, and a cursor when another page follows
+    total = int(response.headers["X-Total-Count"])
+    assert ("X-Next-Cursor" in response.headers) == (total > 1)
+
+def test_get_all_candidates_invalid_cursor() -> None:
+    """
+    Test that a malformed cursor is rejected.
+    """
+    # Send a GET request with a cursor that was not issued by the API
+    response = client.get("/all-candidates", params={"cursor": "not-a-cursor"}, headers={"Authorization": f"Bearer {token}"})
+    
+    # Assert that the response status code is 400 (Bad Request)
+    assert response.status_code == 400
+
+def test_import_candidates_ndjson() -> None:
+    """
+    Test the bulk import endpoint with an NDJSON body holding one invalid row.
+    """
+    # Build an NDJSON body with two valid candidates and one with an invalid email
+    invalid_candidate = sample_candidate.copy()
+    invalid_candidate["email"] = "invalid-email"
+    body = "\n".join(json.dumps(row) for row in [sample_candidate, invalid_candidate, sample_candidate])
+    
+    # Send a POST request to import the candidates
+    response = client.post("/candidates/import", content=body, headers={"Authorization": f"Bearer {token}", "Content-Type": "application/x-ndjson"})
+    
+    # Assert that the valid rows are inserted and the invalid one is reported without aborting the import
+    assert response.status_code == 200
+    assert response.json()["inserted"] == 2
+    assert response.json()["failed"] == 1
+    assert response.json()["errors"][0]["row"] == 2
+
+def test_get_candidate_facets() -> None:
+    """
+    Test the facets endpoint with a city filter.
+    """
+    # Send a GET request to compute the facets of the candidates living in New York
+    response = client.get("/candidates/facets", params={"city": "New York", "top": 5}, headers={"Authorization": f"Bearer {token}"})
+    
+    # Assert that the response status code is 200 (OK)
+    assert response.status_code == 200
+    
+    # Assert that every facet is returned and that the city facet only holds the filtered city
+    facets = response.json()
+    assert {"total", "career_level", "skills", "city", "nationality", "salary", "years_of_experience"} <= facets.keys()
+    assert all(bucket["value"] == "New York" for bucket in facets["city"])
+
+def test_autocomplete_skills() -> None:
+    """
+    Test the autocomplete endpoint with a case-insensitive skill prefix.
+    """
+    # Send a GET request to complete the skills starting with "py"
+    response = client.get("/candidates/autocomplete", params={"field": "skills", "prefix": "py"}, headers={"Authorization": f"Bearer {token}"})
+    
+    # Assert that the response status code is 200 (OK)
+    assert response.status_code == 200
+    
+    # Assert that every suggestion starts with the prefix and carries its candidate count
+    suggestions = response.json()["suggestions"]
+    assert any(suggestion["value"] == "Python" for suggestion in suggestions)
+    assert all(suggestion["value"].lower().startswith("py") and suggestion["count"] > 0 for suggestion in suggestions)
+
+def test_autocomplete_other_worker_write(monkeypatch) -> None:
+    """
+    Test that the autocomplete sees a write handled by another worker.
+    """
+    headers = {"Authorization": f"Bearer {user_token('autocomplete-workers@example.com')}"}
+    params = {"field": "city", "prefix": "por"}
+    client.post("/candidate", json=dict(sample_candidate, city="Porto"), headers=headers)
+    assert client.get("/candidates/autocomplete", params=params, headers=headers).json()["suggestions"] == [{"value": "Porto", "count": 1}]
+
+    # A write handled by another worker bumps the list version, but none of this worker's in-process handling runs
+    monkeypatch.setattr(CandidateService, "candidate_written", lambda *args, **kwargs: None)
+    client.post("/candidate", json=dict(sample_candidate, city="Porto"), headers=headers)
+
+    # Assert that the index was rebuilt and counts the new candidate
+    assert client.get("/candidates/autocomplete", params=params, headers=headers).json()["suggestions"] == [{"value": "Porto", "count": 2}]
+
+def test_get_all_candidates_msgpack() -> None:
+    """
+    Test the candidate list rendered as MessagePack when the client asks for it.
+    """
+    # Send a GET request accepting MessagePack
+    response = client.get("/all-candidates", headers={"Authorization": f"Bearer {token}", "Accept": "application/msgpack"})
+    
+    # Assert that the response status code is 200 (OK) and that the body is MessagePack
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/msgpack"
+    
+    # Assert that the candidates decode with their id as a string
+    candidates = msgpack.unpackb(response.content)
+    assert isinstance(candidates, list) and isinstance(candidates[0]["_id"], str)
+
+def test_patch_candidate() -> None:
+    """
+    Test the partial update endpoint, sending the same change twice.
+    """
+    # Create a candidate to update
+    candidate_id = client.post("/candidate", json=sample_candidate, headers={"Authorization": f"Bearer {token}"}).json()["candidate"]["_id"]
+    
+    # Send a PATCH request changing only the city, then the same request again
+    for _ in range(2):
+        response = client.patch(f"/candidate/{candidate_id}", json={"city": "Boston"}, headers={"Authorization": f"Bearer {token}"})
+        
+        # Assert that the response status code is 200 (OK), an unchanged candidate included
+        assert response.status_code == 200
+        
+        # Assert that the city changed and the other fields were kept
+        assert response.json()["candidate"]["city"] == "Boston"
+        assert response.json()["candidate"]["first_name"] == sample_candidate["first_name"]
+
+def test_candidate_conditional_requests() -> None:
+    """
+    Test If-None-Match on a candidate read and If-Match on its update.
+    """
+    # Create a candidate and read its ETag
+    candidate_id = client.post("/candidate", json=sample_candidate, headers={"Authorization": f"Bearer {token}"}).json()["candidate"]["_id"]
+    etag = client.get(f"/candidate/{candidate_id}", headers={"Authorization": f"Bearer {token}"}).headers["ETag"]
+    
+    # Assert that reading it again with its ETag answers 304 (Not Modified)
+    response = client.get(f"/candidate/{candidate_id}", headers={"Authorization": f"Bearer {token}", "If-None-Match": etag})
+    assert response.status_code == 304
+    
+    # Assert that the first update with the ETag succeeds and the second one, now stale, answers 412
+    response = client.patch(f"/candidate/{candidate_id}", json={"city": "Boston"}, headers={"Authorization": f"Bearer {token}", "If-Match": etag})
+    assert response.status_code == 200 and response.headers["ETag"] != etag
+    response = client.patch(f"/candidate/{candidate_id}", json={"city": "Chicago"}, headers={"Authorization": f"Bearer {token}", "If-Match": etag})
+    assert response.status_code == 412
+
+def test_result_cache_hit_and_write() -> None:
+    """
+    Test that a repeated listing is served from the result cache and that a write makes the next one miss.
+    """
+    headers = {"Authorization": f"Bearer {user_token('result-cache@example.com')}"}
+    client.post("/candidate", json=sample_candidate, headers=headers)
+
+    # Assert that the second identical listing is a cache hit
+    client.get("/all-candidates", headers=headers)
+    hits = ResultCache.stats()["hits"]
+    assert len(client.get("/all-candidates", headers=headers).json()) == 1
+    assert ResultCache.stats()["hits"] == hits + 1
+
+    # Assert that after a write the listing misses the cache and holds the new candidate
+    client.post("/candidate", json={**sample_candidate, "first_name": "Jack"}, headers=headers)
+    response = client.get("/all-candidates", headers=headers)
+    assert ResultCache.stats()["hits"] == hits + 1
+    assert sorted(candidate["first_name"] for candidate in response.json()) == ["Jack", "John"]
+
+def test_list_etag_matches_body(monkeypatch) -> None:
+    """
+    Test that a listing and its ETag come from the same version after a write made by another worker.
+    """
+    headers = {"Authorization": f"Bearer {user_token('list-etag@example.com')}"}
+    client.post("/candidate", json=sample_candidate, headers=headers)
+    first = client.get("/all-candidates", headers=headers)
+    assert first.status_code == 200 and len(first.json()) == 1
+
+    # A write handled by another worker bumps the list version, but none of this worker's in-process invalidation runs
+    monkeypatch.setattr(CandidateService, "candidate_written", lambda *args, **kwargs: None)
+    client.post("/candidate", json={**sample_candidate, "first_name": "Jack"}, headers=headers)
+
+    # Assert that the old ETag no longer matches and the page under the new ETag holds the new candidate
+    response = client.get("/all-candidates", headers={**headers, "If-None-Match": first.headers["ETag"]})
+    assert response.status_code == 200 and response.headers["ETag"] != first.headers["ETag"]
+    assert sorted(candidate["first_name"] for candidate in response.json()) == ["Jack", "John"]
+
+def test_generate_report_gzip(monkeypatch) -> None:
+    """
+    Test the CSV report compressed with gzip when the client accepts it.
+    """
+    # Compress every response, so the test does not depend on the size of the report
+    monkeypatch.setattr(compression_helper, "COMPRESSION_MINIMUM_SIZE", 0)
+    
+    # Create a candidate, so the report has a row whatever tests ran before
+    assert client.post("/candidate", json=sample_candidate, headers={"Authorization": f"Bearer {token}"}).status_code == 200
+    
+    # Send a GET request accepting gzip
+    response = client.get("/generate-report", headers={"Authorization": f"Bearer {token}", "Accept-Encoding": "gzip"})
+    
+    # Assert that the response status code is 200 (OK) and that the body was gzip encoded
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    
+    # Assert that the decoded report starts with the header row
+    assert response.text.startswith("_id,")
+
+def test_metrics() -> None:
+    """
+    Test the Prometheus metrics endpoint after a candidate request.
+    """
+    # Send a request to a templated route so it shows up in the metrics
+    client.get("/all-candidates", headers={"Authorization": f"Bearer {token}"})
+    response = client.get("/metrics")
+    
+    # Assert that the response status code is 200 (OK) and uses the Prometheus text format
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    
+    # Assert that the request was recorded under its route and that the pool and cache gauges are exposed
+    assert 'http_request_duration_seconds_count{method="GET",route="/all-candidates"}' in response.text
+    assert "mongo_pool_open_connections" in response.text
+    assert 'cache_hit_ratio{cache="tokens"}' in response.text
+
+def test_metrics_exposition_format() -> None:
+    """
+    Test that every sample of /metrics belongs to the family named by the preceding HELP and TYPE lines.
+    """
+    client.get("/all-candidates", headers={"Authorization": f"Bearer {token}"})
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    
+    # Sample name suffixes allowed by each metric type of the text format 0.0.4
+    suffixes = {"counter": ("",), "gauge": ("",), "histogram": ("_bucket", "_sum", "_count")}
+    family, kind, helped, typed = None, None, set(), {}
+    for line in response.text.splitlines():
+        if line.startswith("# HELP "):
+            family = line.split(" ")[2]
+            helped.add(family)
+        elif line.startswith("# TYPE "):
+            _, _, name, kind = line.split(" ")
+            assert name == family and name not in typed
+            typed[name] = kind
+        elif line:
+            sample = line.split("{")[0].split(" ")[0]
+            assert any(sample == family + suffix for suffix in suffixes[kind]), line
+            float(line.rsplit(" ", 1)[1])
+    
+    # Assert that counters are typed under their _total name, the one their samples carry
+    assert helped == typed.keys()
+    assert typed["http_requests_total"] == "counter" and "http_requests" not in typed
+    assert all(name.endswith("_total") for name, kind in typed.items() if kind == "counter")
+
+def test_slow_queries(monkeypatch) -> None:
+    """
+    Test the slow candidate operation report, of a listing and of a failed operation.
+    """
+    # Record every operation, without capturing plans
+    monkeypatch.setattr(slow_query_helper, "SLOW_QUERY_MS", 0.001)
+    monkeypatch.setattr(slow_query_helper, "SLOW_QUERY_EXPLAIN_SAMPLE", 0)
+    SlowQueryLog.reset()
+    headers = {"Authorization": f"Bearer {user_token('slow-queries@example.com')}"}
+    
+    # A token that does not verify is rejected
+    assert client.get("/admin/slow-queries", headers={"Authorization": "Bearer garbage"}).status_code == 401
+    
+    # A listing filtered by city, then an operation failing with a timeout
+    assert client.post("/candidate", json={**sample_candidate, "city": "Slowtown"}, headers=headers).status_code == 200
+    assert client.get("/all-candidates", params={"city": "Slowtown"}, headers=headers).status_code == 200
+    with pytest.raises(TimeoutError):
+        with SlowQueryLog.timed("count", SlowQueryLog.count_command({"city": "Slowtown"})):
+            raise TimeoutError()
+    
+    # Send a GET request to the slow query report
+    response = client.get("/admin/slow-queries", headers=headers)
+    assert response.status_code == 200
+    report = response.json()
+    assert report["threshold_ms"] == 0.001
+    
+    # Assert that the failed operation is the newest one, recorded with its exception
+    failed = report["recent"][0]
+    assert (failed["operation"], failed["filters"], failed["error"]) == ("count", ["city:eq"], "TimeoutError")
+    
+    # Assert that the listing was recorded with its shape, never its values, and the documents it returned
+    listing = next(entry for entry in report["recent"] if entry["operation"] == "find")
+    assert "city:eq" in listing["filters"] and "Slowtown" not in json.dumps(listing)
+    assert listing["returned"] == 1 and listing["error"] is None and listing["duration_ms"] > 0
+    shape = next(shape for shape in report["shapes"] if shape["operation"] == "count" and shape["filters"] == ["city:eq"])
+    assert (shape["count"], shape["errors"]) == (1, 1)
+
+def test_report_job_range_download() -> None:
+    """
+    Test a report job: submit it, poll it until finished and resume its download with a Range request.
+    """
+    headers = {"Authorization": f"Bearer {user_token('reports@example.com')}"}
+    
+    # Send a POST request to submit a CSV report job
+    response = client.post("/reports", params={"format": "csv"}, headers=headers)
+    assert response.status_code in (200, 202)
+    job_id = response.json()["id"]
+    
+    # Poll the job until the background worker finished it
+    for _ in range(100):
+        job = client.get(f"/reports/{job_id}", headers=headers).json()
+        if job["status"] == "finished":
+            break
+        time.sleep(0.05)
+    assert job["status"] == "finished"
+    
+    # Assert that the report is reused while no candidate is written
+    assert client.post("/reports", params={"format": "csv"}, headers=headers).json()["id"] == job_id
+    
+    # Assert that a Range request answers 206 (Partial Content) with the end of the full download
+    full = client.get(f"/reports/{job_id}/download", headers=headers)
+    partial = client.get(f"/reports/{job_id}/download", headers={**headers, "Range": "bytes=10-"})
+    assert partial.status_code == 206
+    assert partial.headers["content-range"] == f"bytes 10-{len(full.content) - 1}/{len(full.content)}"
+    assert partial.content == full.content[10:]
+    
+    # Assert that the report jobs are not served to anonymous callers
+    anonymous = {"Authorization": "Bearer garbage"}
+    assert client.post("/reports", params={"format": "csv"}, headers=anonymous).status_code == 401
+    assert client.get(f"/reports/{job_id}", headers=anonymous).status_code == 401
+    assert client.get(f"/reports/{job_id}/download", headers=anonymous).status_code == 401
+    
+    # Assert that the id cannot be derived from the format and the collection version alone
+    assert client.get(f"/reports/csv-{job['version']}", headers=headers).status_code == 404
+    tampered = job_id[:-1] + ("1" if job_id.endswith("0") else "0")
+    assert client.get(f"/reports/{tampered}", headers=headers).status_code == 404
+
+def test_report_job_shared_between_workers(monkeypatch, tmp_path) -> None:
+    """
+    Test that a running report job is seen by another worker, which neither answers 404 nor starts a duplicate.
+    """
+    monkeypatch.setattr(report_job_helper, "REPORT_JOB_DIR", str(tmp_path))
+    release = threading.Event()
+
+    def documents():
+        release.wait(5)
+        return iter([{"_id": "1", "first_name": "John"}])
+
+    job, created = ReportJobs.submit("csv", 7, documents, lambda: 1)
+    assert created
+
+    # Another worker knows nothing of the job but what is on disk
+    monkeypatch.setattr(ReportJobs, "_jobs", {})
+    monkeypatch.setattr(ReportJobs, "_versions", {})
+    assert ReportJobs.status(job["id"])["status"] in ("queued", "running")
+    duplicate, created = ReportJobs.submit("csv", 7, documents, lambda: 1)
+    assert not created and duplicate["id"] == job["id"]
+
+    # Assert that once the job finished its state and report are read from disk
+    release.set()
+    for _ in range(100):
+        if ReportJobs.status(job["id"])["status"] == "finished":
+            break
+        time.sleep(0.05)
+    assert ReportJobs.status(job["id"])["status"] == "finished"
+    assert ReportJobs.submit("csv", 7, documents, lambda: 1)[0]["id"] == job["id"]
+
+def test_rate_limit() -> None:
+    """
+    Test that a user past the burst of its token bucket has to wait, while other users do not.
+    """
+    # A bucket of 2 requests, refilled once every 1000 seconds
+    buckets = TokenBuckets(rate=0.001, burst=2)
+    
+    # Assert that the burst is granted and the next request has to wait about 1000 seconds
+    assert buckets.take("user:1") == 0 and buckets.take("user:1") == 0
+    assert buckets.take("user:1") > 900
+    
+    # Assert that another user still has its own burst
+    assert buckets.take("user:2") == 0
+
+def test_admission_rate_limits(monkeypatch) -> None:
+    """
+    Test the per-user rate limits over HTTP: 429 with Retry-After past the burst, and the separate budget of the expensive routes.
+    """
+    monkeypatch.setattr(AdmissionControl, "requests", TokenBuckets(rate=0.001, burst=3))
+    monkeypatch.setattr(AdmissionControl, "expensive_requests", TokenBuckets(rate=0.001, burst=1))
+    headers = {"Authorization": f"Bearer {token}"}
+    
+    # Assert that the expensive budget runs out first, while cheap requests are still served
+    assert client.post("/candidates/shortlist", json={}, headers=headers).status_code == 200
+    response = client.post("/candidates/shortlist", json={}, headers=headers)
+    assert response.status_code == 429 and response.json()["reason"] == "expensive_rate_limit"
+    assert client.get("/all-candidates", headers=headers).status_code in (200, 404)
+    
+    # Assert that past the burst every request of the user is rejected, and told to retry once a token is refilled
+    response = client.get("/all-candidates", headers=headers)
+    assert response.status_code == 429 and response.json()["reason"] == "rate_limit"
+    assert int(response.headers["Retry-After"]) >= 900
+    
+    # Assert that another user and the health checks are still served
+    other = TokenHelper.create_access_token({"id": str(ObjectId())})
+    assert client.get("/all-candidates", headers={"Authorization": f"Bearer {other}"}).status_code in (200, 404)
+    assert client.get("/health/live").status_code == 200
+
+def test_admission_load_shedding(monkeypatch) -> None:
+    """
+    Test the load shedding over HTTP: 503 with Retry-After for expensive requests once the pool is saturated,
+    for every request once too many operations wait for a connection, and past a route's concurrency limit.
+    """
+    headers = {"Authorization": f"Bearer {token}"}
+    
+    # Assert that a saturated pool sheds the expensive requests only
+    monkeypatch.setattr(admission_helper, "ADMISSION_EXPENSIVE_POOL_SATURATION", 0)
+    response = client.post("/candidates/shortlist", json={}, headers=headers)
+    assert response.status_code == 503 and response.json()["reason"] == "pool_saturation"
+    assert response.headers["Retry-After"] == str(admission_helper.ADMISSION_RETRY_AFTER)
+    assert client.get("/all-candidates", headers=headers).status_code in (200, 404)
+    
+    # Assert that a queue of operations waiting for a connection sheds every request
+    monkeypatch.setattr(admission_helper, "ADMISSION_MAX_POOL_WAITERS", 1)
+    monkeypatch.setattr(MongoDB.pool_monitor, "waiting", 1)
+    monkeypatch.setattr(MongoDB.async_pool_monitor, "waiting", 1)
+    response = client.get("/all-candidates", headers=headers)
+    assert response.status_code == 503 and response.json()["reason"] == "pool_queue"
+    monkeypatch.setattr(MongoDB.pool_monitor, "waiting", 0)
+    monkeypatch.setattr(MongoDB.async_pool_monitor, "waiting", 0)
+    
+    # Assert that a route with all its slots taken sheds its requests and not those of another route
+    monkeypatch.setattr(admission_helper, "ROUTE_CONCURRENCY_LIMIT", 1)
+    slots = AdmissionControl.slots("GET", "/all-candidates", False)
+    assert AdmissionControl.concurrency.acquire(slots)
+    try:
+        response = client.get("/all-candidates", headers=headers)
+        assert response.status_code == 503 and response.json()["reason"] == "concurrency_limit"
+        assert client.get("/candidates/autocomplete", params={"field": "skills", "prefix": "py"}, headers=headers).status_code == 200
+    finally:
+        AdmissionControl.concurrency.release(slots)
+
+def test_single_flight_coalescing() -> None:
+    """
+    Test that identical concurrent reads share one query and its result.
+    """
+    flights = SingleFlight("test_read", timeout=5, register=False)
+    calls = []
+    
+    def slow_read() -> dict:
+        calls.append(1)
+        time.sleep(0.2)
+        return {"status": "success"}
+    
+    # Start ten identical reads at once
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flights.do("key", slow_read))) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    # Assert that a single query ran and every caller got its result
+    assert len(calls) == 1
+    assert results == [{"status": "success"}] * 10
+    assert flights.stats()["coalesced"] == 9
+
+    # Assert that a read arriving after forget, as after a write, runs a query of its own
+    first = threading.Thread(target=lambda: flights.do("key", slow_read))
+    first.start()
+    time.sleep(0.05)
+    flights.forget("key")
+    flights.do("key", slow_read)
+    first.join()
+    assert len(calls) == 3
+
+def test_single_flight_errors_and_timeouts() -> None:
+    """
+    Test that the error of a coalesced query is raised to every caller, and that a caller stops waiting after the timeout.
+    """
+    flights = SingleFlight("test_failing_read", timeout=5, register=False)
+    calls = []
+    
+    def failing_read() -> dict:
+        calls.append(1)
+        time.sleep(0.2)
+        raise TimeoutError("read timed out")
+    
+    # Start ten identical reads of a query that fails
+    errors = []
+    def read() -> None:
+        try:
+            flights.do("key", failing_read)
+        except TimeoutError as e:
+            errors.append(e)
+    threads = [threading.Thread(target=read) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    # Assert that a single query ran and every caller got its error
+    assert len(calls) == 1
+    assert len(errors) == 10 and all(error is errors[0] for error in errors)
+    
+    # Start a read that hangs, then an identical one with a short timeout
+    flights = SingleFlight("test_stuck_read", timeout=0.05, register=False)
+    started, release = threading.Event(), threading.Event()
+    def stuck_read() -> str:
+        started.set()
+        release.wait(5)
+        return "stuck"
+    leader = threading.Thread(target=flights.do, args=("key", stuck_read))
+    leader.start()
+    assert started.wait(5)
+    
+    # Assert that the second caller gave up waiting and ran its own query
+    assert flights.do("key", lambda: "own") == "own"
+    assert flights.stats()["timeouts"] == 1
+    release.set()
+    leader.join()
+
+def test_single_flight_async() -> None:
+    """
+    Test the coalescing of query coroutines: one query and its error for every caller, and a caller giving up after the timeout.
+    """
+    calls = []
+    
+    async def failing_read() -> dict:
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        raise TimeoutError("read timed out")
+    
+    async def stuck_read() -> str:
+        await asyncio.sleep(5)
+        return "stuck"
+    
+    async def own_read() -> str:
+        return "own"
+    
+    async def main():
+        flights = SingleFlight("test_async_read", timeout=5, register=False)
+        failed = await asyncio.gather(*[flights.do_async("key", failing_read) for _ in range(10)], return_exceptions=True)
+        stuck = SingleFlight("test_async_stuck_read", timeout=0.05, register=False)
+        leader = asyncio.ensure_future(stuck.do_async("key", stuck_read))
+        await asyncio.sleep(0)
+        own = await stuck.do_async("key", own_read)
+        leader.cancel()
+        return failed, own, stuck.stats()
+    
+    failed, own, stats = asyncio.run(main())
+    
+    # Assert that a single query ran and every caller got its error
+    assert len(calls) == 1
+    assert all(isinstance(error, TimeoutError) and error is failed[0] for error in failed)
+    
+    # Assert that the caller behind the stuck query ran its own after the timeout
+    assert own == "own" and stats["timeouts"] == 1
+
+def test_similar_candidates() -> None:
+    """
+    Test the similar candidates endpoint, kept current by candidate writes.
+    """
+    headers = {"Authorization": f"Bearer {token}"}
+    # Create a candidate, then one sharing only part of its skills
+    candidate_id = client.post("/candidate", json=sample_candidate, headers=headers).json()["candidate"]["_id"]
+    client.get(f"/candidate/{candidate_id}/similar", headers=headers)
+    other = dict(sample_candidate, skills=["Python", "Django"], career_level="Senior")
+    other_id = client.post("/candidate", json=other, headers=headers).json()["candidate"]["_id"]
+    
+    # Send a GET request for the candidates similar to the first one
+    response = client.get(f"/candidate/{candidate_id}/similar", params={"limit": 100}, headers=headers)
+    
+    # Assert that the response status code is 200 (OK) and that scores are sorted, best first
+    assert response.status_code == 200
+    similar = response.json()["similar"]
+    assert [match["score"] for match in similar] == sorted((match["score"] for match in similar), reverse=True)
+    
+    # Assert that the candidate created after the first request is scored on its shared features
+    match = next(match for match in similar if match["candidate_id"] == other_id)
+    assert 0 < match["score"] < 1 and match["shared"]["skills"] == ["Python"]
+    assert all(match["candidate_id"] != candidate_id for match in similar)
+    
+    # Assert that a deleted candidate is no longer returned, and that an unknown candidate is not found
+    client.delete(f"/candidate/{other_id}", headers=headers)
+    similar = client.get(f"/candidate/{candidate_id}/similar", params={"limit": 100}, headers=headers).json()["similar"]
+    assert all(match["candidate_id"] != other_id for match in similar)
+    assert client.get("/candidate/000000000000000000000000/similar", headers=headers).status_code == 404
+
+def test_similar_candidates_other_worker_write(monkeypatch) -> None:
+    """
+    Test that the similar candidates see a write handled by another worker.
+    """
+    headers = {"Authorization": f"Bearer {user_token('similar-workers@example.com')}"}
+    candidate_id = client.post("/candidate", json=sample_candidate, headers=headers).json()["candidate"]["_id"]
+    assert client.get(f"/candidate/{candidate_id}/similar", headers=headers).json()["similar"] == []
+    
+    # A write handled by another worker bumps the list version, but none of this worker's in-process handling runs
+    monkeypatch.setattr(CandidateService, "candidate_written", lambda *args, **kwargs: None)
+    other_id = client.post("/candidate", json=sample_candidate, headers=headers).json()["candidate"]["_id"]
+    
+    # Assert that the vectors were rebuilt and hold the new candidate
+    similar = client.get(f"/candidate/{candidate_id}/similar", headers=headers).json()["similar"]
+    assert [match["candidate_id"] for match in similar] == [other_id]
+
+def test_similarity_writes_not_blocked_by_scoring() -> None:
+    """
+    Test that a user's candidate vectors being scored do not hold back the writes of another user.
+    """
+    scored = SimilarityIndex.load("similarity-a", 0, [{"_id": "a1", "skills": ["Go"]}])
+    written = SimilarityIndex.load("similarity-b", 0, [{"_id": "b1", "skills": ["Go"]}])
+    
+    # While the first user's vectors are held by a scoring pass, a write of the second user is applied
+    with scored.lock:
+        writer = threading.Thread(target=SimilarityIndex.on_event, args=("created", "similarity-b", None, {"_id": "b2", "skills": ["Go"]}))
+        writer.start()
+        writer.join(5)
+        assert not writer.is_alive()
+    assert [match["candidate_id"] for match in SimilarityIndex.similar(written, "b1", 10)] == ["b2"]
+
+def test_shortlist() -> None:
+    """
+    Test the shortlist endpoint, its per-criterion breakdown and its snapshot invalidation.
+    """
+    headers = {"Authorization": f"Bearer {token}"}
+    profile = {"required_skills": ["python", "Kubernetes"], "min_years_of_experience": 10, "max_salary": 90000, "preferred_cities": ["Lisbon"]}
+    # Create a candidate matching every criterion of the profile
+    match = dict(sample_candidate, skills=["Python", "Kubernetes"], years_of_experience=12, city="Lisbon", salary=85000)
+    match_id = client.post("/candidate", json=match, headers=headers).json()["candidate"]["_id"]
+    
+    # Send a POST request to rank the candidates against the profile
+    response = client.post("/candidates/shortlist", params={"limit": 5}, json=profile, headers=headers)
+    
+    # Assert that the response status code is 200 (OK) and that the matching candidate ranks first with a full breakdown
+    assert response.status_code == 200
+    best = response.json()["shortlist"][0]
+    assert best["candidate_id"] == match_id and best["score"] == 1
+    assert best["breakdown"] == {"required_skills": 1, "experience": 1, "salary": 1, "city": 1}
+    
+    # Assert that a candidate created afterwards is scored, and that strict mode keeps only full skill matches
+    partial = dict(sample_candidate, skills=["Python"], years_of_experience=5, city="Lisbon", salary=80000)
+    partial_id = client.post("/candidate", json=partial, headers=headers).json()["candidate"]["_id"]
+    shortlist = client.post("/candidates/shortlist", params={"limit": 500}, json=profile, headers=headers).json()["shortlist"]
+    scored = next(candidate for candidate in shortlist if candidate["candidate_id"] == partial_id)
+    assert scored["breakdown"] == {"required_skills": 0.5, "experience": 0.5, "salary": 1, "city": 1}
+    strict = client.post("/candidates/shortlist", json=dict(profile, require_all_required_skills=True), headers=headers).json()
+    assert all(candidate["breakdown"]["required_skills"] == 1 for candidate in strict["shortlist"])
+
+def test_change_feed_resume() -> None:
+    """
+    Test the candidate change feed: live events, resuming from a Last-Event-ID, and a reset when the id is unknown.
+    """
+    headers = {"Authorization": f"Bearer {token}"}
+    user_key = TokenHelper.user_key(TokenHelper.verify_token(token))
+
+    async def read_events(last_event_id, write, count):
+        subscription, replay, reset_at = ChangeFeed.subscribe(user_key, last_event_id)
+        stream = ChangeFeed.stream(subscription, replay, reset_at)
+        assert (await stream.__anext__()).startswith(b"retry:")
+        if write is not None:
+            await asyncio.get_running_loop().run_in_executor(None, write)
+        chunks = [await asyncio.wait_for(stream.__anext__(), 5) for _ in range(count)]
+        await stream.aclose()
+        return [dict(line.split(": ", 1) for line in chunk.decode().strip().split("\n")) for chunk in chunks]
+
+    # Open a stream, then create a candidate and change its city
+    created = {}
+    def write():
+        created.update(client.post("/candidate", json=sample_candidate, headers=headers).json()["candidate"])
+        client.patch(f"/candidate/{created['_id']}", json={"city": "Porto"}, headers=headers)
+    events = asyncio.run(read_events(None, write, 2))
+    
+    # Assert that the creation and the update are pushed in order, the update with its changed fields only
+    assert [event["event"] for event in events] == ["created", "updated"]
+    assert json.loads(events[0]["data"])["candidate_id"] == created["_id"]
+    assert json.loads(events[1]["data"])["changed"] == {"city": "Porto", "version": 2}
+    
+    # Assert that reconnecting with the id of the creation replays the update
+    replayed = asyncio.run(read_events(events[0]["id"], None, 1))
+    assert replayed[0]["event"] == "updated" and replayed[0]["id"] == events[1]["id"]
+    
+    # Assert that an id from another process asks the client to reload
+    assert asyncio.run(read_events("unknown-1", None, 1))[0]["event"] == "reset"
+
+def test_change_feed_route(monkeypatch) -> None:
+    """
+    Test the change feed route: 401 without a valid token, 503 past the subscriber cap, and a subscriber
+    falling behind being sent an overflow event and disconnected.
+    """
+    response = client.post("/user", json={"first_name": "Jane", "last_name": "Doe", "email": "changes@example.com"})
+    headers = {"Authorization": f"Bearer {response.json()['token']}"}
+    user_key = str(response.json()["user"]["_id"])
+    open_streams = ChangeFeed._count
+    
+    # Assert that no stream is opened for a token that does not verify
+    response = client.get("/candidates/changes", headers={"Authorization": "Bearer garbage"})
+    assert response.status_code == 401 and ChangeFeed._count == open_streams
+    
+    # Assert that a stream past the subscriber cap is refused with Retry-After
+    monkeypatch.setattr(change_feed_helper, "CHANGE_FEED_MAX_SUBSCRIBERS", open_streams)
+    response = client.get("/candidates/changes", headers=headers)
+    assert response.status_code == 503 and "Retry-After" in response.headers
+    monkeypatch.setattr(change_feed_helper, "CHANGE_FEED_MAX_SUBSCRIBERS", open_streams + 1)
+    
+    # Once the stream is open, publish more events than its queue holds in one pass of its event loop
+    monkeypatch.setattr(change_feed_helper, "CHANGE_FEED_QUEUE_SIZE", 2)
+    def publish():
+        deadline = time.monotonic() + 5
+        while user_key not in ChangeFeed._subscriptions and time.monotonic() < deadline:
+            time.sleep(0.01)
+        subscription = ChangeFeed._subscriptions[user_key][0]
+        subscription.loop.call_soon_threadsafe(lambda: [
+            ChangeFeed.on_event("deleted", user_key, {"_id": f"candidate-{n}"}, None) for n in range(5)
+        ])
+    publisher = threading.Thread(target=publish)
+    publisher.start()
+    response = client.get("/candidates/changes", headers=headers)
+    publisher.join()
+    
+    # Assert that the stream ends with an overflow event, the client resumes from its last event id
+    assert response.status_code == 200
+    assert response.headers["Content-Type"].startswith("text/event-stream")
+    events = [dict(line.split(": ", 1) for line in chunk.split("\n")) for chunk in response.text.strip().split("\n\n")]
+    assert events[0] == {"retry": "3000"}
+    assert events[-1]["event"] == "overflow" and "id" not in events[-1]
+    assert ChangeFeed._count == open_streams
+
+def test_change_feed_history_bound(monkeypatch) -> None:
+    """
+    Test that the change feed keeps the history of a bounded number of users, and resets a client whose history was dropped.
+    """
+    monkeypatch.setattr(change_feed_helper, "CHANGE_FEED_MAX_USERS", 1)
+    ChangeFeed.on_event("deleted", "history-a", {"_id": "candidate-a1"}, None)
+    first_event_id = ChangeFeed.event_id(ChangeFeed._sequence)
+    ChangeFeed.on_event("deleted", "history-a", {"_id": "candidate-a2"}, None)
+    
+    # Assert that a write of another user drops the least recently used history
+    ChangeFeed.on_event("deleted", "history-b", {"_id": "candidate-b1"}, None)
+    assert list(ChangeFeed._history) == ["history-b"]
+    
+    async def resume(user_key, last_event_id):
+        subscription, replay, reset_at = ChangeFeed.subscribe(user_key, last_event_id)
+        ChangeFeed.unsubscribe(subscription)
+        return replay, reset_at
+    
+    # Assert that the first user, resuming after its first event, is reset instead of silently missing the second
+    assert asyncio.run(resume("history-a", first_event_id)) == ([], ChangeFeed._sequence)
+    
+    # Assert that the kept history is still replayed
+    replay, reset_at = asyncio.run(resume("history-b", ChangeFeed.event_id(ChangeFeed._sequence - 1)))
+    assert [change["candidate_id"] for _, change in replay] == ["candidate-b1"] and reset_at is None
+
+def test_index_advice_requires_token() -> None:
+    """
+    Test that the index advice is only reported to an authenticated user.
+    """
+    # A token that does not verify is rejected before any shape is reported
+    response = client.get("/admin/index-advice", headers={"Authorization": "Bearer garbage"})
+    assert response.status_code == 401
+    assert client.get("/admin/index-advice").status_code == 401
+    
+    # A registered user gets the report, of no shape so that none is explained
+    IndexAdvisor.reset()
+    response = client.get("/admin/index-advice", headers={"Authorization": f"Bearer {user_token('advice@example.com')}"})
+    assert response.status_code == 200
+    assert set(response.json()) == {"missing_indexes", "shapes"}
+
+def test_cache_stats_requires_token() -> None:
+    """
+    Test that the cache statistics are only reported to an authenticated user.
+    """
+    # A token that does not verify is rejected
+    response = client.get("/admin/cache-stats", headers={"Authorization": "Bearer garbage"})
+    assert response.status_code == 401
+    
+    # A registered user gets the hit ratio of each cache and the coalesced reads
+    response = client.get("/admin/cache-stats", headers={"Authorization": f"Bearer {user_token('cache-stats@example.com')}"})
+    assert response.status_code == 200
+    assert {"tokens", "results", "shortlist_snapshots", "coalescing"} <= response.json().keys()
+
+def test_fork_resets_process_state() -> None:
+    """
+    Test that a forked worker starts with empty caches, no query in flight, free concurrency slots and zeroed metrics.
+    """
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("key", "value")
+    flights = SingleFlight("test_fork", register=False)
+    flights.do("key", lambda: "value")
+    client.get("/health/live")
+    # A request of the parent in progress at fork time
+    slots = (("GET /all-candidates", 1),)
+    assert AdmissionControl.concurrency.acquire(slots)
+    
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            state = {
+                "cache": cache.stats()["size"],
+                "flights": flights.stats()["executed"],
+                "slots": AdmissionControl.concurrency.acquire(slots),
+                "requests": len(HTTP_REQUESTS.samples()),
+            }
+            os.write(write, json.dumps(state).encode())
+        finally:
+            os._exit(0)
+    AdmissionControl.concurrency.release(slots)
+    os.close(write)
+    os.waitpid(pid, 0)
+    
+    # Assert that nothing of the parent's state was inherited
+    assert json.loads(os.read(read, 4096)) == {"cache": 0, "flights": 0, "slots": True, "requests": 0}
+    os.close(read)
+    
+    # Assert that the fork hook does not keep a dropped cache alive
+    dropped = weakref.ref(TTLCache(maxsize=1, ttl=1))
+    gc.collect()
+    assert dropped() is None
+
+def test_async_router(monkeypatch) -> None:
+    """
+    Test the candidate routes of the async router, served with DATABASE_MODE=async, whatever the mode of the suite.
+    """
+    # Assert that no route of the async router blocks its event loop on the sync token check
+    def calls(dependant) -> set:
+        return {dependant.call} | {call for sub in dependant.dependencies for call in calls(sub)}
+    assert all(TokenHelper.verify_token not in calls(route.dependant) for route in async_candidate.routes + async_user.routes)
+    
+    # Build the app as main does with DATABASE_MODE=async, the motor client is opened in the loop of the TestClient
+    monkeypatch.setenv("DATABASE_MODE", "async")
+    async_app = FastAPI()
+    async_app.include_router(async_user)
+    async_app.include_router(async_candidate)
+    try:
+        with TestClient(async_app) as async_client:
+            response = async_client.post("/user", json={"first_name": "Jane", "last_name": "Doe", "email": "async-router@example.com"})
+            headers = {"Authorization": f"Bearer {response.json()['token']}"}
+            match = dict(sample_candidate, skills=["Python", "Kubernetes"], years_of_experience=12, city="Lisbon", salary=85000)
+            match_id = async_client.post("/candidate", json=match, headers=headers).json()["candidate"]["_id"]
+            other_id = async_client.post("/candidate", json=dict(sample_candidate, skills=["Python"]), headers=headers).json()["candidate"]["_id"]
+            
+            # Assert that the list, the shortlist and the similar candidates are read through the async token check
+            listed = async_client.get("/all-candidates", headers=headers)
+            assert listed.status_code == 200
+            assert {candidate["_id"] for candidate in listed.json()} == {match_id, other_id}
+            shortlist = async_client.post("/candidates/shortlist", json={"required_skills": ["Kubernetes"]}, headers=headers)
+            assert shortlist.status_code == 200 and shortlist.json()["shortlist"][0]["candidate_id"] == match_id
+            similar = async_client.get(f"/candidate/{match_id}/similar", headers=headers)
+            assert similar.status_code == 200 and similar.json()["similar"][0]["candidate_id"] == other_id
+            
+            # Assert that a token of no user is rejected by the routes that require one
+            anonymous = {"Authorization": f"Bearer {TokenHelper.create_access_token({'id': str(ObjectId())})}"}
+            assert async_client.get("/candidates/changes", headers=anonymous).status_code == 401
+    finally:
+        # Drop the motor client, it belongs to the loop of the TestClient
+        if MongoDB.async_client is not None:
+            MongoDB.async_client.close()
+            MongoDB.async_client = None
+
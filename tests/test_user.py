@@ -1,6 +1,7 @@
 from fastapi import HTTPException
 from fastapi.testclient import TestClient
 from app.main import app
+from app.helper.token_helper import TokenHelper  # Import TokenHelper for its token cache
 
 # Initialize the TestClient for testing the FastAPI app
 client = TestClient(app)
@@ -32,4 +33,28 @@ def test_create_user() -> None:
 def test_get_user():
     user_id ="66dc2845cd3a5ae7e6971508"
     response = client.get(f"/user/{user_id}")
-    assert response.status_code == 200
\ No newline at end of file
+    assert response.status_code == 200
+
+def test_token_cache_invalidation() -> None:
+    """
+    Test that the cached token of a user stops authenticating from the cache once the user is invalidated.
+    """
+    user_data = {"first_name": "John", "last_name": "Doe", "email": "token-cache@example.com"}
+    response = client.post("/user", json=user_data)
+    user_id, token = response.json()["user"]["_id"], response.json()["token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    
+    # Assert that a verified token authenticates from the cache
+    assert client.post("/candidates/shortlist", json={}, headers=headers).status_code == 200
+    assert TokenHelper.get_cached_user(token)["_id"] == user_id
+    
+    # Assert that registering the email again drops the cached token, and that the token is verified again afterwards
+    client.post("/user", json=user_data)
+    assert TokenHelper.get_cached_user(token) is None
+    assert client.post("/candidates/shortlist", json={}, headers=headers).status_code == 200
+    assert TokenHelper.get_cached_user(token)["_id"] == user_id
+    
+    # Assert that invalidating the user drops the cached token
+    TokenHelper.invalidate_user(user_id)
+    assert TokenHelper.get_cached_user(token) is None
+